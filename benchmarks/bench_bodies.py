@@ -0,0 +1,80 @@
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer, build_article_page
+from models.article import Article
+from services.body_service import fetch_bodies, body_pool_context
+from services.news_service import create_async_session
+
+PAGES = 300
+PARAGRAPHS = 60
+REPEAT = 3
+CONCURRENCY = 32
+
+def default_workers():
+    # 1, 2, 4, ... up to one worker per CPU
+    workers = [1]
+    while workers[-1] * 2 <= (os.cpu_count() or 1):
+        workers.append(workers[-1] * 2)
+    if workers[-1] != (os.cpu_count() or 1):
+        workers.append(os.cpu_count())
+    return workers
+
+def fetch_pages(server, pages, executor):
+    async def run():
+        session = create_async_session(max_per_host=CONCURRENCY)
+        try:
+            articles = [Article(f"Story {i}", f"{server.url}/story/{i}") for i in range(pages)]
+            await fetch_bodies(articles, session=session, timeout=60, deadline=600,
+                               concurrency=CONCURRENCY, executor=executor)
+            return sum(article.body is not None for article in articles)
+        finally:
+            await session.close()
+    return asyncio.run(run())
+
+def measure(server, pages, executor, repeat):
+    # The first run starts the workers and imports lxml in them, so it isn't timed
+    extracted = fetch_pages(server, pages, executor)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fetch_pages(server, pages, executor)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), extracted
+
+def main():
+    parser = argparse.ArgumentParser(description="Time downloading and extracting article pages with 1..N parser processes.")
+    parser.add_argument("--pages", type=int, default=PAGES, help="pages fetched per run")
+    parser.add_argument("--paragraphs", type=int, default=PARAGRAPHS, help="story paragraphs on each page")
+    parser.add_argument("--workers", type=lambda value: [int(n) for n in value.split(",")], default=default_workers(),
+                        help="comma-separated process counts to compare (default: powers of two up to the CPU count)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per configuration; the median is reported")
+    args = parser.parse_args()
+
+    page = build_article_page(args.paragraphs)
+    with StubServer(page, content_type="text/html; charset=utf-8") as server:
+        print(f"{args.pages} pages of {len(page) / 1024:.0f} KiB from {server.url} on {os.cpu_count()} CPUs\n")
+        print(f"{'parsers':<16} {'median':>11} {'pages/s':>9} {'speedup':>8}")
+
+        baseline = None
+        # Processes start the way the app's pool starts them
+        rows = [(f"{n} process{'es' if n > 1 else ''}", lambda n=n: ProcessPoolExecutor(n, mp_context=body_pool_context()))
+                for n in args.workers]
+        # Threads share the GIL, so they show what the process pool buys
+        rows.append((f"{args.workers[-1]} threads", lambda: ThreadPoolExecutor(args.workers[-1])))
+        for label, create_executor in rows:
+            with create_executor() as executor:
+                seconds, extracted = measure(server, args.pages, executor, args.repeat)
+            baseline = baseline or seconds
+            print(f"{label:<16} {seconds * 1000:>8.0f} ms {args.pages / seconds:>9.0f} {baseline / seconds:>7.2f}x"
+                  + ("" if extracted == args.pages else f"   ({args.pages - extracted} pages without text)"))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from benchmarks.stub_server import StubServer, build_feed
+from services.news_service import (build_feed_url, parse_feed, fetch_news, fetch_news_async,
+                                   close_session, create_async_session, close_async_session)
+
+QUERIES = 50
+THREADS = 8
+
+def fetch_without_pool(query):
+    response = requests.get(build_feed_url(query), timeout=10)
+    return parse_feed(response.content)
+
+def run_back_to_back(fetch):
+    for i in range(QUERIES):
+        fetch(f"topic {i}")
+
+def run_concurrent(fetch):
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(fetch, [f"topic {i}" for i in range(QUERIES)]))
+
+async def run_async_without_pool():
+    async def fetch(query):
+        session = create_async_session()
+        try:
+            return await fetch_news_async(query, session=session)
+        finally:
+            await session.close()
+    await asyncio.gather(*(fetch(f"topic {i}") for i in range(QUERIES)))
+
+async def run_async_pooled():
+    try:
+        await asyncio.gather(*(fetch_news_async(f"topic {i}") for i in range(QUERIES)))
+    finally:
+        await close_async_session()
+
+def measure(server, label, func):
+    server.reset_counts()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<34} {elapsed * 1000:>9.1f} ms   {server.connections:>4} connections")
+
+def main():
+    with StubServer(build_feed(20)) as server, \
+         patch('services.news_service.NEWS_FEED_URL', server.url + "/rss/search"):
+        print(f"{QUERIES} queries against {server.url}\n")
+        
+        measure(server, "back-to-back, new connection", lambda: run_back_to_back(fetch_without_pool))
+        measure(server, "back-to-back, pooled session", lambda: run_back_to_back(fetch_news))
+        close_session()
+        
+        measure(server, f"{THREADS} threads, new connection", lambda: run_concurrent(fetch_without_pool))
+        measure(server, f"{THREADS} threads, pooled session", lambda: run_concurrent(fetch_news))
+        close_session()
+        
+        measure(server, "asyncio, session per fetch", lambda: asyncio.run(run_async_without_pool()))
+        measure(server, "asyncio, shared session", lambda: asyncio.run(run_async_pooled()))
+
+if __name__ == "__main__":
+    main()
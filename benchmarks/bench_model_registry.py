@@ -0,0 +1,63 @@
+import sys
+import os
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer
+from config.settings import GEMINI_MODEL
+from services.ai_service import load_genai, get_model, reset_models
+
+CALLS = 200
+THREADS = 8
+PROMPT = "Pick the best headlines:\n1. Headline 1\n2. Headline 2"
+RESPONSE = {"candidates": [{"content": {"parts": [{"text": "1,2"}], "role": "model"}, "finishReason": "STOP", "index": 0}]}
+
+def configure(server):
+    # REST transport so the SDK talks to the local stand-in instead of Google
+    load_genai().configure(api_key="benchmark", transport="rest", client_options={"api_endpoint": server.url})
+
+def call_with_new_client(server):
+    configure(server)
+    return load_genai().GenerativeModel(GEMINI_MODEL).generate_content(PROMPT).text
+
+def call_with_new_model(server):
+    return load_genai().GenerativeModel(GEMINI_MODEL).generate_content(PROMPT).text
+
+def call_with_shared_model(server):
+    return get_model().generate_content(PROMPT).text
+
+def run_back_to_back(server, call):
+    for _ in range(CALLS):
+        call(server)
+
+def run_concurrent(server, call):
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(lambda _: call(server), range(CALLS)))
+
+def measure(server, label, run, call):
+    configure(server)
+    reset_models()
+    server.reset_counts()
+    start = time.perf_counter()
+    run(server, call)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:>9.1f} ms   {server.connections:>4} connections")
+
+def main():
+    with StubServer(json.dumps(RESPONSE).encode(), content_type="application/json") as server:
+        print(f"{CALLS} Gemini calls against {server.url}\n")
+        # Warm up so lazy SDK imports don't land on the first measurement
+        measure(server, "warm-up", lambda server, call: call(server), call_with_new_client)
+        
+        measure(server, "back-to-back, configure + model per call", run_back_to_back, call_with_new_client)
+        measure(server, "back-to-back, model per call", run_back_to_back, call_with_new_model)
+        measure(server, "back-to-back, shared model", run_back_to_back, call_with_shared_model)
+        
+        measure(server, f"{THREADS} threads, model per call", run_concurrent, call_with_new_model)
+        measure(server, f"{THREADS} threads, shared model", run_concurrent, call_with_shared_model)
+
+if __name__ == "__main__":
+    main()
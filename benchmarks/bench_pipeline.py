@@ -0,0 +1,202 @@
+import sys
+import os
+import gc
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import platform
+import statistics
+import subprocess
+import tracemalloc
+from contextlib import ExitStack
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_server import StubServer, FakeGemini, build_feed
+from models.article import extract_article_data
+from services.news_service import (parse_feed, fetch_news, extract_titles, format_titles_for_ai,
+                                   close_session, close_async_session)
+from services.ai_service import parse_ai_selection, reset_rate_limits
+from services.batch_service import run_batch
+from services.dedupe_service import dedupe_articles
+from utils.startup import PROJECT_DIR
+from utils.bloom import BloomFilter
+
+SIZES = (20, 1000, 50000)
+REPEAT = 5
+QUERIES = 20
+GEMINI_DELAY = 0.05
+TOLERANCE = 0.25
+# Entries a topic's seen-article filter is sized for
+SEEN_CAPACITY = 1000000
+# Micro-benchmarks repeat the call this many times per timed run
+LOOPS = 10000
+# Peaks this small move around with interpreter internals, not with our code
+MEMORY_SLACK = 64 * 1024
+
+def measure(func, repeat=REPEAT, items=None):
+    func()
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    # Memory is traced on its own run, since tracemalloc slows down everything it watches
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    result = {"seconds": statistics.median(times), "min_seconds": min(times), "peak_bytes": peak, "runs": repeat}
+    if items:
+        result["items"] = items
+        result["items_per_second"] = items / result["seconds"]
+    return result
+
+def repeated(func, loops=LOOPS):
+    def run():
+        for _ in range(loops):
+            func()
+    return run
+
+def offline_pipeline(server, gemini):
+    # Point every feed at the stub server and every Gemini call at the fake model
+    stack = ExitStack()
+    stack.enter_context(patch('services.news_service.NEWS_FEED_URL', server.url + "/rss/search"))
+    stack.enter_context(patch('services.news_service.NEWS_EDITIONS', [('en-US', 'US', 'US:en')]))
+    stack.enter_context(patch('services.news_service.EXTRA_FEEDS', []))
+    stack.enter_context(patch('services.ai_service.get_model', return_value=gemini))
+    # The fake model has no quota, so the limiter would only measure itself
+    stack.enter_context(patch('services.ai_service.GEMINI_REQUESTS_PER_MINUTE', 10 ** 9))
+    stack.enter_context(patch('services.ai_service.GEMINI_BURST', 10 ** 9))
+    stack.callback(reset_rate_limits)
+    stack.callback(close_session)
+    reset_rate_limits()
+    return stack
+
+def run_queries(queries, **options):
+    async def collect():
+        try:
+            # The synthetic feed links point nowhere, so there is nothing to resolve
+            return [result async for result in run_batch(queries, use_cache=False, resolve=False, **options)]
+        finally:
+            await close_async_session()
+    return asyncio.run(collect())
+
+def run_benchmarks(sizes, repeat, queries, gemini_delay):
+    results = {}
+    with StubServer() as server, offline_pipeline(server, FakeGemini(gemini_delay)):
+        for size in sizes:
+            feed = build_feed(size)
+            server.body = feed
+            results[f"parse_feed/{size}"] = measure(lambda: parse_feed(feed), repeat, items=size)
+            results[f"fetch_news/{size}"] = measure(lambda: fetch_news("benchmark", limit=None), repeat, items=size)
+
+            articles = parse_feed(feed)
+            build_prompt = lambda: format_titles_for_ai(extract_titles(articles))
+            results[f"build_prompt/{size}"] = measure(repeated(build_prompt, LOOPS // 10), repeat, items=LOOPS // 10)
+
+        articles = parse_feed(build_feed(20))
+        picked_numbers = parse_ai_selection("3, 1, 7,12, 5", len(articles))
+        results["parse_ai_selection"] = measure(
+            repeated(lambda: parse_ai_selection("3, 1, 7,12, 5", len(articles))), repeat, items=LOOPS)
+        results["extract_article_data"] = measure(
+            repeated(lambda: extract_article_data(articles, picked_numbers)), repeat, items=LOOPS)
+
+        # Delta mode checks every feed item against the topic's filter, so lookups must stay
+        # cheap when the filter is sized for (and half full of) a million articles
+        with tempfile.TemporaryDirectory() as directory:
+            seen = BloomFilter(os.path.join(directory, "topic.bloom"), capacity=SEEN_CAPACITY)
+            seen.update(f"https://news.example.com/articles/{i}" for i in range(0, SEEN_CAPACITY, 2))
+            urls = [f"https://news.example.com/articles/{i}" for i in range(100)]
+            results["seen_filter/100"] = measure(
+                repeated(lambda: [url in seen for url in urls], LOOPS // 100), repeat, items=LOOPS)
+            seen.close()
+
+        server.body = build_feed(100)
+        # If dedupe merged the synthetic headlines, the end-to-end runs would time a one-story feed
+        distinct = len(dedupe_articles(parse_feed(server.body)))
+        if distinct != 100:
+            raise RuntimeError(f"dedupe left {distinct} of 100 synthetic headlines; the end-to-end feed is not realistic")
+        results["end_to_end/1"] = measure(lambda: run_queries(["benchmark"]), repeat, items=1)
+        results[f"end_to_end/{queries}"] = measure(
+            lambda: run_queries([f"topic {i}" for i in range(queries)]), repeat, items=queries)
+        results[f"end_to_end_combined/{queries}"] = measure(
+            lambda: run_queries([f"topic {i}" for i in range(queries)], combined=True), repeat, items=queries)
+    return results
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=PROJECT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        # The fastest run is the least disturbed by whatever else the machine was doing
+        if result["min_seconds"] > previous["min_seconds"] * (1 + tolerance):
+            regressions.append((name, "min_seconds", previous["min_seconds"], result["min_seconds"]))
+        if result["peak_bytes"] > previous["peak_bytes"] * (1 + tolerance) + MEMORY_SLACK:
+            regressions.append((name, "peak_bytes", previous["peak_bytes"], result["peak_bytes"]))
+    return regressions
+
+def print_results(results):
+    print(f"{'benchmark':<28} {'median':>11} {'items/s':>13} {'peak memory':>13}")
+    for name, result in results.items():
+        rate = f"{result['items_per_second']:,.0f}" if "items_per_second" in result else ""
+        print(f"{name:<28} {result['seconds'] * 1000:>8.2f} ms {rate:>13} {result['peak_bytes'] / 2 ** 20:>9.2f} MiB")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the news pipeline's hot paths offline and record the results.")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")], default=list(SIZES),
+                        help="comma-separated feed sizes to parse (default: 20,1000,50000)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per benchmark; the median is reported")
+    parser.add_argument("--queries", type=int, default=QUERIES, help="queries in the end-to-end batch run")
+    parser.add_argument("--gemini-delay", type=float, default=GEMINI_DELAY, help="seconds the fake Gemini model takes per call")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results from an earlier run; exit 1 if anything got slower or bigger")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed growth over the baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.sizes, args.repeat, args.queries, args.gemini_delay)
+    print_results(results)
+
+    if args.output:
+        report = {
+            "commit": current_commit(),
+            "created_at": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "gemini_delay": args.gemini_delay,
+            "results": results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline["results"], args.tolerance)
+        print(f"\nCompared with {baseline.get('commit') or args.compare}:")
+        for name, metric, before, after in regressions:
+            print(f"✗ {name} {metric}: {before:,.4g} → {after:,.4g} ({(after / before - 1) * 100:+.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"✓ No benchmark regressed by more than {args.tolerance * 100:.0f}%")
+
+if __name__ == "__main__":
+    main()
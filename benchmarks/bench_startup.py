@@ -0,0 +1,40 @@
+import sys
+import os
+import time
+import argparse
+import statistics
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.startup import PROJECT_DIR, profile_startup, print_startup_profile
+
+RUNS = 7
+BUDGET = 0.5
+
+def time_cold_start(statement="import main"):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", statement], cwd=PROJECT_DIR, check=True)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail if the CLI's cold start goes over budget.")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--budget", type=float, default=BUDGET, help="seconds allowed for the median cold start")
+    args = parser.parse_args()
+    
+    # The interpreter on its own is the floor nothing in this repo can improve on
+    baseline = statistics.median(time_cold_start("pass") for _ in range(args.runs))
+    cold_start = statistics.median(time_cold_start() for _ in range(args.runs))
+    
+    print(f"bare interpreter  {baseline * 1000:7.1f} ms")
+    print(f"import main       {cold_start * 1000:7.1f} ms  (budget {args.budget * 1000:.0f} ms)\n")
+    
+    if cold_start > args.budget:
+        print_startup_profile(profile_startup())
+        print(f"\n✗ Cold start is over budget by {(cold_start - args.budget) * 1000:.1f} ms")
+        sys.exit(1)
+    print("✓ Cold start is within budget")
+
+if __name__ == "__main__":
+    main()
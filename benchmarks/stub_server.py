@@ -0,0 +1,141 @@
+import threading
+import time
+import asyncio
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUBJECTS = ("Senate", "City council", "Central bank", "Union leaders", "Researchers", "Regulators", "Farmers",
+            "Airline", "School board", "Court", "Startup")
+VERBS = ("approves", "delays", "rejects", "questions", "expands", "cuts", "backs", "reviews", "blocks", "funds",
+         "probes", "unveils", "drops")
+OBJECTS = ("housing plan", "rail strike deal", "rate increase", "water rules", "vaccine trial", "border checks",
+           "tax credit", "chip factory", "wildfire budget", "pension reform", "drone ban", "port expansion",
+           "museum loan", "grain exports", "data law", "bus fares", "solar subsidy")
+PLACES = ("Ohio", "Lagos", "Osaka", "Quebec", "Lisbon", "Nairobi", "Perth", "Bogota", "Hanoi", "Krakow", "Denver",
+          "Cairo", "Lima", "Oslo", "Manila", "Leeds", "Austin", "Seville", "Busan", "Tunis", "Calgary", "Dhaka", "Riga")
+
+def build_headline(i):
+    # The list lengths are coprime, so every i below their product gets its own combination and
+    # headlines share a word or two, as real ones do, without dedupe collapsing them into one story
+    return (f"{SUBJECTS[i % len(SUBJECTS)]} {VERBS[i % len(VERBS)]} {OBJECTS[i % len(OBJECTS)]} "
+            f"in {PLACES[i % len(PLACES)]}")
+
+def build_feed(item_count):
+    items = "".join(
+        f"<item><title>{build_headline(i)} - Source {i % 7}</title>"
+        f"<link>https://news.example.com/articles/{i}?oc=5</link>"
+        f"<pubDate>Mon, 20 Jan 2020 12:{i % 60:02d}:00 GMT</pubDate></item>"
+        for i in range(item_count)
+    )
+    return f"<?xml version=\"1.0\"?><rss><channel>{items}</channel></rss>".encode()
+
+def build_article_page(paragraph_count):
+    # A news page as publishers ship them: navigation, scripts and a sidebar around the story
+    sentence = "Officials said the plan would be reviewed again next year, according to the report. "
+    paragraphs = "".join(f"<p>{i}. {sentence * 4}</p>" for i in range(paragraph_count))
+    links = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(60))
+    return (f"<!DOCTYPE html><html><head><title>Story</title><script>{'var x = 1; ' * 500}</script></head>"
+            f"<body><header><nav><ul>{links}</ul></nav></header>"
+            f"<main><article><h1>Headline</h1><div class=\"body\">{paragraphs}</div></article>"
+            f"<aside><ul>{links}</ul></aside></main><footer><ul>{links}</ul></footer></body></html>").encode()
+
+class FakeGemini:
+    # Stands in for a GenerativeModel: answers every prompt after a fixed delay
+    def __init__(self, delay=0, picks="1,2,3,4,5", satisfaction="90"):
+        self.delay = delay
+        self.picks = picks
+        self.satisfaction = satisfaction
+        self.calls = 0
+
+    def answer(self, prompt):
+        self.calls += 1
+        if "JSON object" in prompt:
+            text = f'{{"picks": [{self.picks}], "satisfaction": {self.satisfaction}}}'
+        elif "satisfied" in prompt:
+            text = self.satisfaction
+        else:
+            text = self.picks
+        return SimpleNamespace(text=text)
+
+    def generate_content(self, prompt, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.answer(prompt)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self.answer(prompt)
+
+class StubServer:
+    def __init__(self, body=b"", delay=0, status=200, content_type="application/rss+xml"):
+        self.body = body
+        self.content_type = content_type
+        self.delay = delay
+        self.status = status
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def reset_counts(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self.do_GET()
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                self.send_response(stub.status)
+                self.send_header("Content-Type", stub.content_type)
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -3,7 +3,114 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+AI_COMBINED_MODE = False
+# Act on each AI pick as soon as Gemini streams it instead of waiting for the full answer
+AI_STREAM_SELECTION = False
+# Shared by every Gemini call in the process
+GEMINI_REQUESTS_PER_MINUTE = 60
+GEMINI_BURST = 10
+GEMINI_BACKOFF_MAX = 30
+GEMINI_BREAKER_FAILURES = 5
+GEMINI_BREAKER_RESET = 30
+# Opt-in: when a selection or satisfaction request is slower than this percentile of
+# recent ones, send a copy and use whichever answers first
+GEMINI_HEDGING = False
+GEMINI_HEDGE_PERCENTILE = 95
+# Hedges may add at most this share of extra requests
+GEMINI_HEDGE_MAX_RATIO = 0.1
+GEMINI_HEDGE_MIN_SAMPLES = 20
+GEMINI_HEDGE_WINDOW = 200
 
+NEWS_FEED_URL = 'https://news.google.com/rss/search'
 OUTPUT_FILE = 'top5_news.json'
 MAX_ARTICLES = 20
-TOP_ARTICLES = 5
\ No newline at end of file
+TOP_ARTICLES = 5
+FEED_ITEM_LIMIT = 100
+FEED_CHUNK_SIZE = 16 * 1024
+# Google News editions to search, as (hl, gl, ceid); more than one feed are fetched in parallel and merged
+NEWS_EDITIONS = [('en-US', 'US', 'US:en')]
+# Extra RSS search feeds, with '{query}' standing in for the URL-encoded query
+EXTRA_FEEDS = []
+# Seconds to wait for all feeds before going on with the ones that answered
+FEED_DEADLINE = 15
+
+DEDUPE_ENABLED = True
+# Jaccard similarity of the titles' word pairs; copies of one story score close to 1, while
+# different stories with the same wording ("... raises interest rates by 25 basis points") stay well below
+DEDUPE_THRESHOLD = 0.7
+MINHASH_PERMUTATIONS = 64
+MINHASH_BANDS = 16
+# Words per shingle
+SHINGLE_SIZE = 2
+
+RANKER_ENABLED = True
+RANKER_TOP_N = 12
+RANKER_FEATURES = 2 ** 12
+RANKER_DEDUPE_THRESHOLD = 0.8
+
+BATCH_FETCH_CONCURRENCY = 8
+BATCH_AI_CONCURRENCY = 4
+
+HTTP_POOL_CONNECTIONS = 10
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+HTTP_MAX_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.5
+HTTP_KEEPALIVE_TIMEOUT = 30
+
+CACHE_DIR = '.quicknews_cache'
+FEED_CACHE_PATH = os.path.join(CACHE_DIR, 'feeds.sqlite3')
+FEED_CACHE_TTL = 300
+FEED_CACHE_MAX_ENTRIES = 256
+FEED_CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+AI_CACHE_PERSIST = True
+AI_CACHE_PATH = os.path.join(CACHE_DIR, 'ai_responses.sqlite3')
+AI_CACHE_TTL = 6 * 60 * 60
+AI_CACHE_MAX_ENTRIES = 1000
+
+# Follow the selected articles' links (Google News hands out redirectors) to the publisher's URL
+RESOLVE_URLS = True
+RESOLVE_TIMEOUT = 5
+RESOLVE_DEADLINE = 8
+RESOLVE_CONCURRENCY = 8
+RESOLVE_MAX_REDIRECTS = 10
+REDIRECT_CACHE_PATH = os.path.join(CACHE_DIR, 'redirects.sqlite3')
+REDIRECT_CACHE_TTL = 30 * 24 * 60 * 60
+REDIRECT_CACHE_MAX_ENTRIES = 20000
+# Query parameters dropped from resolved links; other parameters can identify the story and are kept
+TRACKING_PARAM_PREFIXES = ('utm_',)
+TRACKING_PARAMS = ('fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'ocid', 'cmpid', '_ga')
+
+# Download the selected articles' pages and pull out their text (opt-in, one request per article)
+FETCH_BODIES = False
+BODY_TIMEOUT = 8
+BODY_DEADLINE = 15
+BODY_CONCURRENCY = 8
+BODY_MAX_BYTES = 2 * 1024 * 1024
+# Processes that parse the pages; None means one per CPU
+BODY_WORKERS = None
+
+# Delta mode: skip headlines a topic has already sent to Gemini, and keep the last
+# result until at least DELTA_MIN_NEW new ones have come in
+DELTA_MODE = False
+DELTA_MIN_NEW = 5
+DELTA_MAX_AGE = 24 * 60 * 60
+SEEN_FILTER_DIR = os.path.join(CACHE_DIR, 'seen')
+# About 1.2 MB per topic at a 1% false positive rate; the filter starts over when it fills up
+SEEN_FILTER_CAPACITY = 1000000
+SEEN_FILTER_ERROR_RATE = 0.01
+
+# 'sqlite' (WAL) or 'jsonl' (append-only log with an atomically replaced index)
+RESULT_STORE_BACKEND = 'sqlite'
+RESULT_STORE_PATH = os.path.join(CACHE_DIR, 'results.sqlite3')
+RESULT_LOG_PATH = os.path.join(CACHE_DIR, 'results.jsonl')
+RESULT_MAX_AGE = 30 * 60
+WATCHLIST_FILE = 'watchlist.txt'
+WATCH_INTERVAL = 15 * 60
+WATCH_JITTER = 0.1
+WATCH_MAX_REFRESHES_PER_MINUTE = 30
+
+METRICS_HOST = '127.0.0.1'
+SERVE_HOST = '127.0.0.1'
+SERVE_PORT = 8080
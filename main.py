@@ -1,11 +1,25 @@
+import argparse
+import asyncio
 import json
 import sys
-from config.settings import TOP_ARTICLES, OUTPUT_FILE
-from utils.spinner import run_with_spinner
-from services.news_service import fetch_news, extract_titles, format_titles_for_ai
-from services.ai_service import setup_gemini, get_ai_selection, parse_ai_selection, get_ai_satisfaction
-from models.article import extract_article_data, format_selected_titles
+import textwrap
+from config.settings import (OUTPUT_FILE, BATCH_FETCH_CONCURRENCY, BATCH_AI_CONCURRENCY, AI_COMBINED_MODE, AI_STREAM_SELECTION,
+                             RANKER_ENABLED, DEDUPE_ENABLED, WATCHLIST_FILE, WATCH_INTERVAL, METRICS_HOST,
+                             SERVE_HOST, SERVE_PORT, GEMINI_HEDGING, RESOLVE_URLS, FETCH_BODIES,
+                             DELTA_MODE)
+from utils.spinner import Spinner, run_with_spinner, run_with_spinner_async
+from utils.startup import warm_up, profile_startup, print_startup_profile
+from utils.tracing import traced, record, start_tracing, stop_tracing, print_trace_summary, write_chrome_trace
+from utils.metrics import start_metrics_server
+from utils.result_store import atomic_write_json
+from services.news_service import close_async_session
+from services.ai_service import setup_gemini, load_genai, set_hedging
+from services.batch_service import read_queries, run_batch, process_query, NO_NEWS
+from services.prefetch_service import run_watch, lookup_result, store_result
+from services.api_service import serve
+from models.article import Article
 
+@traced("save_news_to_file")
 def save_news_to_file(top_news, filename=OUTPUT_FILE, satisfaction=None):
     try:
         news_data = [article.to_dict() for article in top_news]
@@ -16,65 +30,257 @@ def save_news_to_file(top_news, filename=OUTPUT_FILE, satisfaction=None):
         if satisfaction is not None:
             data_to_save["ai_satisfaction"] = satisfaction
             
-        with open(filename, 'w') as f:
-            json.dump(data_to_save, f, indent=4)
+        record("bytes", atomic_write_json(filename, data_to_save, indent=4))
     except Exception as e:
         print(f"Error saving news to file: {str(e)}")
 
-def display_news(top_news, satisfaction=None):
+def display_header():
     print("\n┌───────────────────────────────────────────────")
     print("│ 📰 TOP 5 NEWS RESULTS")
     print("└───────────────────────────────────────────────\n")
+
+def display_article(number, item):
+    print(f"[{number}] {item.title}")
+    print(f"    🔗 {item.url}")
+    if item.lead:
+        print(f"    {textwrap.shorten(item.lead, 200)}")
+    print("", flush=True)
+
+def display_news(top_news, satisfaction=None):
+    display_header()
     
     for i, item in enumerate(top_news):
-        print(f"[{i+1}] {item.title}")
-        print(f"    🔗 {item.url}")
-        print("")
+        display_article(i + 1, item)
     
     if satisfaction is not None:
         print(f"AI SATISFACTION RATING: {satisfaction}%")
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch the top news about a topic, curated by AI.")
+    parser.add_argument("--no-cache", action="store_true", help="ignore cached results and fetch everything fresh")
+    parser.add_argument("--combined", action="store_true", default=AI_COMBINED_MODE,
+                        help="ask Gemini for the picks and the satisfaction rating in a single request")
+    parser.add_argument("--stream", action="store_true", default=AI_STREAM_SELECTION,
+                        help="show each AI pick as soon as Gemini sends it instead of waiting for the full answer")
+    parser.add_argument("--hedge", action="store_true", default=GEMINI_HEDGING,
+                        help="resend slow Gemini requests and use whichever copy answers first")
+    parser.add_argument("--no-dedupe", dest="dedupe", action="store_false", default=DEDUPE_ENABLED,
+                        help="keep syndicated copies of the same story instead of merging them")
+    parser.add_argument("--no-resolve", dest="resolve", action="store_false", default=RESOLVE_URLS,
+                        help="keep the feed's redirect links instead of looking up each article's publisher URL")
+    parser.add_argument("--bodies", action="store_true", default=FETCH_BODIES,
+                        help="download each selected article and save its lead paragraph and text")
+    parser.add_argument("--no-rank", dest="rank", action="store_false", default=RANKER_ENABLED,
+                        help="send headlines to Gemini in feed order instead of pre-ranking them locally")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report which imports the CLI spends its start-up time on, then exit")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="print a per-stage timing breakdown and write a Chrome trace to FILE")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    batch_parser = subparsers.add_parser("batch", help="run many queries concurrently")
+    batch_parser.add_argument("source", help="file with one query per line, or '-' for stdin")
+    batch_parser.add_argument("-o", "--output", help="write JSON Lines results to this file instead of stdout")
+    batch_parser.add_argument("--fetch-concurrency", type=int, default=BATCH_FETCH_CONCURRENCY,
+                              help="maximum number of news fetches in flight")
+    batch_parser.add_argument("--ai-concurrency", type=int, default=BATCH_AI_CONCURRENCY,
+                              help="maximum number of Gemini requests in flight")
+    batch_parser.add_argument("--delta", action="store_true", default=DELTA_MODE,
+                              help="only send Gemini headlines it hasn't seen for a query, and keep the last result until enough are new")
+    
+    watch_parser = subparsers.add_parser("watch", help="keep results for watched topics fresh in the background")
+    watch_parser.add_argument("--watchlist", default=WATCHLIST_FILE, help="file with one topic per line")
+    watch_parser.add_argument("--interval", type=float, default=WATCH_INTERVAL, help="seconds between refreshes of a topic")
+    watch_parser.add_argument("--once", action="store_true", help="refresh every topic once and exit")
+    watch_parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port at /metrics")
+    watch_parser.add_argument("--delta", action="store_true", default=DELTA_MODE,
+                              help="only send Gemini headlines it hasn't seen for a topic, and keep the last result until enough are new")
+    
+    serve_parser = subparsers.add_parser("serve", help="answer news queries over a local JSON HTTP API")
+    serve_parser.add_argument("--host", default=SERVE_HOST)
+    serve_parser.add_argument("--port", type=int, default=SERVE_PORT)
+    serve_parser.add_argument("--fetch-concurrency", type=int, default=BATCH_FETCH_CONCURRENCY,
+                              help="maximum number of news fetches in flight")
+    serve_parser.add_argument("--ai-concurrency", type=int, default=BATCH_AI_CONCURRENCY,
+                              help="maximum number of Gemini requests in flight")
+    
+    return parser.parse_args(argv)
+
+async def write_batch_results(queries, out, fetch_concurrency, ai_concurrency, **options):
     try:
-        run_with_spinner("Setting up AI service", setup_gemini)
+        async for result in run_batch(queries, fetch_concurrency, ai_concurrency, **options):
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            if "error" not in result:
+                store_result(result, "batch")
+    finally:
+        await close_async_session()
+
+def run_batch_command(args):
+    setup_gemini()
+    queries = read_queries(args.source)
+    if not queries:
+        print("No queries to run.")
+        return
+    
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        asyncio.run(write_batch_results(queries, out, args.fetch_concurrency, args.ai_concurrency,
+                                        use_cache=not args.no_cache, combined=args.combined,
+                                        stream=args.stream, dedupe=args.dedupe, rank=args.rank,
+                                        resolve=args.resolve, bodies=args.bodies, delta=args.delta))
+    finally:
+        if args.output:
+            out.close()
+    
+    if args.output:
+        print(f"✓ {len(queries)} results saved to {args.output}")
+
+def print_watch_result(result):
+    if "error" in result:
+        print(f"✗ {result['query']}: {result['error']}")
+    elif result.get("unchanged"):
+        print(f"= {result['query']}: not enough new articles, keeping the last result")
+    else:
+        print(f"✓ {result['query']}: {len(result['articles'])} articles, {result['ai_satisfaction']}% satisfaction")
+
+async def watch_topics(topics, interval, once, **options):
+    try:
+        await run_watch(topics, interval=interval, once=once, on_result=print_watch_result, **options)
+    finally:
+        await close_async_session()
+
+def run_watch_command(args):
+    setup_gemini()
+    topics = read_queries(args.watchlist)
+    if not topics:
+        print(f"No topics to watch in {args.watchlist}")
+        return
+    
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port, METRICS_HOST)
+        print(f"Serving metrics on http://{METRICS_HOST}:{args.metrics_port}/metrics")
+    
+    print(f"Watching {len(topics)} topics from {args.watchlist}...")
+    asyncio.run(watch_topics(topics, args.interval, args.once, use_cache=not args.no_cache,
+                             combined=args.combined, stream=args.stream, dedupe=args.dedupe, rank=args.rank,
+                             resolve=args.resolve, bodies=args.bodies, delta=args.delta))
+
+def run_serve_command(args):
+    setup_gemini()
+    print(f"Serving news on http://{args.host}:{args.port}/news?q=<topic> (metrics at /metrics)")
+    serve(args.host, args.port, fetch_concurrency=args.fetch_concurrency, ai_concurrency=args.ai_concurrency,
+          use_cache=not args.no_cache, combined=args.combined, stream=args.stream, dedupe=args.dedupe, rank=args.rank,
+          resolve=args.resolve, bodies=args.bodies)
+
+def show_stored_result(query, use_cache=True):
+    # Only watch mode refreshes topics on a schedule; an old interactive run isn't "prefetched"
+    stored = lookup_result(query, source="watch") if use_cache else None
+    if stored is None:
+        return False
+    
+    result, age = stored
+    top_news = [Article.from_dict(a) for a in result["articles"]]
+    satisfaction = result["ai_satisfaction"]
+    
+    save_news_to_file(top_news, satisfaction=satisfaction)
+    display_news(top_news, satisfaction=satisfaction)
+    print(f"✓ Prefetched results from {int(age // 60)} minutes ago saved to {OUTPUT_FILE}")
+    return True
+
+async def run_interactive(query, use_cache=True, combined=False, dedupe=True, rank=True, stream=False, resolve=True,
+                          bodies=False):
+    spinner = Spinner(f"Fetching news about {query}")
+    streamed = stream and not combined
+    stages = []
+    
+    def on_stage(stage, articles):
+        stages.append(stage)
+        spinner.clear()
+        if stage == "fetched":
+            print(f"Found {len(articles)} articles about '{query}'")
+        elif stage == "select":
+            print("Asking AI to select the best articles...")
+            spinner.update("Waiting for AI response")
+        elif stage == "rate":
+            print("Asking AI about its satisfaction with the selections...")
+            spinner.update("Getting AI satisfaction rating")
+        elif stage == "finish":
+            # Publisher links are looked up (and pages fetched) while Gemini is still busy; this waits for the rest
+            spinner.update("Fetching the articles" if bodies else "Resolving article links")
+    
+    def on_pick(number, article):
+        # Each article is shown as soon as its number arrives, with the feed's link
+        spinner.clear()
+        if number == 1:
+            display_header()
+        display_article(number, article)
+    
+    try:
+        result = await run_with_spinner_async(spinner.message, process_query(
+            query, asyncio.Semaphore(1), asyncio.Semaphore(1), use_cache=use_cache, combined=combined, dedupe=dedupe,
+            rank=rank, stream=streamed, resolve=resolve, bodies=bodies, on_stage=on_stage,
+            on_pick=on_pick if streamed else None), spinner=spinner)
+    finally:
+        await close_async_session()
+    
+    if result.get("error") == NO_NEWS:
+        print(f"No news found about '{query}'")
+        sys.exit(0)
+    if "error" in result:
+        print(result["error"])
+        sys.exit(1)
+    
+    top_news = [Article.from_dict(a) for a in result["articles"]]
+    satisfaction = result["ai_satisfaction"]
+    if not top_news:
+        print("No articles could be processed. Please try again.")
+        sys.exit(0)
+    
+    save_news_to_file(top_news, satisfaction=satisfaction)
+    store_result(result, "interactive")
+    if streamed and "finish" not in stages:
+        print(f"AI SATISFACTION RATING: {satisfaction}%")
+    else:
+        # Streamed picks went out before their publisher links and leads were in, so the final list follows
+        display_news(top_news, satisfaction=satisfaction)
+    print(f"✓ {len(top_news)} news articles saved to {OUTPUT_FILE}")
+    print("✓ Complete!")
+
+def main(args=None):
+    if args is None:
+        args = parse_args([])
+    
+    if args.profile_startup:
+        print_startup_profile(profile_startup())
+        return
+    
+    set_hedging(args.hedge)
+    tracer = start_tracing() if args.trace else None
+    try:
+        if args.command == "batch":
+            run_batch_command(args)
+            return
+        if args.command == "watch":
+            run_watch_command(args)
+            return
+        if args.command == "serve":
+            run_serve_command(args)
+            return
         
+        # The SDKs load in the background while we wait for the query
+        warm_up(load_genai)
         query = input('What do you want to hear about? ')
         
-        # Fetch news
-        articles = run_with_spinner(f"Fetching news about {query}", fetch_news, query)
-        
-        if not articles:
-            print(f"No news found about '{query}'")
-            sys.exit(0)
-        
-        print(f"Found {len(articles)} articles about '{query}'")
-        
-        titles = extract_titles(articles)
-        if not titles:
-            print(f"No titles found for '{query}'")
-            sys.exit(0)
-        
-        titles_text = format_titles_for_ai(titles)
+        # A fresh watch result needs no Gemini, so the store is checked before waiting on the SDK
+        if show_stored_result(query, use_cache=not args.no_cache):
+            return
         
-        print("Asking AI to select the best articles...")
-        ai_answer = run_with_spinner("Waiting for AI response", get_ai_selection, query, titles_text)
-        
-        picked_numbers = parse_ai_selection(ai_answer, len(titles), TOP_ARTICLES)
-        
-        top_news = run_with_spinner("Processing articles", extract_article_data, articles, picked_numbers)
-        
-        if not top_news:
-            print("No articles could be processed. Please try again.")
-            sys.exit(0)
+        run_with_spinner("Setting up AI service", setup_gemini)
         
-        selected_titles = format_selected_titles(articles, picked_numbers)
-        print("Asking AI about its satisfaction with the selections...")
-        satisfaction = run_with_spinner("Getting AI satisfaction rating", get_ai_satisfaction, query, selected_titles)
-    
-        save_news_to_file(top_news, satisfaction=satisfaction)
-        display_news(top_news, satisfaction=satisfaction)
-        print(f"✓ {len(top_news)} news articles saved to {OUTPUT_FILE}")
-        print("✓ Complete!")
+        asyncio.run(run_interactive(query, use_cache=not args.no_cache, combined=args.combined,
+                                    dedupe=args.dedupe, rank=args.rank, stream=args.stream, resolve=args.resolve,
+                                    bodies=args.bodies))
         
     except KeyboardInterrupt:
         print("\nOperation cancelled by user.")
@@ -83,6 +289,12 @@ def main():
         print(f"\nAn unexpected error occurred: {str(e)}")
         print("Please try again later.")
         sys.exit(1)
+    finally:
+        if tracer is not None:
+            stop_tracing()
+            print_trace_summary(tracer)
+            write_chrome_trace(tracer, args.trace)
+            print(f"✓ Trace saved to {args.trace} (open it in chrome://tracing or ui.perfetto.dev)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(parse_args())
\ No newline at end of file
@@ -1,30 +1,172 @@
+import math
+from array import array
+from email.utils import parsedate_to_datetime
+from utils.tracing import traced
+
+def parse_published(value):
+    # RFC-822 pubDate strings are parsed once, when the feed item is read
+    if value is None or isinstance(value, (int, float)):
+        return value
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
 class Article:
-    def __init__(self, title="No title", url="#"):
+    __slots__ = ("title", "url", "alternate_urls", "published", "source", "lead", "body")
+
+    def __init__(self, title="No title", url="#", alternate_urls=None, published=None, source=None, lead=None, body=None):
         self.title = title
         self.url = url
-    
+        self.alternate_urls = alternate_urls or []
+        self.published = published
+        self.source = source
+        self.lead = lead
+        self.body = body
+
+    @classmethod
+    def from_dict(cls, data):
+        published = data.get("published")
+        if published is None:
+            published = parse_published(data.get("publishedAt"))
+        return cls(data.get("title", "No title"), data.get("url", "#"), data.get("alternate_urls"),
+                   published, data.get("source"), data.get("lead"), data.get("body"))
+
     def to_dict(self):
-        return {
+        data = {
             "title": self.title,
             "url": self.url
         }
+        if self.alternate_urls:
+            data["alternate_urls"] = self.alternate_urls
+        if self.lead:
+            data["lead"] = self.lead
+        if self.body:
+            data["body"] = self.body
+        return data
+
+    def to_record(self):
+        # Everything needed to rebuild the article, for the feed cache
+        data = self.to_dict()
+        data["published"] = self.published
+        data["source"] = self.source
+        return data
+
+    def __repr__(self):
+        return f"Article({self.title!r}, {self.url!r})"
+
+class ArticleBatch:
+    # Articles stored column by column: one list per field and a packed array of
+    # timestamps (NaN when undated), so bulk sorts and filters never touch per-item objects
+    __slots__ = ("titles", "urls", "alternate_urls", "published", "sources")
+
+    def __init__(self):
+        self.titles = []
+        self.urls = []
+        self.alternate_urls = []
+        self.published = array('d')
+        self.sources = []
+
+    @classmethod
+    def from_articles(cls, articles):
+        if isinstance(articles, cls):
+            return articles
+        batch = cls()
+        for article in articles:
+            batch.append(article)
+        return batch
+
+    @classmethod
+    def concat(cls, batches):
+        merged = cls()
+        for batch in batches:
+            batch = cls.from_articles(batch)
+            merged.titles.extend(batch.titles)
+            merged.urls.extend(batch.urls)
+            merged.alternate_urls.extend(batch.alternate_urls)
+            merged.published.extend(batch.published)
+            merged.sources.extend(batch.sources)
+        return merged
 
+    def append(self, article):
+        if not isinstance(article, Article):
+            article = Article.from_dict(article)
+        self.titles.append(article.title)
+        self.urls.append(article.url)
+        self.alternate_urls.append(article.alternate_urls)
+        self.published.append(math.nan if article.published is None else article.published)
+        self.sources.append(article.source)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.take(range(*index.indices(len(self))))
+        published = self.published[index]
+        return Article(self.titles[index], self.urls[index], list(self.alternate_urls[index]),
+                       None if math.isnan(published) else published, self.sources[index])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def take(self, indices):
+        batch = ArticleBatch()
+        for i in indices:
+            batch.titles.append(self.titles[i])
+            batch.urls.append(self.urls[i])
+            batch.alternate_urls.append(self.alternate_urls[i])
+            batch.published.append(self.published[i])
+            batch.sources.append(self.sources[i])
+        return batch
+
+    def filter(self, mask):
+        return self.take(i for i, keep in enumerate(mask) if keep)
+
+    def sort_by_published(self):
+        # Newest first; undated articles keep their order at the end
+        undated = [math.isnan(published) for published in self.published]
+        order = sorted(range(len(self)), key=lambda i: (undated[i], 0 if undated[i] else -self.published[i]))
+        return self.take(order)
+
+    def unique_urls(self):
+        # The first article to list a link wins; placeholder links are never merged
+        seen = set()
+        mask = []
+        for url in self.urls:
+            mask.append(url == "#" or url not in seen)
+            seen.add(url)
+        return self.filter(mask)
+
+    def merge_clusters(self, clusters):
+        # One article per cluster: its first member, carrying the other members' links
+        batch = self.take(members[0] for members in clusters)
+        for position, members in enumerate(clusters):
+            alternate_urls = list(self.alternate_urls[members[0]])
+            for i in members[1:]:
+                alternate_urls.append(self.urls[i])
+                alternate_urls.extend(self.alternate_urls[i])
+            batch.alternate_urls[position] = alternate_urls
+        return batch
+
+    def to_records(self):
+        return [article.to_record() for article in self]
+
+@traced("extract_article_data")
 def extract_article_data(articles, picked_numbers):
     top_news = []
     for i in picked_numbers:
         if i < len(articles):
             article = articles[i]
-            top_news.append(Article(
-                article.get("title", "No title"),
-                article.get("url", "#")
-            ))
+            top_news.append(article if isinstance(article, Article) else Article.from_dict(article))
     return top_news
 
 def format_selected_titles(articles, picked_numbers):
+    titles = ArticleBatch.from_articles(articles).titles
     selected_titles = []
     for i, index in enumerate(picked_numbers):
-        if index < len(articles):
-            title = articles[index].get("title", "No title")
-            selected_titles.append(f"{i+1}. {title}")
-    
-    return "\n".join(selected_titles)
\ No newline at end of file
+        if index < len(titles):
+            selected_titles.append(f"{i+1}. {titles[index]}")
+
+    return "\n".join(selected_titles)
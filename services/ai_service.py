@@ -1,22 +1,81 @@
 import sys
 import time
+import asyncio
 import os
 import threading
 import atexit
 import contextlib
+import hashlib
 import io
+import json
+import re
 
 os.environ['GRPC_WAIT_FOR_READY'] = 'false'
 os.environ['GRPC_DNS_RESOLVER'] = 'native'
 
-import google.generativeai as genai
-from config.settings import GEMINI_API_KEY
+from config.settings import (GEMINI_API_KEY, GEMINI_MODEL, AI_CACHE_PERSIST, AI_CACHE_PATH,
+                             AI_CACHE_TTL, AI_CACHE_MAX_ENTRIES, GEMINI_REQUESTS_PER_MINUTE, GEMINI_BURST,
+                             GEMINI_BACKOFF_MAX, GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_RESET, GEMINI_HEDGING,
+                             GEMINI_HEDGE_PERCENTILE, GEMINI_HEDGE_MAX_RATIO, GEMINI_HEDGE_MIN_SAMPLES, GEMINI_HEDGE_WINDOW)
+from utils.cache import PersistentCache
+from utils.tracing import traced, span, record, record_span
+from utils.metrics import Counter, Histogram, register_cache
+from utils.rate_limit import (TokenBucket, CircuitBreaker, CircuitOpenError, backoff_delay, is_throttled,
+                              retry_after_seconds)
+from utils.hedging import LatencyTracker, HedgeBudget
 
 exit_handler_registered = False
+_genai = None
+_gemini_configured = False
+_models = {}
+_models_lock = threading.Lock()
+_stderr_lock = threading.RLock()
+_rate_limiter = None
+_circuit_breaker = None
+_hedging = GEMINI_HEDGING
+_hedge_budget = None
+_latency_trackers = {}
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+COMBINED_GENERATION_CONFIG = {"response_mime_type": "application/json"}
+# Combined answers are too long for a duplicate to pay off
+HEDGED_CALLS = ("selection", "satisfaction")
+
+GEMINI_REQUEST_SECONDS = Histogram("quicknews_gemini_request_seconds", "Latency of each Gemini request attempt.",
+                                   labels=("call",))
+GEMINI_RETRIES = Counter("quicknews_gemini_retries_total", "Gemini requests retried after a failure.", labels=("call",))
+GEMINI_THROTTLED = Counter("quicknews_gemini_throttled_total", "Gemini requests rejected for quota (HTTP 429).",
+                           labels=("call",))
+GEMINI_FALLBACKS = Counter("quicknews_gemini_fallbacks_total", "Answers replaced by the default selection or rating.",
+                           labels=("call", "reason"))
+GEMINI_HEDGES = Counter("quicknews_gemini_hedges_total", "Duplicate Gemini requests sent because the first was slow.",
+                        labels=("call",))
+GEMINI_HEDGE_WINS = Counter("quicknews_gemini_hedge_wins_total", "Duplicate Gemini requests that answered before the original.",
+                            labels=("call",))
+SATISFACTION_SCORE = Histogram("quicknews_ai_satisfaction", "Satisfaction ratings returned by Gemini.",
+                               buckets=(10, 20, 30, 40, 50, 60, 70, 80, 90, 100))
 
 def force_exit():
     os._exit(0)
 
+@contextlib.contextmanager
+def quiet_stderr():
+    # redirect_stderr swaps the process-wide sys.stderr, so redirects from the warm-up
+    # thread and the main thread must never overlap or they restore each other's stream
+    with _stderr_lock, contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+def load_genai():
+    # The Gemini SDK pulls in grpc and protobuf, so it's only imported once it's needed
+    global _genai
+    
+    if _genai is None:
+        with quiet_stderr():
+            import google.generativeai as genai
+        _genai = genai
+    return _genai
+
 def setup_gemini():
     global exit_handler_registered
     
@@ -32,77 +91,466 @@ def setup_gemini():
             signal.signal(signal.SIGINT, handle_exit)
             signal.signal(signal.SIGTERM, handle_exit)
         
-        with contextlib.redirect_stderr(io.StringIO()):
-            genai.configure(api_key=GEMINI_API_KEY)
+        configure_gemini()
     except Exception as e:
-        print(f"Error with Gemini API setup: {e}")
-        print("Please check your API key and internet connection.")
+        print(f"Error with Gemini API setup: {e}", file=sys.stderr)
+        print("Please check your API key and internet connection.", file=sys.stderr)
         sys.exit(1)
 
-def get_ai_selection(query, titles_text, max_retries=3, retry_delay=2):
+def configure_gemini():
+    global _gemini_configured
+    
+    # configure() throws away the SDK's clients, so it only runs once per process
+    with _models_lock:
+        if not _gemini_configured:
+            with quiet_stderr():
+                load_genai().configure(api_key=GEMINI_API_KEY)
+            _gemini_configured = True
+
+def get_model(model_name=GEMINI_MODEL):
+    # Models are shared across calls and threads; each one reuses the SDK's client and channel
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            with quiet_stderr():
+                model = load_genai().GenerativeModel(model_name)
+            _models[model_name] = model
+        return model
+
+def reset_models():
+    global _gemini_configured
+    
+    with _models_lock:
+        _models.clear()
+        _gemini_configured = False
+
+def get_response_cache():
+    global _response_cache
+    
+    with _response_cache_lock:
+        if _response_cache is None:
+            path = AI_CACHE_PATH if AI_CACHE_PERSIST else None
+            _response_cache = PersistentCache(path, ttl=AI_CACHE_TTL, max_entries=AI_CACHE_MAX_ENTRIES)
+            register_cache("ai_response", _response_cache)
+        return _response_cache
+
+def response_cache_key(model_name, prompt):
+    return f"{model_name}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+
+def lookup_response(prompt):
+    return get_response_cache().get(response_cache_key(GEMINI_MODEL, prompt))
+
+def store_response(prompt, text):
+    get_response_cache().set(response_cache_key(GEMINI_MODEL, prompt), text)
+
+def build_selection_prompt(query, titles_text):
+    return (
+        f"I have a list of news headlines related to '{query}'.\n\n"
+        f"Here are the headlines:\n{titles_text}\n\n"
+        f"Your task is to select the 5 most important and relevant headlines based on their significance, impact, and relevance to '{query}'.\n"
+        f"Only respond with the numbers of the selected headlines in a comma-separated format (e.g., 1,2,5,7,9) and nothing else."
+    )
+
+def build_satisfaction_prompt(query, selected_titles):
+    return (
+        f"You selected the following headlines for the query '{query}':\n\n"
+        f"{selected_titles}\n\n"
+        f"On a scale from 0% to 100%, how satisfied are you with these selections in terms of relevance and importance?\n"
+        f"Please respond with just a percentage number (e.g., 85) and nothing else."
+    )
+
+def build_combined_prompt(query, titles_text):
+    return (
+        f"I have a list of news headlines related to '{query}'.\n\n"
+        f"Here are the headlines:\n{titles_text}\n\n"
+        f"Your task is to select the 5 most important and relevant headlines based on their significance, impact, and relevance to '{query}'.\n"
+        f"Then rate, on a scale from 0 to 100, how satisfied you are with these selections in terms of relevance and importance.\n"
+        f"Only respond with a JSON object in the format {{\"picks\": [1, 2, 5, 7, 9], \"satisfaction\": 85}} and nothing else."
+    )
+
+def parse_satisfaction(text, default_satisfaction=85):
+    result = ''.join(c for c in text.strip() if c.isdigit())
+    if result and 0 <= int(result) <= 100:
+        SATISFACTION_SCORE.observe(int(result))
+        return int(result)
+    GEMINI_FALLBACKS.inc("satisfaction", "unparseable")
+    return default_satisfaction
+
+def reset_rate_limits():
+    global _rate_limiter, _circuit_breaker, _hedge_budget
+    _rate_limiter = TokenBucket(GEMINI_REQUESTS_PER_MINUTE / 60, GEMINI_BURST)
+    _circuit_breaker = CircuitBreaker(GEMINI_BREAKER_FAILURES, GEMINI_BREAKER_RESET)
+    _hedge_budget = HedgeBudget(GEMINI_HEDGE_MAX_RATIO)
+    _latency_trackers.clear()
+
+def set_hedging(enabled):
+    global _hedging
+    _hedging = enabled
+
+def latency_tracker(call):
+    tracker = _latency_trackers.get(call)
+    if tracker is None:
+        tracker = _latency_trackers.setdefault(call, LatencyTracker(GEMINI_HEDGE_WINDOW, GEMINI_HEDGE_MIN_SAMPLES))
+    return tracker
+
+def hedge_delay(call):
+    # How long to give a request before hedging it, or None to never hedge it
+    if not _hedging or call not in HEDGED_CALLS:
+        return None
+    _hedge_budget.deposit()
+    return latency_tracker(call).percentile(GEMINI_HEDGE_PERCENTILE)
+
+def try_hedge(call):
+    # A hedge must fit both the hedge budget and the shared quota without waiting
+    if not _hedge_budget.try_spend() or not _rate_limiter.try_acquire():
+        return False
+    GEMINI_HEDGES.inc(call)
+    record("hedges")
+    return True
+
+async def request_async(call, model, prompt, **kwargs):
+    start = time.perf_counter()
+    try:
+        with GEMINI_REQUEST_SECONDS.time(call):
+            text = (await model.generate_content_async(prompt, **kwargs)).text.strip()
+    except asyncio.CancelledError:
+        # A hedge's slower copy took at least this long; leaving it out would pull the percentile down
+        latency_tracker(call).observe(time.perf_counter() - start)
+        raise
+    latency_tracker(call).observe(time.perf_counter() - start)
+    return text
+
+async def hedged_async(call, send):
+    delay = hedge_delay(call)
+    if delay is None:
+        return await send()
+    
+    primary = asyncio.ensure_future(send())
+    done, _ = await asyncio.wait({primary}, timeout=delay)
+    if done or not try_hedge(call):
+        return await primary
+    
+    backup = asyncio.ensure_future(send())
+    pending = {primary, backup}
+    error = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is backup:
+                        GEMINI_HEDGE_WINS.inc(call)
+                    return task.result()
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+reset_rate_limits()
+
+def before_attempt():
+    if not _circuit_breaker.allow():
+        raise CircuitOpenError("Gemini looks unhealthy, skipping the request")
+    return _rate_limiter.reserve()
+
+def after_failure(call, error, attempt, max_retries, retry_delay):
+    # Returns how long to wait before the next attempt, or re-raises when retrying is pointless
+    _circuit_breaker.record_failure()
+    delay = backoff_delay(attempt, retry_delay, GEMINI_BACKOFF_MAX)
+    if is_throttled(error):
+        GEMINI_THROTTLED.inc(call)
+        _rate_limiter.throttle()
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            # Every caller sharing the limiter waits out the server's Retry-After
+            _rate_limiter.pause(retry_after)
+            delay = max(delay, retry_after)
+    if attempt >= max_retries - 1 or delay > GEMINI_BACKOFF_MAX:
+        raise error
+    print(f"AI request failed, retrying ({attempt+1}/{max_retries})...", file=sys.stderr)
+    record("retries")
+    GEMINI_RETRIES.inc(call)
+    return delay
+
+def after_success():
+    _circuit_breaker.record_success()
+    _rate_limiter.recover()
+
+def generate(call, prompt, max_retries=3, retry_delay=2, **kwargs):
+    model = get_model()
+    for attempt in range(max_retries):
+        wait = before_attempt()
+        if wait > 0:
+            with span("rate_limit_wait"):
+                time.sleep(wait)
+        try:
+            with GEMINI_REQUEST_SECONDS.time(call):
+                text = model.generate_content(prompt, **kwargs).text.strip()
+        except Exception as e:
+            delay = after_failure(call, e, attempt, max_retries, retry_delay)
+            with span("retry_sleep"):
+                time.sleep(delay)
+        else:
+            after_success()
+            return text
+
+async def generate_async(call, prompt, max_retries=3, retry_delay=2, **kwargs):
+    model = get_model()
+    for attempt in range(max_retries):
+        wait = before_attempt()
+        if wait > 0:
+            with span("rate_limit_wait"):
+                await asyncio.sleep(wait)
+        try:
+            text = await hedged_async(call, lambda: request_async(call, model, prompt, **kwargs))
+        except Exception as e:
+            delay = after_failure(call, e, attempt, max_retries, retry_delay)
+            with span("retry_sleep"):
+                await asyncio.sleep(delay)
+        else:
+            after_success()
+            return text
+
+def report_fallback(call, error):
+    if isinstance(error, CircuitOpenError):
+        GEMINI_FALLBACKS.inc(call, "circuit_open")
+        print(f"{error}.", file=sys.stderr)
+    else:
+        GEMINI_FALLBACKS.inc(call, "error")
+        print(f"Error with Gemini API: {error}", file=sys.stderr)
+
+@traced("ai_selection")
+def get_ai_selection(query, titles_text, max_retries=3, retry_delay=2, use_cache=False):
     try:
-        with contextlib.redirect_stderr(io.StringIO()):
-            model = genai.GenerativeModel("gemini-2.0-flash")
+        ai_prompt = build_selection_prompt(query, titles_text)
+        if use_cache:
+            cached = lookup_response(ai_prompt)
+            if cached is not None:
+                record("cache_hits")
+                return cached
         
-        ai_prompt = ( 
-            f"I have a list of news headlines related to '{query}'.\n\n"
-            f"Here are the headlines:\n{titles_text}\n\n"
-            f"Your task is to select the 5 most important and relevant headlines based on their significance, impact, and relevance to '{query}'.\n"
-            f"Only respond with the numbers of the selected headlines in a comma-separated format (e.g., 1,2,5,7,9) and nothing else."
-        )
-        retries = 0
-        while retries < max_retries:
-            try:
-                with contextlib.redirect_stderr(io.StringIO()):
-                    response = model.generate_content(ai_prompt)
-                return response.text.strip()
-            except Exception as e:
-                retries += 1
-                if retries >= max_retries:
-                    print(f"Failed to get AI selection after {max_retries} attempts: {str(e)}")
-                    print("Using default selection instead.")
-                    return "1,2,3,4,5"
-                print(f"AI request failed, retrying ({retries}/{max_retries})...")
-                time.sleep(retry_delay)
+        result = generate("selection", ai_prompt, max_retries, retry_delay)
+        if use_cache:
+            store_response(ai_prompt, result)
+        return result
+    except Exception as e:
+        report_fallback("selection", e)
+        print("Using default selection instead.", file=sys.stderr)
+        return "1,2,3,4,5"
+
+@traced("ai_satisfaction")
+def get_ai_satisfaction(query, selected_titles, max_retries=3, retry_delay=2, use_cache=False):
+    default_satisfaction = 85
+    
+    ai_prompt = build_satisfaction_prompt(query, selected_titles)
+    
+    try:
+        if use_cache:
+            cached = lookup_response(ai_prompt)
+            if cached is not None:
+                record("cache_hits")
+                return parse_satisfaction(cached, default_satisfaction)
+        
+        result = generate("satisfaction", ai_prompt, max_retries, retry_delay)
+        if use_cache:
+            store_response(ai_prompt, result)
+        return parse_satisfaction(result, default_satisfaction)
+    except Exception as e:
+        report_fallback("satisfaction", e)
+        
+    return default_satisfaction
+
+@traced("ai_selection")
+async def get_ai_selection_async(query, titles_text, max_retries=3, retry_delay=2, use_cache=False):
+    try:
+        ai_prompt = build_selection_prompt(query, titles_text)
+        if use_cache:
+            cached = lookup_response(ai_prompt)
+            if cached is not None:
+                record("cache_hits")
+                return cached
         
+        result = await generate_async("selection", ai_prompt, max_retries, retry_delay)
+        if use_cache:
+            store_response(ai_prompt, result)
+        return result
     except Exception as e:
-        print(f"Error with Gemini API: {e}")
-        print("Using default selection instead.")
+        report_fallback("selection", e)
+        print("Using default selection instead.", file=sys.stderr)
         return "1,2,3,4,5"
 
-def get_ai_satisfaction(query, selected_titles, max_retries=3, retry_delay=2):
+@traced("ai_satisfaction")
+async def get_ai_satisfaction_async(query, selected_titles, max_retries=3, retry_delay=2, use_cache=False):
     default_satisfaction = 85
     
-    ai_prompt = (
-        f"You selected the following headlines for the query '{query}':\n\n"
-        f"{selected_titles}\n\n"
-        f"On a scale from 0% to 100%, how satisfied are you with these selections in terms of relevance and importance?\n"
-        f"Please respond with just a percentage number (e.g., 85) and nothing else."
-    )
+    ai_prompt = build_satisfaction_prompt(query, selected_titles)
     
     try:
-        with contextlib.redirect_stderr(io.StringIO()):
-            model = genai.GenerativeModel("gemini-2.0-flash")
-            
-        for retry in range(max_retries):
-            try:
-                with contextlib.redirect_stderr(io.StringIO()):
-                    response = model.generate_content(ai_prompt)
-                result = response.text.strip()
-                result = ''.join(c for c in result if c.isdigit())
-                if result and 0 <= int(result) <= 100:
-                    return int(result)
-                return default_satisfaction
-            except Exception:
-                if retry >= max_retries - 1:
-                    break
-                print(f"AI satisfaction request failed, retrying ({retry+1}/{max_retries})...")
-                time.sleep(retry_delay)
+        if use_cache:
+            cached = lookup_response(ai_prompt)
+            if cached is not None:
+                record("cache_hits")
+                return parse_satisfaction(cached, default_satisfaction)
+        
+        result = await generate_async("satisfaction", ai_prompt, max_retries, retry_delay)
+        if use_cache:
+            store_response(ai_prompt, result)
+        return parse_satisfaction(result, default_satisfaction)
     except Exception as e:
-        print(f"Error with Gemini API during satisfaction check: {e}")
+        report_fallback("satisfaction", e)
         
     return default_satisfaction
 
+@traced("ai_combined")
+def get_ai_combined(query, titles_text, max_retries=3, retry_delay=2, use_cache=False):
+    try:
+        ai_prompt = build_combined_prompt(query, titles_text)
+        if use_cache:
+            cached = lookup_response(ai_prompt)
+            if cached is not None:
+                record("cache_hits")
+                return cached
+        
+        result = generate("combined", ai_prompt, max_retries, retry_delay,
+                          generation_config=COMBINED_GENERATION_CONFIG)
+        if use_cache:
+            store_response(ai_prompt, result)
+        return result
+    except Exception as e:
+        report_fallback("combined", e)
+    
+    print("Using default selection instead.", file=sys.stderr)
+    return "1,2,3,4,5"
+
+@traced("ai_combined")
+async def get_ai_combined_async(query, titles_text, max_retries=3, retry_delay=2, use_cache=False):
+    try:
+        ai_prompt = build_combined_prompt(query, titles_text)
+        if use_cache:
+            cached = lookup_response(ai_prompt)
+            if cached is not None:
+                record("cache_hits")
+                return cached
+        
+        result = await generate_async("combined", ai_prompt, max_retries, retry_delay,
+                                      generation_config=COMBINED_GENERATION_CONFIG)
+        if use_cache:
+            store_response(ai_prompt, result)
+        return result
+    except Exception as e:
+        report_fallback("combined", e)
+    
+    print("Using default selection instead.", file=sys.stderr)
+    return "1,2,3,4,5"
+
+class PickParser:
+    # Reads a comma-separated answer piece by piece and hands back each 0-based pick
+    # as soon as the number ends, instead of waiting for the full text
+    def __init__(self, titles_length, top_count=5):
+        self.titles_length = titles_length
+        self.top_count = top_count
+        self.picks = []
+        self._digits = ""
+
+    @property
+    def done(self):
+        return len(self.picks) >= self.top_count
+
+    def feed(self, text):
+        new_picks = []
+        for char in text:
+            if char.isdigit():
+                self._digits += char
+            else:
+                self._finish(new_picks)
+        return new_picks
+
+    def close(self):
+        new_picks = []
+        self._finish(new_picks)
+        return new_picks
+
+    def _finish(self, new_picks):
+        if not self._digits:
+            return
+        index = int(self._digits) - 1
+        self._digits = ""
+        if 0 <= index < self.titles_length and index not in self.picks and not self.done:
+            self.picks.append(index)
+            new_picks.append(index)
+
+def stream_chunk_text(chunk):
+    # The last chunk of a stream can carry only the finish reason and no text part
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+async def stream_ai_selection_async(query, titles_text, titles_length, top_count=5, max_retries=3, retry_delay=2,
+                                    use_cache=False):
+    # Yields each pick while Gemini is still writing; the stream is dropped once
+    # top_count picks are in, so callers can move on before the model finishes
+    start = time.perf_counter()
+    ai_prompt = build_selection_prompt(query, titles_text)
+    if use_cache:
+        cached = lookup_response(ai_prompt)
+        if cached is not None:
+            for index in parse_ai_selection(cached, titles_length, top_count):
+                yield index
+            record_span("ai_selection", start, time.perf_counter(), cache_hits=1)
+            return
+    
+    parser = PickParser(titles_length, top_count)
+    first_pick = None
+    try:
+        model = get_model()
+        for attempt in range(max_retries):
+            wait = before_attempt()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            parser = PickParser(titles_length, top_count)
+            try:
+                with GEMINI_REQUEST_SECONDS.time("selection"):
+                    response = await model.generate_content_async(ai_prompt, stream=True)
+                    async for chunk in response:
+                        text = stream_chunk_text(chunk)
+                        for index in parser.feed(text):
+                            first_pick = first_pick or time.perf_counter()
+                            yield index
+                        if parser.done:
+                            break
+                    if not parser.done:
+                        for index in parser.close():
+                            first_pick = first_pick or time.perf_counter()
+                            yield index
+            except Exception as e:
+                # Picks already handed out can't be taken back, so only a silent failure is retried
+                if parser.picks:
+                    _circuit_breaker.record_failure()
+                    raise
+                await asyncio.sleep(after_failure("selection", e, attempt, max_retries, retry_delay))
+            else:
+                after_success()
+                # Only the picks that were handed out are cached: the raw text can run past top_count,
+                # which parse_ai_selection would reject on a cache hit
+                if use_cache and parser.picks:
+                    store_response(ai_prompt, ",".join(str(index + 1) for index in parser.picks))
+                break
+        
+        if not parser.picks:
+            GEMINI_FALLBACKS.inc("selection", "unparseable")
+    except Exception as e:
+        report_fallback("selection", e)
+    
+    if not parser.picks:
+        print("Using default selection instead.", file=sys.stderr)
+        for index in range(min(top_count, titles_length)):
+            yield index
+    
+    attrs = {"first_pick_ms": round((first_pick - start) * 1000, 1)} if first_pick else {}
+    record_span("ai_selection", start, time.perf_counter(), **attrs)
+
 def parse_ai_selection(ai_answer, titles_length, top_count=5):
     try:
         picked_numbers = []
@@ -114,17 +562,33 @@ def parse_ai_selection(ai_answer, titles_length, top_count=5):
                     picked_numbers.append(num - 1)
         
         if len(picked_numbers) == 0 or len(picked_numbers) > top_count:
+            GEMINI_FALLBACKS.inc("selection", "unparseable")
             picked_numbers = list(range(min(top_count, titles_length)))
         
         return picked_numbers[:top_count]
     except Exception as e:
-        print(f"Error parsing AI selection: {str(e)}")
+        print(f"Error parsing AI selection: {str(e)}", file=sys.stderr)
+        GEMINI_FALLBACKS.inc("selection", "unparseable")
         return list(range(min(top_count, titles_length)))
 
+def parse_combined_response(ai_answer, titles_length, top_count=5, default_satisfaction=85):
+    # Models sometimes wrap the JSON in prose or code fences, so parse the first object found
+    match = re.search(r"\{.*\}", ai_answer, re.DOTALL)
+    try:
+        data = json.loads(match.group(0))
+        picks = data["picks"]
+        if isinstance(picks, str):
+            picks = picks.split(',')
+        picked_numbers = parse_ai_selection(",".join(str(pick) for pick in picks), titles_length, top_count)
+        satisfaction = parse_satisfaction(str(data.get("satisfaction", "")), default_satisfaction)
+        return picked_numbers, satisfaction
+    except Exception:
+        return parse_ai_selection(ai_answer, titles_length, top_count), default_satisfaction
+
 def cleanup_gemini():
     try:
-        import requests
-        requests.Session().close()
+        from services.news_service import close_session
+        close_session()
     except:
         pass
     
@@ -0,0 +1,82 @@
+import asyncio
+from config.settings import BATCH_FETCH_CONCURRENCY, BATCH_AI_CONCURRENCY
+from services.news_service import normalize_query, close_async_session
+from services.batch_service import process_query, NO_NEWS
+from services.prefetch_service import lookup_result, store_result
+from utils.metrics import Counter, render_metrics, CONTENT_TYPE
+
+API_REQUESTS = Counter("quicknews_api_requests_total", "News requests served by the HTTP API.", labels=("source",))
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight = {}
+
+    async def do(self, key, factory):
+        # Callers asking for a key already being computed share that computation
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+            API_REQUESTS.inc("computed")
+        else:
+            API_REQUESTS.inc("coalesced")
+        # A caller that disconnects must not cancel the work the others are waiting on
+        return await asyncio.shield(task)
+
+def create_app(fetch_concurrency=BATCH_FETCH_CONCURRENCY, ai_concurrency=BATCH_AI_CONCURRENCY, **options):
+    from aiohttp import web
+
+    fetch_slots = asyncio.Semaphore(fetch_concurrency)
+    ai_slots = asyncio.Semaphore(ai_concurrency)
+    flights = SingleFlight()
+
+    async def compute(query):
+        try:
+            result = await process_query(query, fetch_slots, ai_slots, **options)
+        except Exception as e:
+            return {"query": query, "articles": [], "ai_satisfaction": None, "error": str(e)}
+        if "error" not in result:
+            store_result(result, "serve")
+        return result
+
+    async def news(request):
+        if request.method == "POST":
+            try:
+                query = (await request.json()).get("query", "")
+            except Exception:
+                return web.json_response({"error": "Request body must be a JSON object"}, status=400)
+        else:
+            query = request.query.get("q", "")
+        if not isinstance(query, str) or not query.strip():
+            return web.json_response({"error": "Missing query"}, status=400)
+
+        stored = lookup_result(query, source="watch") if options.get("use_cache", True) else None
+        if stored is not None:
+            API_REQUESTS.inc("stored")
+            return web.json_response(stored[0])
+
+        result = await flights.do(normalize_query(query), lambda: compute(query))
+        result = dict(result, query=query)
+        # An empty feed is an answer, not an upstream failure
+        if result.get("error") == NO_NEWS:
+            return web.json_response(result, status=404)
+        return web.json_response(result, status=502 if "error" in result else 200)
+
+    async def metrics(request):
+        return web.Response(body=render_metrics().encode('utf-8'), headers={"Content-Type": CONTENT_TYPE})
+
+    async def close_session(app):
+        await close_async_session()
+
+    app = web.Application()
+    app.router.add_get("/news", news)
+    app.router.add_post("/news", news)
+    app.router.add_get("/metrics", metrics)
+    app.on_cleanup.append(close_session)
+    return app
+
+def serve(host, port, **options):
+    from aiohttp import web
+
+    web.run_app(create_app(**options), host=host, port=port, print=None)
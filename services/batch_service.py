@@ -0,0 +1,151 @@
+import sys
+import asyncio
+from config.settings import TOP_ARTICLES, BATCH_FETCH_CONCURRENCY, BATCH_AI_CONCURRENCY, DELTA_MIN_NEW
+from services.news_service import fetch_news_async, extract_titles, format_titles_for_ai, NewsFetchError
+from services.ai_service import (get_ai_selection_async, parse_ai_selection, get_ai_satisfaction_async,
+                                get_ai_combined_async, parse_combined_response, stream_ai_selection_async)
+from services.dedupe_service import dedupe_articles
+from services.ranking_service import rank_articles
+from services.resolver_service import resolve_articles
+from services.body_service import fetch_bodies
+from services.delta_service import unseen_articles, mark_seen, previous_result, DELTA_RUNS
+from models.article import extract_article_data, format_selected_titles
+
+NO_NEWS = "No news found"
+
+def read_queries(source):
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r') as f:
+            lines = f.read().splitlines()
+
+    queries = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            queries.append(line)
+
+    return queries
+
+async def finish_articles(articles, resolve=True, bodies=False, use_cache=True):
+    # Pages are fetched from the publisher's link, so they wait for their own article's lookup only
+    if resolve:
+        await resolve_articles(articles, use_cache=use_cache)
+    if bodies:
+        await fetch_bodies(articles)
+    return articles
+
+async def process_query(query, fetch_slots, ai_slots, use_cache=True, combined=False, dedupe=True, rank=True, stream=False,
+                        resolve=True, bodies=False, delta=False, on_stage=None, on_pick=None):
+    # on_stage(stage, articles) is told when the fetched articles are in and when selection, rating and
+    # finishing start; on_pick(number, article) gets each pick as it streams in
+    result = {"query": query, "articles": [], "ai_satisfaction": None}
+    def stage(name, articles):
+        if on_stage:
+            on_stage(name, articles)
+
+    try:
+        async with fetch_slots:
+            articles = await fetch_news_async(query, use_cache=use_cache)
+    except NewsFetchError as e:
+        result["error"] = str(e)
+        return result
+    if articles:
+        stage("fetched", articles)
+
+    if delta:
+        # Only headlines Gemini hasn't seen for this topic; too few of them and the last answer stands
+        fresh = unseen_articles(query, articles)
+        if len(fresh) >= DELTA_MIN_NEW:
+            articles = fresh
+            DELTA_RUNS.inc("new")
+        else:
+            previous = previous_result(query)
+            if previous is not None:
+                DELTA_RUNS.inc("unchanged")
+                return dict(previous, query=query, unchanged=True)
+            DELTA_RUNS.inc("full")
+
+    if dedupe:
+        articles = dedupe_articles(articles)
+    if rank:
+        articles = rank_articles(query, articles)
+
+    titles = extract_titles(articles)
+    if not titles:
+        result["error"] = NO_NEWS
+        return result
+
+    titles_text = format_titles_for_ai(titles)
+    stage("select", articles)
+    # Links are resolved and pages fetched in the background while Gemini is still busy
+    follow_ups = []
+    def start_finishing(new_articles):
+        if (resolve or bodies) and new_articles:
+            follow_ups.append(asyncio.ensure_future(finish_articles(new_articles, resolve, bodies, use_cache)))
+
+    if combined:
+        async with ai_slots:
+            ai_answer = await get_ai_combined_async(query, titles_text, use_cache=use_cache)
+        picked_numbers, satisfaction = parse_combined_response(ai_answer, len(titles), TOP_ARTICLES)
+        top_news = extract_article_data(articles, picked_numbers)
+        start_finishing(top_news)
+    elif stream:
+        # Articles are built while the picks stream in, and the rating is asked for
+        # as soon as the last pick arrives rather than when the model stops writing
+        picked_numbers = []
+        top_news = []
+        async with ai_slots:
+            async for index in stream_ai_selection_async(query, titles_text, len(titles), TOP_ARTICLES, use_cache=use_cache):
+                picked_numbers.append(index)
+                new_articles = extract_article_data(articles, [index])
+                start_finishing(new_articles)
+                for article in new_articles:
+                    top_news.append(article)
+                    if on_pick:
+                        on_pick(len(top_news), article)
+
+        selected_titles = format_selected_titles(articles, picked_numbers)
+        stage("rate", top_news)
+        async with ai_slots:
+            satisfaction = await get_ai_satisfaction_async(query, selected_titles, use_cache=use_cache)
+    else:
+        async with ai_slots:
+            ai_answer = await get_ai_selection_async(query, titles_text, use_cache=use_cache)
+        picked_numbers = parse_ai_selection(ai_answer, len(titles), TOP_ARTICLES)
+        top_news = extract_article_data(articles, picked_numbers)
+        start_finishing(top_news)
+
+        selected_titles = format_selected_titles(articles, picked_numbers)
+        stage("rate", top_news)
+        async with ai_slots:
+            satisfaction = await get_ai_satisfaction_async(query, selected_titles, use_cache=use_cache)
+
+    if delta:
+        mark_seen(query, articles[:len(titles)])
+    if follow_ups:
+        stage("finish", top_news)
+    await asyncio.gather(*follow_ups)
+    result["articles"] = [article.to_dict() for article in top_news]
+    result["ai_satisfaction"] = satisfaction
+    return result
+
+async def _process_query_safely(query, fetch_slots, ai_slots, options):
+    try:
+        return await process_query(query, fetch_slots, ai_slots, **options)
+    except Exception as e:
+        return {"query": query, "articles": [], "ai_satisfaction": None, "error": str(e)}
+
+async def run_batch(queries, fetch_concurrency=BATCH_FETCH_CONCURRENCY, ai_concurrency=BATCH_AI_CONCURRENCY, **options):
+    fetch_slots = asyncio.Semaphore(fetch_concurrency)
+    ai_slots = asyncio.Semaphore(ai_concurrency)
+
+    # Every query is in flight at once; the semaphores enforce the per-stage limits
+    tasks = [asyncio.ensure_future(_process_query_safely(query, fetch_slots, ai_slots, options)) for query in queries]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from config.settings import BODY_TIMEOUT, BODY_DEADLINE, BODY_CONCURRENCY, BODY_MAX_BYTES, BODY_WORKERS
+from services.news_service import get_async_session
+from services.resolver_service import is_resolvable
+from utils.tracing import traced, record
+from utils.metrics import Counter
+
+CHUNK_SIZE = 64 * 1024
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+# Elements that never hold the story itself
+NOISE_TAGS = ("script", "style", "noscript", "template", "nav", "header", "footer", "aside", "form",
+              "figure", "iframe", "svg", "button")
+# Shorter paragraphs are usually bylines, captions or share buttons
+MIN_PARAGRAPH_CHARS = 40
+
+_body_pool = None
+_body_pool_lock = threading.Lock()
+
+ARTICLE_BODIES = Counter("quicknews_article_bodies_total", "Article pages fetched for their text, by outcome.",
+                         labels=("outcome",))
+
+def body_pool_context():
+    # The Gemini SDK's gRPC threads are running by the time pages are parsed, and forking a process
+    # with live gRPC threads can deadlock; workers start from a clean forkserver (or spawn) instead
+    import multiprocessing
+
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+def get_body_pool():
+    global _body_pool
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _body_pool_lock:
+        if _body_pool is None:
+            _body_pool = ProcessPoolExecutor(max_workers=BODY_WORKERS, mp_context=body_pool_context())
+        return _body_pool
+
+def shutdown_body_pool():
+    global _body_pool
+
+    with _body_pool_lock:
+        pool, _body_pool = _body_pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+def paragraph_text(element):
+    return " ".join(element.text_content().split())
+
+def extract_text(content, encoding=None):
+    # Returns the page's (lead, body): the paragraphs of the element that holds the most
+    # paragraph text, which is the story on nearly every news site. Runs in a worker process.
+    import lxml.html
+    from lxml import etree
+
+    if not content:
+        return None, None
+    try:
+        parser = lxml.html.HTMLParser(encoding=encoding, remove_comments=True, remove_pis=True)
+    except LookupError:
+        parser = lxml.html.HTMLParser(remove_comments=True, remove_pis=True)
+    try:
+        root = lxml.html.document_fromstring(content, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None, None
+    etree.strip_elements(root, *NOISE_TAGS, with_tail=False)
+
+    scores = {}
+    for p in root.iter("p"):
+        length = len(paragraph_text(p))
+        if length < MIN_PARAGRAPH_CHARS:
+            continue
+        parent = p.getparent()
+        scores[parent] = scores.get(parent, 0) + length
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0) + length / 2
+    if not scores:
+        return None, None
+
+    container = max(scores, key=scores.get)
+    # A story split into sections scores nearly as well in the element around them
+    parent = container.getparent()
+    while parent is not None and scores.get(parent, 0) >= scores[container] * 0.75:
+        container, parent = parent, parent.getparent()
+    paragraphs = [text for text in map(paragraph_text, container.iter("p")) if len(text) >= MIN_PARAGRAPH_CHARS]
+    return paragraphs[0], "\n\n".join(paragraphs)
+
+async def download_page(url, session, max_bytes=BODY_MAX_BYTES):
+    # Reads at most max_bytes; the rest of an oversized page is never downloaded
+    async with session.get(url) as response:
+        response.raise_for_status()
+        if response.content_type not in HTML_TYPES:
+            return b"", None
+
+        content = bytearray()
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            content.extend(chunk[:max_bytes - len(content)])
+            if len(content) >= max_bytes:
+                break
+        record("bytes", len(content))
+        return bytes(content), response.charset
+
+@traced("fetch_bodies")
+async def fetch_bodies(articles, session=None, timeout=BODY_TIMEOUT, deadline=BODY_DEADLINE,
+                       concurrency=BODY_CONCURRENCY, max_bytes=BODY_MAX_BYTES, executor=None):
+    # Fills in each article's lead and body in place; articles whose page fails,
+    # runs out of time or has no readable text are left as they were
+    from concurrent.futures.process import BrokenProcessPool
+
+    pending = [article for article in articles if is_resolvable(article.url)]
+    if not pending:
+        return articles
+
+    session = session or get_async_session()
+    executor = executor or get_body_pool()
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+
+    async def fetch(article):
+        async with slots:
+            content, encoding = await asyncio.wait_for(download_page(article.url, session, max_bytes), timeout)
+        # Parsing is CPU-bound, so it runs in other processes while the next pages download
+        return await loop.run_in_executor(executor, extract_text, content, encoding)
+
+    tasks = {asyncio.ensure_future(fetch(article)): article for article in pending}
+    done, not_done = await asyncio.wait(tasks, timeout=deadline)
+    for task in not_done:
+        task.cancel()
+    await asyncio.gather(*not_done, return_exceptions=True)
+
+    for task, article in tasks.items():
+        if task in not_done or isinstance(task.exception(), asyncio.TimeoutError):
+            ARTICLE_BODIES.inc("timeout")
+        elif task.exception() is not None:
+            ARTICLE_BODIES.inc("failed")
+            if isinstance(task.exception(), BrokenProcessPool) and executor is _body_pool:
+                # A worker died; the next call starts a fresh pool
+                shutdown_body_pool()
+        else:
+            lead, body = task.result()
+            if body:
+                ARTICLE_BODIES.inc("extracted")
+                article.lead = lead
+                article.body = body
+            else:
+                ARTICLE_BODIES.inc("empty")
+    return articles
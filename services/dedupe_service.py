@@ -0,0 +1,91 @@
+import re
+import zlib
+import unicodedata
+import functools
+from config.settings import DEDUPE_THRESHOLD, MINHASH_PERMUTATIONS, MINHASH_BANDS, SHINGLE_SIZE
+from services.ranking_service import strip_source
+from models.article import ArticleBatch
+from utils.tracing import traced
+
+MAX_HASH = (1 << 32) - 1
+# Smallest prime above 2**32, so (a*x + b) mod p mixes every bit of a 32-bit hash
+HASH_PRIME = (1 << 32) + 15
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s]")
+
+@functools.lru_cache(maxsize=None)
+def hash_permutations(count=MINHASH_PERMUTATIONS):
+    import numpy as np
+    
+    random = np.random.RandomState(1)
+    a = random.randint(1, MAX_HASH, size=count, dtype=np.uint64)
+    b = random.randint(0, MAX_HASH, size=count, dtype=np.uint64)
+    return a, b
+
+def normalize_title(title):
+    title = unicodedata.normalize('NFKD', strip_source(title))
+    title = "".join(c for c in title if not unicodedata.combining(c))
+    title = PUNCTUATION_PATTERN.sub(" ", title.lower())
+    return " ".join(title.split())
+
+def shingles(text, size=SHINGLE_SIZE):
+    # Word n-grams: sharing a few long words doesn't make two headlines the same story
+    words = text.split()
+    if len(words) <= size:
+        return {text}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def jaccard(first, second):
+    return len(first & second) / len(first | second)
+
+def minhash_signature(shingle_set):
+    import numpy as np
+    
+    permutation_a, permutation_b = hash_permutations()
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingle_set), dtype=np.uint64, count=len(shingle_set))
+    # Universal hashing (a*x + b) mod p, one row per permutation; products stay below 2**64
+    permuted = (permutation_a[:, None] * hashes[None, :] + permutation_b[:, None]) % HASH_PRIME
+    return permuted.min(axis=1)
+
+def find_root(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+def cluster_titles(titles, threshold=DEDUPE_THRESHOLD, bands=MINHASH_BANDS):
+    import numpy as np
+    
+    rows = MINHASH_PERMUTATIONS // bands
+    shingle_sets = [shingles(normalize_title(title)) for title in titles]
+    signatures = np.array([minhash_signature(shingle_set) for shingle_set in shingle_sets], dtype=np.uint64)
+    parents = list(range(len(titles)))
+
+    # LSH: titles sharing any band of their signature land in the same bucket
+    for band in range(bands):
+        buckets = {}
+        for i, signature in enumerate(signatures):
+            key = signature[band * rows:(band + 1) * rows].tobytes()
+            buckets.setdefault(key, []).append(i)
+
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                # Compare against the bucket's first member so large buckets stay linear; LSH only
+                # finds the candidates, the exact similarity decides
+                if jaccard(shingle_sets[first], shingle_sets[other]) >= threshold:
+                    root_first, root_other = find_root(parents, first), find_root(parents, other)
+                    if root_first != root_other:
+                        parents[max(root_first, root_other)] = min(root_first, root_other)
+
+    clusters = {}
+    for i in range(len(titles)):
+        clusters.setdefault(find_root(parents, i), []).append(i)
+    return sorted(clusters.values())
+
+@traced("dedupe")
+def dedupe_articles(articles, threshold=DEDUPE_THRESHOLD):
+    if not articles:
+        return []
+
+    batch = ArticleBatch.from_articles(articles)
+    return batch.merge_clusters(cluster_titles(batch.titles, threshold))
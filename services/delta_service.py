@@ -0,0 +1,58 @@
+import os
+import hashlib
+import threading
+from config.settings import SEEN_FILTER_DIR, SEEN_FILTER_CAPACITY, SEEN_FILTER_ERROR_RATE, DELTA_MAX_AGE
+from services.news_service import normalize_query
+from models.article import ArticleBatch
+from utils.bloom import BloomFilter
+from utils.metrics import Counter
+
+_seen_filters = {}
+_seen_filters_lock = threading.Lock()
+
+DELTA_RUNS = Counter("quicknews_delta_runs_total", "Delta-mode queries, by whether Gemini was asked about new articles.",
+                     labels=("outcome",))
+
+def seen_filter_path(query):
+    name = hashlib.sha1(normalize_query(query).encode()).hexdigest()[:20]
+    return os.path.join(SEEN_FILTER_DIR, f"{name}.bloom")
+
+def get_seen_filter(query):
+    key = normalize_query(query)
+    with _seen_filters_lock:
+        seen = _seen_filters.get(key)
+        if seen is None:
+            seen = BloomFilter(seen_filter_path(key), capacity=SEEN_FILTER_CAPACITY, error_rate=SEEN_FILTER_ERROR_RATE)
+            _seen_filters[key] = seen
+        return seen
+
+def close_seen_filters():
+    with _seen_filters_lock:
+        for seen in _seen_filters.values():
+            seen.close()
+        _seen_filters.clear()
+
+def fingerprint(title, url):
+    # Feed links are stable per story; articles without one are known by their title
+    return url if url != "#" else f"title:{normalize_query(title)}"
+
+def unseen_articles(query, articles):
+    seen = get_seen_filter(query)
+    batch = ArticleBatch.from_articles(articles)
+    return batch.filter(fingerprint(title, url) not in seen for title, url in zip(batch.titles, batch.urls))
+
+def mark_seen(query, articles):
+    # Merged syndicated copies count as seen along with the article they were merged into
+    seen = get_seen_filter(query)
+    batch = ArticleBatch.from_articles(articles)
+    for title, url, alternate_urls in zip(batch.titles, batch.urls, batch.alternate_urls):
+        seen.add(fingerprint(title, url))
+        for alternate_url in alternate_urls:
+            seen.add(fingerprint(title, alternate_url))
+
+def previous_result(query, max_age=DELTA_MAX_AGE):
+    # prefetch_service runs queries through batch_service, which needs this module first
+    from services.prefetch_service import lookup_result
+
+    stored = lookup_result(query, max_age=max_age)
+    return stored[0] if stored is not None else None
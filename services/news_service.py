@@ -1,58 +1,440 @@
 import sys
-import requests
-from bs4 import BeautifulSoup
+import time
+import asyncio
+import threading
+import weakref
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from config.settings import MAX_ARTICLES
+from config.settings import (NEWS_FEED_URL, NEWS_EDITIONS, EXTRA_FEEDS, FEED_DEADLINE, MAX_ARTICLES, FEED_ITEM_LIMIT, FEED_CHUNK_SIZE, HTTP_POOL_CONNECTIONS, HTTP_MAX_CONNECTIONS_PER_HOST,
+                             HTTP_MAX_RETRIES, HTTP_RETRY_BACKOFF, HTTP_KEEPALIVE_TIMEOUT,
+                             FEED_CACHE_PATH, FEED_CACHE_TTL, FEED_CACHE_MAX_ENTRIES, FEED_CACHE_MAX_BYTES)
+from utils.cache import PersistentCache
+from models.article import Article, ArticleBatch, parse_published
+from utils.tracing import traced, span, record, record_span
+from utils.metrics import Counter, Histogram, register_cache, timed
 
-def fetch_news(query, timeout=10):
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_async_sessions = weakref.WeakKeyDictionary()
+_feed_cache = None
+_feed_cache_lock = threading.Lock()
+
+FEED_FETCH_SECONDS = Histogram("quicknews_feed_fetch_seconds", "Time to fetch and parse a news feed, cache hits included.")
+FEED_RETRIES = Counter("quicknews_feed_retries_total", "News feed requests retried after a failure.")
+FEED_FAILURES = Counter("quicknews_feed_failures_total", "Feeds left out of a merged result because they failed or missed the deadline.")
+
+class NewsFetchError(Exception):
+    pass
+
+def create_session(pool_connections=HTTP_POOL_CONNECTIONS, max_per_host=HTTP_MAX_CONNECTIONS_PER_HOST,
+                   max_retries=HTTP_MAX_RETRIES, backoff=HTTP_RETRY_BACKOFF):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=["GET", "HEAD"],
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=max_per_host,
+                          max_retries=retry, pool_block=True)
+    
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+def get_session():
+    global _session
+    
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+def close_session():
+    global _session
+    
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def create_async_session(max_per_host=HTTP_MAX_CONNECTIONS_PER_HOST, keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT):
+    import aiohttp
+    
+    connector = aiohttp.TCPConnector(limit_per_host=max_per_host, keepalive_timeout=keepalive_timeout)
+    return aiohttp.ClientSession(connector=connector, trace_configs=[http_trace_config()])
+
+def http_trace_config():
+    import aiohttp
+    
+    # Splits DNS and connection setup out of the fetch span when tracing is on
+    async def on_dns_start(session, context, params):
+        context.dns_start = time.perf_counter()
+    
+    async def on_dns_end(session, context, params):
+        record_span("dns", context.dns_start, time.perf_counter(), host=params.host)
+    
+    async def on_connect_start(session, context, params):
+        context.connect_start = time.perf_counter()
+    
+    async def on_connect_end(session, context, params):
+        record_span("connect", context.connect_start, time.perf_counter())
+    
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    return trace_config
+
+def get_async_session():
+    # aiohttp sessions are bound to the event loop that created them
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        session = create_async_session()
+        _async_sessions[loop] = session
+    return session
+
+async def close_async_session():
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+def get_feed_cache():
+    global _feed_cache
+    
+    with _feed_cache_lock:
+        if _feed_cache is None:
+            _feed_cache = PersistentCache(FEED_CACHE_PATH, ttl=FEED_CACHE_TTL,
+                                          max_entries=FEED_CACHE_MAX_ENTRIES, max_bytes=FEED_CACHE_MAX_BYTES)
+            register_cache("feed", _feed_cache)
+        return _feed_cache
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+def feed_cache_key(query, day, feed=None):
+    key = f"{normalize_query(query)}|after:{day}"
+    return f"{key}|{feed}" if feed else key
+
+def build_feed_url(query, day=None, edition=('en-US', 'US', 'US:en')):
     query = urllib.parse.quote_plus(query)
-    today = datetime.now().strftime('%Y-%m-%d')
-    url = f"https://news.google.com/rss/search?q={query}+after:{today}&hl=en-US&gl=US&ceid=US:en"
+    day = day or datetime.now().strftime('%Y-%m-%d')
+    hl, gl, ceid = edition
+    return f"{NEWS_FEED_URL}?q={query}+after:{day}&hl={hl}&gl={gl}&ceid={ceid}"
+
+def feed_sources(query, day, editions=None, extra_feeds=None):
+    # (cache key, url) for every configured feed
+    editions = NEWS_EDITIONS if editions is None else editions
+    extra_feeds = EXTRA_FEEDS if extra_feeds is None else extra_feeds
+    sources = [(feed_cache_key(query, day, edition[2]), build_feed_url(query, day, edition)) for edition in editions]
+    for template in extra_feeds:
+        sources.append((feed_cache_key(query, day, template), template.format(query=urllib.parse.quote_plus(query))))
+    return sources
+
+def merge_articles(article_lists):
+    # Feed order sets the preference when two feeds list the same link
+    return ArticleBatch.concat(article_lists).unique_urls().sort_by_published()
+
+def conditional_headers(cached):
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    return headers
+
+def store_feed(cache, key, headers, articles, limit=None):
+    # Only the parsed articles are kept; a revalidated feed is never parsed again
+    cache.set(key, {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "articles": articles.to_records(),
+        "limit": limit
+    })
+
+def clean_link(link):
+    parsed_url = urllib.parse.urlparse(link)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+
+def article_from_item(item):
+    title = item.findtext('title')
+    link = item.findtext('link')
     
-    try:
-        response = requests.get(url, timeout=timeout)
-        
-        if response.status_code != 200:
-            print(f"Error getting news: {response.status_code}")
-            sys.exit(1)
+    return Article(
+        title if title is not None else "No title",
+        clean_link(link if link is not None else "#"),
+        published=parse_published(item.findtext('pubDate') or None),
+        source=item.findtext('source') or None
+    )
+
+class FeedParser:
+    def __init__(self, limit=None):
+        from lxml import etree
         
-        soup = BeautifulSoup(response.content, 'xml')
-        items = soup.find_all('item')
+        self.limit = limit
+        self.articles = ArticleBatch()
+        self._parser = etree.XMLPullParser(events=('end',), tag='item', recover=True,
+                                           resolve_entities=False, no_network=True)
+
+    @property
+    def done(self):
+        return self.limit is not None and len(self.articles) >= self.limit
+
+    def feed(self, chunk):
+        with span("parse_feed"):
+            record("bytes", len(chunk))
+            self._parser.feed(chunk)
+            return self._collect()
+
+    def close(self):
+        with span("parse_feed"):
+            if not self.done:
+                try:
+                    self._parser.close()
+                except SyntaxError:
+                    pass
+            return self._collect()
+
+    def _collect(self):
+        new_articles = []
+        for _, item in self._parser.read_events():
+            if self.done:
+                break
+            article = article_from_item(item)
+            self.articles.append(article)
+            new_articles.append(article)
+            
+            # Drop parsed items so memory stays flat on large feeds
+            item.clear()
+            while item.getprevious() is not None:
+                del item.getparent()[0]
+        return new_articles
+
+def iter_feed_items(chunks, limit=None):
+    parser = FeedParser(limit)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    yield from parser.close()
+
+def parse_feed(content, limit=None):
+    return ArticleBatch.from_articles(iter_feed_items([content], limit))
+
+def cache_answers(entry, limit):
+    # An entry parsed with a smaller limit can't answer a larger request unless the feed ended first
+    cached_limit = entry.get("limit")
+    return cached_limit is None or (limit is not None and limit <= cached_limit) or len(entry["articles"]) < cached_limit
+
+def cached_articles(entry, limit):
+    cached = entry["articles"]
+    return ArticleBatch.from_articles(cached[:limit] if limit is not None else cached)
+
+@traced("fetch_feed")
+def fetch_feed(url, key, timeout=10, use_cache=False, limit=FEED_ITEM_LIMIT):
+    import requests
+    
+    cache = get_feed_cache() if use_cache else None
+    entry = cache.get_entry(key) if cache is not None else None
+    if entry and not cache_answers(entry[0], limit):
+        entry = None
+    if entry and cache.is_fresh(entry[1]):
+        cache.hits += 1
+        record("cache_hits")
+        return cached_articles(entry[0], limit)
+    
+    try:
+        headers = conditional_headers(entry[0]) if entry else {}
+        response = get_session().get(url, timeout=timeout, headers=headers, stream=True)
         
-        articles = []
-        for item in items:
-            title = item.title.text if item.title else "No title"
-            link = item.link.text if item.link else "#"
-            pub_date = item.pubDate.text if item.pubDate else ""
+        try:
+            if response.status_code == 304 and entry:
+                cache.hits += 1
+                record("cache_hits")
+                cache.touch(key)
+                return cached_articles(entry[0], limit)
+            
+            if response.status_code != 200:
+                raise NewsFetchError(f"Error getting news: {response.status_code}")
             
-            parsed_url = urllib.parse.urlparse(link)
-            clean_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
+            def chunks():
+                for chunk in response.iter_content(FEED_CHUNK_SIZE):
+                    record("bytes", len(chunk))
+                    yield chunk
             
-            articles.append({
-                "title": title,
-                "url": clean_url,
-                "publishedAt": pub_date
-            })
+            articles = ArticleBatch.from_articles(iter_feed_items(chunks(), limit))
+        finally:
+            response.close()
         
+        if cache is not None:
+            cache.misses += 1
+            record("cache_misses")
+            store_feed(cache, key, response.headers, articles, limit)
         return articles
     
+    except NewsFetchError:
+        raise
     except requests.exceptions.Timeout:
-        print("Request to Google News timed out. Please check your internet connection and try again.")
-        sys.exit(1)
+        raise NewsFetchError("Request to Google News timed out. Please check your internet connection and try again.")
     except requests.exceptions.ConnectionError:
-        print("Connection error. Please check your internet connection and try again.")
-        sys.exit(1)
+        raise NewsFetchError("Connection error. Please check your internet connection and try again.")
     except Exception as e:
-        print(f"Unexpected error fetching news: {str(e)}")
+        raise NewsFetchError(f"Unexpected error fetching news: {str(e)}")
+
+def merge_feed_results(results, errors):
+    # Feeds that failed or missed the deadline are left out as long as one answered
+    if errors:
+        FEED_FAILURES.inc(amount=len(errors))
+    answered = [articles for articles in results if articles is not None]
+    if not answered:
+        raise errors[0] if errors else NewsFetchError("Timed out waiting for the news feeds.")
+    return merge_articles(answered)
+
+@traced("fetch_news")
+@timed(FEED_FETCH_SECONDS)
+def fetch_news(query, timeout=10, use_cache=False, limit=FEED_ITEM_LIMIT, deadline=FEED_DEADLINE):
+    day = datetime.now().strftime('%Y-%m-%d')
+    sources = feed_sources(query, day)
+    
+    try:
+        if len(sources) == 1:
+            key, url = sources[0]
+            return fetch_feed(url, key, timeout, use_cache, limit)
+        
+        executor = ThreadPoolExecutor(max_workers=len(sources))
+        futures = [executor.submit(fetch_feed, url, key, timeout, use_cache, limit) for key, url in sources]
+        wait(futures, timeout=deadline)
+        # Don't wait for stragglers; their threads finish in the background
+        executor.shutdown(wait=False)
+        
+        results = []
+        errors = []
+        for future in futures:
+            if not future.done():
+                results.append(None)
+                errors.append(NewsFetchError("Timed out waiting for the news feeds."))
+            elif future.exception() is not None:
+                results.append(None)
+                errors.append(future.exception())
+            else:
+                results.append(future.result())
+        return merge_feed_results(results, errors)
+    except NewsFetchError as e:
+        print(str(e))
         sys.exit(1)
 
-def extract_titles(articles):
-    titles = []
-    for i in range(min(MAX_ARTICLES, len(articles))):
-        titles.append(articles[i].get("title", "No title"))
+async def read_feed_async(response, limit=None):
+    parser = FeedParser(limit)
     
-    return titles
+    async for chunk in response.content.iter_chunked(FEED_CHUNK_SIZE):
+        record("bytes", len(chunk))
+        parser.feed(chunk)
+        if parser.done:
+            break
+    
+    parser.close()
+    return parser.articles
+
+@traced("fetch_feed")
+async def fetch_feed_async(url, key, timeout=10, session=None, max_retries=HTTP_MAX_RETRIES, backoff=HTTP_RETRY_BACKOFF,
+                           use_cache=False, limit=FEED_ITEM_LIMIT):
+    import aiohttp
+    
+    if session is None:
+        session = get_async_session()
+    
+    cache = get_feed_cache() if use_cache else None
+    entry = cache.get_entry(key) if cache is not None else None
+    if entry and not cache_answers(entry[0], limit):
+        entry = None
+    if entry and cache.is_fresh(entry[1]):
+        cache.hits += 1
+        record("cache_hits")
+        return cached_articles(entry[0], limit)
+    headers = conditional_headers(entry[0]) if entry else {}
+    
+    attempt = 0
+    while True:
+        try:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout), headers=headers) as response:
+                status = response.status
+                response_headers = response.headers
+                if status == 200:
+                    articles = await read_feed_async(response, limit)
+            if status not in RETRY_STATUS_CODES or attempt >= max_retries:
+                break
+        except asyncio.TimeoutError:
+            raise NewsFetchError("Request to Google News timed out. Please check your internet connection and try again.")
+        except aiohttp.ClientConnectionError:
+            if attempt >= max_retries:
+                raise NewsFetchError("Connection error. Please check your internet connection and try again.")
+        except Exception as e:
+            raise NewsFetchError(f"Unexpected error fetching news: {str(e)}")
+        
+        record("retries")
+        FEED_RETRIES.inc()
+        with span("retry_sleep"):
+            await asyncio.sleep(backoff * (2 ** attempt))
+        attempt += 1
+    
+    if status == 304 and entry:
+        cache.hits += 1
+        record("cache_hits")
+        cache.touch(key)
+        return cached_articles(entry[0], limit)
+    
+    if status != 200:
+        raise NewsFetchError(f"Error getting news: {status}")
+    
+    if cache is not None:
+        cache.misses += 1
+        record("cache_misses")
+        store_feed(cache, key, response_headers, articles, limit)
+    return articles
+
+@traced("fetch_news")
+@timed(FEED_FETCH_SECONDS)
+async def fetch_news_async(query, timeout=10, session=None, max_retries=HTTP_MAX_RETRIES, backoff=HTTP_RETRY_BACKOFF,
+                           use_cache=False, limit=FEED_ITEM_LIMIT, deadline=FEED_DEADLINE):
+    day = datetime.now().strftime('%Y-%m-%d')
+    sources = feed_sources(query, day)
+    options = dict(timeout=timeout, session=session, max_retries=max_retries, backoff=backoff,
+                   use_cache=use_cache, limit=limit)
+    if len(sources) == 1:
+        key, url = sources[0]
+        return await fetch_feed_async(url, key, **options)
+    
+    tasks = [asyncio.ensure_future(fetch_feed_async(url, key, **options)) for key, url in sources]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    
+    results = []
+    errors = []
+    for task in tasks:
+        if task not in done:
+            results.append(None)
+            errors.append(NewsFetchError("Timed out waiting for the news feeds."))
+        elif task.exception() is not None:
+            results.append(None)
+            errors.append(task.exception())
+        else:
+            results.append(task.result())
+    return merge_feed_results(results, errors)
+
+def extract_titles(articles):
+    return list(ArticleBatch.from_articles(articles[:MAX_ARTICLES]).titles)
 
 def format_titles_for_ai(titles):
     return "\n".join(f"{i+1}. {title}" for i, title in enumerate(titles))
\ No newline at end of file
@@ -0,0 +1,91 @@
+import time
+import random
+import asyncio
+import threading
+from config.settings import (RESULT_STORE_BACKEND, RESULT_STORE_PATH, RESULT_LOG_PATH, RESULT_MAX_AGE, WATCH_INTERVAL, WATCH_JITTER,
+                             WATCH_MAX_REFRESHES_PER_MINUTE, BATCH_FETCH_CONCURRENCY, BATCH_AI_CONCURRENCY)
+from services.news_service import normalize_query
+from services.batch_service import process_query
+from utils.result_store import open_result_store
+
+_result_store = None
+_result_store_lock = threading.Lock()
+
+def get_result_store():
+    global _result_store
+
+    with _result_store_lock:
+        if _result_store is None:
+            path = RESULT_LOG_PATH if RESULT_STORE_BACKEND == "jsonl" else RESULT_STORE_PATH
+            _result_store = open_result_store(RESULT_STORE_BACKEND, path)
+        return _result_store
+
+def lookup_result(query, max_age=RESULT_MAX_AGE, source=None):
+    entry = get_result_store().latest(normalize_query(query), source=source)
+    if entry is None:
+        return None
+
+    result, stored_at = entry
+    age = time.time() - stored_at
+    if age > max_age:
+        return None
+    return result, age
+
+def store_result(result, source):
+    # The source ("interactive", "batch", "watch" or "serve") lets readers pick which results they trust.
+    # An unchanged delta result confirms the last one, so it's stored again without the flag to restart its age
+    result = {key: value for key, value in result.items() if key != "unchanged"}
+    get_result_store().append(normalize_query(result["query"]), result, source=source)
+
+def next_refresh_delay(interval=WATCH_INTERVAL, jitter=WATCH_JITTER):
+    # Jitter spreads refreshes out so topics added together don't stay in lockstep
+    return interval * (1 + random.uniform(-jitter, jitter))
+
+async def refresh_topic(query, fetch_slots, ai_slots, **options):
+    result = await process_query(query, fetch_slots, ai_slots, **options)
+    if "error" not in result:
+        store_result(result, "watch")
+    return result
+
+async def run_watch(topics, interval=WATCH_INTERVAL, jitter=WATCH_JITTER,
+                    max_per_minute=WATCH_MAX_REFRESHES_PER_MINUTE, once=False, on_result=None, **options):
+    fetch_slots = asyncio.Semaphore(BATCH_FETCH_CONCURRENCY)
+    ai_slots = asyncio.Semaphore(BATCH_AI_CONCURRENCY)
+    min_gap = 60 / max_per_minute
+    loop = asyncio.get_running_loop()
+
+    async def refresh(query):
+        try:
+            result = await refresh_topic(query, fetch_slots, ai_slots, **options)
+        except Exception as e:
+            result = {"query": query, "articles": [], "ai_satisfaction": None, "error": str(e)}
+        if on_result:
+            on_result(result)
+
+    due = {topic: loop.time() for topic in topics}
+    pending = set()
+    try:
+        while due:
+            query = min(due, key=due.get)
+            wait = due[query] - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            task = asyncio.ensure_future(refresh(query))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+
+            if once:
+                del due[query]
+            else:
+                due[query] = loop.time() + next_refresh_delay(interval, jitter)
+
+            # Rate limit how often refreshes start, however many topics are due
+            if due:
+                await asyncio.sleep(min_gap)
+
+        if pending:
+            await asyncio.gather(*pending)
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,93 @@
+import re
+import zlib
+from config.settings import RANKER_TOP_N, RANKER_FEATURES, RANKER_DEDUPE_THRESHOLD
+from utils.tracing import traced
+from models.article import ArticleBatch
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+SOURCE_SUFFIX_PATTERN = re.compile(r"\s+[-–—|]\s+[^-–—|]+$")
+STOPWORDS = frozenset([
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "have", "in", "is", "it",
+    "its", "of", "on", "or", "that", "the", "to", "was", "were", "will", "with"
+])
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+def strip_source(title):
+    # Google News titles end with " - Publisher"
+    return SOURCE_SUFFIX_PATTERN.sub("", title)
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+def feature_index(token, n_features=RANKER_FEATURES):
+    # crc32 rather than hash() so feature ids are stable across processes
+    return zlib.crc32(token.encode('utf-8')) % n_features
+
+def term_frequency_matrix(texts, n_features=RANKER_FEATURES):
+    import numpy as np
+    
+    rows = []
+    cols = []
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            rows.append(row)
+            cols.append(feature_index(token, n_features))
+
+    matrix = np.zeros((len(texts), n_features), dtype=np.float32)
+    np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)), 1)
+    return matrix
+
+def bm25_scores(query, tf, k1=BM25_K1, b=BM25_B):
+    import numpy as np
+    
+    n_docs, n_features = tf.shape
+    query_features = np.unique([feature_index(token, n_features) for token in tokenize(query)])
+    if n_docs == 0 or len(query_features) == 0:
+        return np.zeros(n_docs, dtype=np.float32)
+
+    doc_lengths = tf.sum(axis=1)
+    avg_length = max(doc_lengths.mean(), 1.0)
+    doc_freq = np.count_nonzero(tf[:, query_features], axis=0)
+    idf = np.log1p((n_docs - doc_freq + 0.5) / (doc_freq + 0.5))
+
+    query_tf = tf[:, query_features]
+    norm = k1 * (1 - b + b * doc_lengths / avg_length)
+    return (idf * query_tf * (k1 + 1) / (query_tf + norm[:, None])).sum(axis=1)
+
+def tfidf_vectors(tf):
+    import numpy as np
+    
+    doc_freq = np.count_nonzero(tf, axis=0)
+    idf = np.log((1 + tf.shape[0]) / (1 + doc_freq)) + 1
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+@traced("rank")
+def rank_articles(query, articles, top_n=RANKER_TOP_N, dedupe_threshold=RANKER_DEDUPE_THRESHOLD):
+    if not articles:
+        return []
+
+    import numpy as np
+    
+    batch = ArticleBatch.from_articles(articles)
+    tf = term_frequency_matrix([strip_source(title) for title in batch.titles])
+    scores = bm25_scores(query, tf)
+    # Stable sort keeps feed order for ties, including the no-match case
+    order = np.argsort(-scores, kind="stable")
+
+    vectors = tfidf_vectors(tf)
+    picked = []
+    for index in order:
+        if picked and (vectors[picked] @ vectors[index]).max() >= dedupe_threshold:
+            continue
+        picked.append(index)
+        if len(picked) >= top_n:
+            break
+
+    if isinstance(articles, ArticleBatch):
+        return articles.take(picked)
+    return [articles[index] for index in picked]
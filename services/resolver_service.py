@@ -0,0 +1,121 @@
+import asyncio
+import threading
+import urllib.parse
+from config.settings import (RESOLVE_TIMEOUT, RESOLVE_DEADLINE, RESOLVE_CONCURRENCY, RESOLVE_MAX_REDIRECTS,
+                             REDIRECT_CACHE_PATH, REDIRECT_CACHE_TTL, REDIRECT_CACHE_MAX_ENTRIES,
+                             TRACKING_PARAM_PREFIXES, TRACKING_PARAMS)
+from services.news_service import get_async_session
+from utils.cache import PersistentCache
+from utils.tracing import traced, record
+from utils.metrics import Counter, register_cache
+
+_redirect_cache = None
+_redirect_cache_lock = threading.Lock()
+
+URL_RESOLUTIONS = Counter("quicknews_url_resolutions_total", "Article links looked up, by how they were resolved.",
+                          labels=("outcome",))
+
+def get_redirect_cache():
+    global _redirect_cache
+    
+    with _redirect_cache_lock:
+        if _redirect_cache is None:
+            _redirect_cache = PersistentCache(REDIRECT_CACHE_PATH, ttl=REDIRECT_CACHE_TTL,
+                                              max_entries=REDIRECT_CACHE_MAX_ENTRIES)
+            register_cache("redirect", _redirect_cache)
+        return _redirect_cache
+
+def is_resolvable(url):
+    return urllib.parse.urlparse(url).scheme in ("http", "https")
+
+def is_tracking_param(name):
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PARAM_PREFIXES)
+
+def strip_tracking(url):
+    # Publisher URLs can need their query string (?id=123), so only tracking parameters go
+    parsed_url = urllib.parse.urlsplit(url)
+    params = urllib.parse.parse_qsl(parsed_url.query, keep_blank_values=True)
+    query = urllib.parse.urlencode([(name, value) for name, value in params if not is_tracking_param(name)])
+    return urllib.parse.urlunsplit((parsed_url.scheme, parsed_url.netloc, parsed_url.path, query, ""))
+
+async def follow_redirects(url, session, max_redirects=RESOLVE_MAX_REDIRECTS):
+    import aiohttp
+    
+    # HEAD is enough for most redirectors; servers that refuse it get a GET whose body is never read
+    try:
+        async with session.head(url, allow_redirects=True, max_redirects=max_redirects) as response:
+            if response.status < 400:
+                return strip_tracking(str(response.url)), "head"
+    except aiohttp.ClientResponseError:
+        pass
+    
+    async with session.get(url, allow_redirects=True, max_redirects=max_redirects) as response:
+        # An error page isn't where the story lives; the link stays as it was
+        response.raise_for_status()
+        return strip_tracking(str(response.url)), "get"
+
+@traced("resolve_urls")
+async def resolve_urls(urls, session=None, timeout=RESOLVE_TIMEOUT, deadline=RESOLVE_DEADLINE,
+                       concurrency=RESOLVE_CONCURRENCY, use_cache=True):
+    # Maps every url to where it ends up; links that fail or run out of time map to themselves
+    resolved = {}
+    pending = []
+    cache = None
+    for url in dict.fromkeys(urls):
+        if not is_resolvable(url):
+            resolved[url] = url
+            continue
+        if use_cache and cache is None:
+            cache = get_redirect_cache()
+        target = cache.get(url) if cache is not None else None
+        if target is not None:
+            URL_RESOLUTIONS.inc("cached")
+            record("cache_hits")
+            resolved[url] = target
+        else:
+            pending.append(url)
+    
+    if pending:
+        session = session or get_async_session()
+        slots = asyncio.Semaphore(concurrency)
+        
+        async def resolve(url):
+            async with slots:
+                return await asyncio.wait_for(follow_redirects(url, session), timeout)
+        
+        # One slow publisher costs at most the deadline, never the whole run
+        tasks = {asyncio.ensure_future(resolve(url)): url for url in pending}
+        done, not_done = await asyncio.wait(tasks, timeout=deadline)
+        for task in not_done:
+            task.cancel()
+        await asyncio.gather(*not_done, return_exceptions=True)
+        
+        for task, url in tasks.items():
+            if task in not_done or isinstance(task.exception(), asyncio.TimeoutError):
+                URL_RESOLUTIONS.inc("timeout")
+            elif task.exception() is not None:
+                URL_RESOLUTIONS.inc("failed")
+            else:
+                target, method = task.result()
+                URL_RESOLUTIONS.inc(method)
+                resolved[url] = target
+                # A link that led nowhere new costs nothing to try again, so only real redirects are kept
+                if cache is not None and target != url:
+                    cache.set(url, target)
+    
+    return {url: resolved.get(url, url) for url in urls}
+
+async def resolve_articles(articles, **options):
+    # Rewrites each article's links in place to their publisher URLs
+    urls = [url for article in articles for url in [article.url] + article.alternate_urls]
+    if not urls:
+        return articles
+    
+    resolved = await resolve_urls(urls, **options)
+    for article in articles:
+        article.url = resolved[article.url]
+        # Syndicated copies sometimes lead to the same page once resolved
+        alternate_urls = dict.fromkeys(resolved[url] for url in article.alternate_urls)
+        article.alternate_urls = [url for url in alternate_urls if url != article.url]
+    return articles
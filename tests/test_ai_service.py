@@ -1,11 +1,117 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
+import asyncio
 import os
 import io
 import sys
-from services.ai_service import setup_gemini, get_ai_selection, get_ai_satisfaction
+import time
+import threading
+import importlib.abc
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from services.ai_service import (setup_gemini, get_ai_selection, get_ai_satisfaction,
+                                 get_ai_selection_async, get_ai_satisfaction_async, response_cache_key,
+                                 get_ai_combined, get_ai_combined_async, parse_combined_response,
+                                 get_model, reset_models, reset_rate_limits, GEMINI_FALLBACKS, GEMINI_RETRIES,
+                                 PickParser, stream_ai_selection_async, set_hedging, latency_tracker,
+                                 GEMINI_HEDGES, GEMINI_HEDGE_WINS, load_genai, configure_gemini)
+from services import ai_service
+from config.settings import GEMINI_MODEL, GEMINI_BREAKER_FAILURES
+from utils.cache import PersistentCache
+from utils.startup import warm_up
+
+class QuotaError(Exception):
+    code = 429
+
+    def __init__(self, retry_after):
+        super().__init__("429 Resource has been exhausted")
+        self.response = MagicMock(headers={"Retry-After": str(retry_after)})
+
+class FakeModel:
+    # Plays back a script of answers and exceptions, one per request
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0) if len(self.outcomes) > 1 else self.outcomes[0]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return MagicMock(text=outcome)
+
+class FakeStreamingModel:
+    # Streams each script one token at a time with a pause in between; an exception
+    # in a script breaks the stream at that point
+    def __init__(self, *scripts, delay=0.01):
+        self.scripts = list(scripts)
+        self.delay = delay
+        self.calls = 0
+        self.sent = []
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        script = self.scripts.pop(0) if len(self.scripts) > 1 else self.scripts[0]
+
+        async def chunks():
+            for token in script:
+                await asyncio.sleep(self.delay)
+                if isinstance(token, Exception):
+                    raise token
+                self.sent.append(token)
+                yield MagicMock(text=token)
+        return chunks()
+
+class SlowFirstModel:
+    # The first request stalls, every later one answers right away
+    def __init__(self, stall=0.5):
+        self.stall = stall
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls
+
+    def generate_content(self, prompt, **kwargs):
+        call = self._next()
+        if call == 1:
+            time.sleep(self.stall)
+        return MagicMock(text=str(call))
+
+    async def generate_content_async(self, prompt, **kwargs):
+        call = self._next()
+        if call == 1:
+            await asyncio.sleep(self.stall)
+        return MagicMock(text=str(call))
+
+async def collect_picks(picks, model=None):
+    # Pairs every pick with how many tokens the model had sent when it arrived
+    return [(index, len(model.sent) if model else None) async for index in picks]
+
+class SlowGenaiFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    # Stands in for the Gemini SDK with an import slow enough for a quick typist to overlap
+    def find_spec(self, name, path, target=None):
+        if name == "google.generativeai":
+            return importlib.util.spec_from_loader(name, self)
+        return None
+
+    def create_module(self, spec):
+        return None
+
+    def exec_module(self, module):
+        time.sleep(0.2)
+        module.configure = lambda api_key: None
+        module.GenerativeModel = MagicMock
 
 class TestAIService(unittest.TestCase):
+    def setUp(self):
+        # Tests patch GenerativeModel one at a time, so none may inherit a shared model,
+        # and failures in one test must not trip the circuit breaker for the next
+        reset_models()
+        reset_rate_limits()
+
     @patch('atexit.register')
     @patch('google.generativeai.configure')
     def test_setup_gemini(self, mock_configure, mock_atexit):
@@ -14,6 +120,24 @@ class TestAIService(unittest.TestCase):
             mock_configure.assert_called_once()
             mock_atexit.assert_called_once()
 
+    def test_setup_during_warm_up_leaves_stderr_alone(self):
+        import google
+        import google.generativeai
+        stderr = sys.stderr
+        finder = SlowGenaiFinder()
+        sys.meta_path.insert(0, finder)
+        self.addCleanup(sys.meta_path.remove, finder)
+        
+        with patch.dict(sys.modules), patch.object(google, 'generativeai', google.generativeai), \
+             patch('services.ai_service._genai', None):
+            del sys.modules['google.generativeai']
+            thread = warm_up(load_genai, modules=())
+            time.sleep(0.05)
+            configure_gemini()
+            thread.join(timeout=5)
+        
+        self.assertIs(sys.stderr, stderr)
+
     @patch('google.generativeai.GenerativeModel')
     def test_get_ai_selection(self, mock_gen_model):
         mock_model = MagicMock()
@@ -26,6 +150,25 @@ class TestAIService(unittest.TestCase):
         self.assertEqual(result, "1,2,3,4,5")
         mock_model.generate_content.assert_called_once()
 
+    @patch('google.generativeai.configure')
+    def test_setup_gemini_configures_once(self, mock_configure):
+        setup_gemini()
+        setup_gemini()
+        mock_configure.assert_called_once()
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_model_is_shared_across_calls_and_threads(self, mock_gen_model):
+        mock_gen_model.return_value.generate_content.return_value = MagicMock(text="1")
+        
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            models = list(executor.map(lambda _: get_model(), range(8)))
+        get_ai_selection("test query", "1. Title 1")
+        get_ai_satisfaction("test query", "1. Title 1")
+        
+        self.assertTrue(all(model is models[0] for model in models))
+        mock_gen_model.assert_called_once_with(GEMINI_MODEL)
+        self.assertEqual(mock_gen_model.return_value.generate_content.call_count, 2)
+
     @patch('google.generativeai.GenerativeModel')
     def test_get_ai_selection_retry(self, mock_gen_model):
         mock_model = MagicMock()
@@ -42,9 +185,14 @@ class TestAIService(unittest.TestCase):
         mock_model.generate_content.side_effect = Exception("API Error")
         mock_gen_model.return_value = mock_model
         
+        fallbacks = GEMINI_FALLBACKS.value("selection", "error")
+        retries = GEMINI_RETRIES.value("selection")
+        
         result = get_ai_selection("test query", "1. Title 1\n2. Title 2", max_retries=2, retry_delay=0)
         self.assertEqual(result, "1,2,3,4,5")
         self.assertEqual(mock_model.generate_content.call_count, 2)
+        self.assertEqual(GEMINI_FALLBACKS.value("selection", "error"), fallbacks + 1)
+        self.assertEqual(GEMINI_RETRIES.value("selection"), retries + 1)
 
     @patch('google.generativeai.GenerativeModel')
     def test_get_ai_satisfaction(self, mock_gen_model):
@@ -75,4 +223,308 @@ class TestAIService(unittest.TestCase):
         mock_model.generate_content.side_effect = [Exception("API Error"), MagicMock(text="90")]
         mock_gen_model.return_value = mock_model
         
-        self.assertEqual(get_ai_satisfaction("test query", "1. Title 1", max_retries=2, retry_delay=0), 90)
\ No newline at end of file
+        self.assertEqual(get_ai_satisfaction("test query", "1. Title 1", max_retries=2, retry_delay=0), 90)
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_get_ai_selection_async_retry(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content_async = AsyncMock(side_effect=[Exception("API Error"), MagicMock(text="1,2,3")])
+        mock_gen_model.return_value = mock_model
+        
+        with patch('services.ai_service.asyncio.sleep', new=AsyncMock()) as mock_sleep:
+            result = asyncio.run(get_ai_selection_async("test query", "1. Title 1", max_retries=2))
+        self.assertEqual(result, "1,2,3")
+        mock_sleep.assert_awaited_once()
+        self.assertLessEqual(mock_sleep.await_args[0][0], 2)
+        mock_model.generate_content.assert_not_called()
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_get_ai_selection_async_all_retries_fail(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content_async = AsyncMock(side_effect=Exception("API Error"))
+        mock_gen_model.return_value = mock_model
+        
+        result = asyncio.run(get_ai_selection_async("test query", "1. Title 1", max_retries=2, retry_delay=0))
+        self.assertEqual(result, "1,2,3,4,5")
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_get_ai_satisfaction_async(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content_async = AsyncMock(return_value=MagicMock(text="I'm 72% satisfied"))
+        mock_gen_model.return_value = mock_model
+        
+        self.assertEqual(asyncio.run(get_ai_satisfaction_async("test query", "1. Title 1")), 72)
+
+    def test_response_cache_key_depends_on_model_and_prompt(self):
+        key = response_cache_key("gemini-2.0-flash", "prompt")
+        self.assertEqual(key, response_cache_key("gemini-2.0-flash", "prompt"))
+        self.assertNotEqual(key, response_cache_key("gemini-2.0-flash", "prompt "))
+        self.assertNotEqual(key, response_cache_key("gemini-1.5-pro", "prompt"))
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_get_ai_selection_cached(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = MagicMock(text="3,1,2")
+        mock_gen_model.return_value = mock_model
+        
+        with patch('services.ai_service.get_response_cache', return_value=PersistentCache()):
+            first = get_ai_selection("test query", "1. Title 1", use_cache=True)
+            second = get_ai_selection("test query", "1. Title 1", use_cache=True)
+            get_ai_selection("test query", "1. Title 1")
+        
+        self.assertEqual(first, second)
+        self.assertEqual(mock_model.generate_content.call_count, 2)
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_get_ai_satisfaction_async_cached(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content_async = AsyncMock(return_value=MagicMock(text="64"))
+        mock_gen_model.return_value = mock_model
+        
+        async def ask_twice():
+            first = await get_ai_satisfaction_async("test query", "1. Title 1", use_cache=True)
+            second = await get_ai_satisfaction_async("test query", "1. Title 1", use_cache=True)
+            return first, second
+        
+        with patch('services.ai_service.get_response_cache', return_value=PersistentCache()):
+            self.assertEqual(asyncio.run(ask_twice()), (64, 64))
+        self.assertEqual(mock_model.generate_content_async.await_count, 1)
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_failed_selection_is_not_cached(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content.side_effect = Exception("API Error")
+        mock_gen_model.return_value = mock_model
+        cache = PersistentCache()
+        
+        with patch('services.ai_service.get_response_cache', return_value=cache):
+            get_ai_selection("test query", "1. Title 1", max_retries=1, use_cache=True)
+        self.assertEqual(len(cache), 0)
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_get_ai_combined_requests_json(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = MagicMock(text='{"picks": [2, 1], "satisfaction": 90}')
+        mock_gen_model.return_value = mock_model
+        
+        result = get_ai_combined("test query", "1. Title 1\n2. Title 2")
+        self.assertEqual(result, '{"picks": [2, 1], "satisfaction": 90}')
+        kwargs = mock_model.generate_content.call_args[1]
+        self.assertEqual(kwargs["generation_config"], {"response_mime_type": "application/json"})
+
+    @patch('google.generativeai.GenerativeModel')
+    def test_get_ai_combined_async_all_retries_fail(self, mock_gen_model):
+        mock_model = MagicMock()
+        mock_model.generate_content_async = AsyncMock(side_effect=Exception("API Error"))
+        mock_gen_model.return_value = mock_model
+        
+        result = asyncio.run(get_ai_combined_async("test query", "1. Title 1", max_retries=2, retry_delay=0))
+        self.assertEqual(result, "1,2,3,4,5")
+        self.assertEqual(mock_model.generate_content_async.await_count, 2)
+
+    @patch('services.ai_service.time.sleep')
+    def test_retry_after_is_honoured(self, mock_sleep):
+        model = FakeModel(QuotaError(retry_after=5), "2,1")
+        
+        with patch('services.ai_service.get_model', return_value=model):
+            result = get_ai_selection("test query", "1. Title 1\n2. Title 2", retry_delay=0)
+        
+        self.assertEqual(result, "2,1")
+        self.assertEqual(model.calls, 2)
+        self.assertGreaterEqual(mock_sleep.call_args_list[0][0][0], 5)
+
+    @patch('services.ai_service.time.sleep')
+    def test_long_retry_after_falls_back_without_waiting(self, mock_sleep):
+        model = FakeModel(QuotaError(retry_after=3600))
+        
+        with patch('services.ai_service.get_model', return_value=model):
+            result = get_ai_selection("test query", "1. Title 1", retry_delay=0)
+        
+        self.assertEqual(result, "1,2,3,4,5")
+        self.assertEqual(model.calls, 1)
+        mock_sleep.assert_not_called()
+
+    @patch('services.ai_service.time.sleep')
+    def test_circuit_breaker_fails_fast_while_gemini_is_down(self, mock_sleep):
+        model = FakeModel(Exception("503 Service Unavailable"))
+        fallbacks = GEMINI_FALLBACKS.value("satisfaction", "circuit_open")
+        
+        with patch('services.ai_service.get_model', return_value=model):
+            for _ in range(10):
+                self.assertEqual(get_ai_satisfaction("test query", "1. Title 1", max_retries=1), 85)
+        
+        self.assertEqual(model.calls, GEMINI_BREAKER_FAILURES)
+        self.assertEqual(GEMINI_FALLBACKS.value("satisfaction", "circuit_open"), fallbacks + 10 - GEMINI_BREAKER_FAILURES)
+
+    def test_parse_combined_response(self):
+        self.assertEqual(parse_combined_response('{"picks": [3, 1, 2], "satisfaction": 91}', 10), ([2, 0, 1], 91))
+        self.assertEqual(parse_combined_response('```json\n{"picks": "2, 4", "satisfaction": "77%"}\n```', 10), ([1, 3], 77))
+
+    def test_parse_combined_response_falls_back_to_selection_parser(self):
+        self.assertEqual(parse_combined_response("4,2", 10), ([3, 1], 85))
+        self.assertEqual(parse_combined_response("not json", 3), ([0, 1, 2], 85))
+        self.assertEqual(parse_combined_response('{"satisfaction": 90}', 10), ([0, 1, 2, 3, 4], 85))
+
+class TestStreamingSelection(unittest.TestCase):
+    def setUp(self):
+        reset_models()
+        reset_rate_limits()
+
+    def test_pick_parser_waits_for_each_number_to_end(self):
+        parser = PickParser(titles_length=20, top_count=3)
+        self.assertEqual(parser.feed("1"), [])
+        self.assertEqual(parser.feed("2, 3"), [11])
+        self.assertEqual(parser.feed(", 3, 99, 4"), [2])
+        self.assertEqual(parser.close(), [3])
+        self.assertTrue(parser.done)
+
+    def test_stream_yields_picks_before_the_model_finishes(self):
+        model = FakeStreamingModel(["3", ",", "1", ",7", ",2", ",5", ", 9"])
+        with patch('services.ai_service.get_model', return_value=model):
+            picks = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, top_count=3), model))
+
+        self.assertEqual(picks, [(2, 2), (0, 4), (6, 5)])
+        # Once the last pick is in, the rest of the answer is never waited for
+        self.assertEqual(model.sent, ["3", ",", "1", ",7", ",2"])
+
+    def test_stream_flushes_the_last_number(self):
+        model = FakeStreamingModel(["4", ",", "2"])
+        with patch('services.ai_service.get_model', return_value=model):
+            picks = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10)))
+
+        self.assertEqual([index for index, _ in picks], [3, 1])
+
+    def test_stream_retries_a_failure_before_the_first_pick(self):
+        model = FakeStreamingModel(["1", Exception("reset")], ["1,2"])
+        with patch('services.ai_service.get_model', return_value=model):
+            picks = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, retry_delay=0)))
+
+        self.assertEqual([index for index, _ in picks], [0, 1])
+        self.assertEqual(model.calls, 2)
+
+    def test_stream_keeps_picks_when_it_breaks_later(self):
+        model = FakeStreamingModel(["1", ",2", ",", Exception("reset")], ["5,6,7"])
+        with patch('services.ai_service.get_model', return_value=model):
+            picks = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, retry_delay=0)))
+
+        self.assertEqual([index for index, _ in picks], [0, 1])
+        self.assertEqual(model.calls, 1)
+
+    def test_stream_failure_after_picks_reopens_a_half_open_breaker(self):
+        breaker = ai_service._circuit_breaker
+        breaker.state, breaker.opened_at = "open", time.monotonic() - breaker.reset_timeout
+        model = FakeStreamingModel(["3,", Exception("reset")])
+        with patch('services.ai_service.get_model', return_value=model):
+            picks = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, retry_delay=0)))
+
+        self.assertEqual([index for index, _ in picks], [2])
+        self.assertEqual(breaker.state, "open")
+
+    def test_stream_caches_only_the_picks_it_handed_out(self):
+        model = FakeStreamingModel(["3,7,1,", "9,2,4", ",6"])
+        with patch('services.ai_service.get_model', return_value=model), \
+             patch('services.ai_service.get_response_cache', return_value=PersistentCache()):
+            first = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, use_cache=True)))
+            second = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, use_cache=True)))
+            selection = asyncio.run(get_ai_selection_async("q", "titles", use_cache=True))
+
+        self.assertEqual([index for index, _ in first], [2, 6, 0, 8, 1])
+        self.assertEqual(second, first)
+        self.assertEqual(selection, "3,7,1,9,2")
+        self.assertEqual(model.calls, 1)
+
+    def test_stream_falls_back_when_no_number_arrives(self):
+        model = FakeStreamingModel(["No ", "idea"])
+        before = GEMINI_FALLBACKS.value("selection", "unparseable")
+        with patch('services.ai_service.get_model', return_value=model):
+            picks = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 3)))
+
+        self.assertEqual([index for index, _ in picks], [0, 1, 2])
+        self.assertEqual(GEMINI_FALLBACKS.value("selection", "unparseable"), before + 1)
+
+    def test_stream_answers_repeat_prompts_from_the_cache(self):
+        model = FakeStreamingModel(["2,", "1"])
+        with patch('services.ai_service.get_model', return_value=model), \
+             patch('services.ai_service.get_response_cache', return_value=PersistentCache()):
+            first = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, use_cache=True)))
+            second = asyncio.run(collect_picks(stream_ai_selection_async("q", "titles", 10, use_cache=True)))
+
+        self.assertEqual(first, second)
+        self.assertEqual(model.calls, 1)
+
+class TestHedging(unittest.TestCase):
+    def setUp(self):
+        reset_models()
+        reset_rate_limits()
+        set_hedging(True)
+        self.addCleanup(set_hedging, False)
+
+    def warm_up(self, call, seconds=0.01, samples=20):
+        for _ in range(samples):
+            latency_tracker(call).observe(seconds)
+
+    def test_slow_async_request_is_hedged(self):
+        self.warm_up("selection")
+        model = SlowFirstModel()
+        hedges, wins = GEMINI_HEDGES.value("selection"), GEMINI_HEDGE_WINS.value("selection")
+        
+        start = time.perf_counter()
+        with patch('services.ai_service.get_model', return_value=model):
+            result = asyncio.run(get_ai_selection_async("test query", "1. Title 1"))
+        
+        self.assertEqual(result, "2")
+        self.assertLess(time.perf_counter() - start, 0.4)
+        self.assertEqual(GEMINI_HEDGES.value("selection"), hedges + 1)
+        self.assertEqual(GEMINI_HEDGE_WINS.value("selection"), wins + 1)
+
+    @patch('services.ai_service.latency_tracker')
+    def test_cancelled_copy_still_records_its_latency(self, mock_tracker):
+        mock_tracker.return_value.percentile.return_value = 0.01
+        model = SlowFirstModel()
+        
+        with patch('services.ai_service.get_model', return_value=model):
+            result = asyncio.run(get_ai_selection_async("test query", "1. Title 1"))
+        
+        self.assertEqual(result, "2")
+        # The winner answers at once; the cancelled first copy had been waiting at least the hedge delay
+        latencies = sorted(c[0][0] for c in mock_tracker.return_value.observe.call_args_list)
+        self.assertEqual(len(latencies), 2)
+        self.assertGreaterEqual(latencies[1], 0.01)
+
+    def test_no_hedge_without_latency_history(self):
+        model = SlowFirstModel(stall=0.05)
+        with patch('services.ai_service.get_model', return_value=model):
+            result = asyncio.run(get_ai_selection_async("test query", "1. Title 1"))
+        
+        self.assertEqual(result, "1")
+        self.assertEqual(model.calls, 1)
+
+    def test_combined_requests_are_never_hedged(self):
+        self.warm_up("combined")
+        model = SlowFirstModel(stall=0.05)
+        with patch('services.ai_service.get_model', return_value=model):
+            asyncio.run(get_ai_combined_async("test query", "1. Title 1"))
+        
+        self.assertEqual(model.calls, 1)
+
+    @patch('services.ai_service.GEMINI_BURST', 1000)
+    @patch('services.ai_service.GEMINI_REQUESTS_PER_MINUTE', 60000)
+    @patch('utils.hedging.LatencyTracker.percentile', return_value=0.001)
+    def test_hedge_rate_is_capped(self, mock_percentile):
+        reset_rate_limits()
+        hedges = GEMINI_HEDGES.value("selection")
+        # Every request is slower than the history, so each would hedge if the budget allowed it
+        model = MagicMock()
+        async def slow(prompt, **kwargs):
+            await asyncio.sleep(0.01)
+            return MagicMock(text="1")
+        model.generate_content_async = slow
+        
+        async def run():
+            for _ in range(20):
+                await get_ai_selection_async("test query", "1. Title 1")
+        with patch('services.ai_service.get_model', return_value=model):
+            asyncio.run(run())
+        
+        # One hedge up front, then one for every ten requests
+        self.assertIn(GEMINI_HEDGES.value("selection") - hedges, (2, 3))
@@ -0,0 +1,98 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+from aiohttp.test_utils import TestServer, TestClient
+from services.api_service import SingleFlight, create_app
+from services.batch_service import NO_NEWS
+
+async def request_all(app, requests):
+    async with TestClient(TestServer(app)) as client:
+        async def send(method, path, body=None):
+            response = await client.request(method, path, json=body)
+            return response.status, await response.json()
+        return await asyncio.gather(*(send(*request) for request in requests))
+
+class TestAPIService(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('services.api_service.lookup_result', return_value=None)
+        self.mock_lookup_result = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('services.api_service.store_result')
+        self.mock_store_result = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_flight_shares_one_computation(self):
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+        
+        async def run():
+            flights = SingleFlight()
+            results = await asyncio.gather(*(flights.do("key", compute) for _ in range(5)))
+            # Once the first flight lands, the next caller starts a new one
+            results.append(await flights.do("key", compute))
+            return results
+        
+        self.assertEqual(asyncio.run(run()), ["result"] * 6)
+        self.assertEqual(len(calls), 2)
+
+    @patch('services.api_service.process_query')
+    def test_concurrent_requests_for_the_same_query_are_coalesced(self, mock_process_query):
+        async def slow_process_query(query, fetch_slots, ai_slots, **options):
+            await asyncio.sleep(0.05)
+            return {"query": query, "articles": [{"title": query, "url": "u"}], "ai_satisfaction": 80}
+        mock_process_query.side_effect = slow_process_query
+        
+        responses = asyncio.run(request_all(create_app(), [
+            ("GET", "/news?q=Climate+Change"),
+            ("GET", "/news?q=climate%20%20change"),
+            ("POST", "/news", {"query": "climate change"}),
+            ("GET", "/news?q=space"),
+        ]))
+        
+        self.assertEqual(mock_process_query.call_count, 2)
+        self.assertEqual([status for status, _ in responses], [200] * 4)
+        self.assertEqual(responses[1][1]["query"], "climate  change")
+        self.assertEqual(responses[1][1]["ai_satisfaction"], 80)
+        self.assertEqual(responses[3][1]["articles"], [{"title": "space", "url": "u"}])
+        self.assertEqual(sorted(c[0][0]["query"] for c in self.mock_store_result.call_args_list),
+                         ["Climate Change", "space"])
+        self.assertEqual({c[0][1] for c in self.mock_store_result.call_args_list}, {"serve"})
+
+    @patch('services.api_service.process_query')
+    def test_stored_result_is_served_without_computing(self, mock_process_query):
+        self.mock_lookup_result.return_value = ({"query": "space", "articles": [], "ai_satisfaction": 70}, 60)
+        
+        [(status, body)] = asyncio.run(request_all(create_app(), [("GET", "/news?q=space")]))
+        
+        self.assertEqual((status, body["ai_satisfaction"]), (200, 70))
+        mock_process_query.assert_not_called()
+        self.mock_lookup_result.assert_called_once_with("space", source="watch")
+
+    @patch('services.api_service.process_query')
+    def test_bad_requests(self, mock_process_query):
+        mock_process_query.return_value = {"query": "x", "articles": [], "ai_satisfaction": None,
+                                           "error": "Connection error."}
+        
+        responses = asyncio.run(request_all(create_app(), [
+            ("GET", "/news"),
+            ("POST", "/news", ["not", "an", "object"]),
+            ("GET", "/news?q=x"),
+        ]))
+        
+        self.assertEqual([status for status, _ in responses], [400, 400, 502])
+        self.assertEqual(responses[2][1]["error"], "Connection error.")
+
+    @patch('services.api_service.process_query')
+    def test_empty_feed_is_not_found_rather_than_an_upstream_error(self, mock_process_query):
+        mock_process_query.return_value = {"query": "x", "articles": [], "ai_satisfaction": None, "error": NO_NEWS}
+        
+        [(status, body)] = asyncio.run(request_all(create_app(), [("GET", "/news?q=x")]))
+        
+        self.assertEqual((status, body["error"]), (404, NO_NEWS))
+
+if __name__ == '__main__':
+    unittest.main()
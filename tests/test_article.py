@@ -1,5 +1,5 @@
 import unittest
-from models.article import Article, extract_article_data
+from models.article import Article, ArticleBatch, extract_article_data
 
 class TestArticle(unittest.TestCase):
     def test_article_initialization(self):
@@ -20,6 +20,66 @@ class TestArticle(unittest.TestCase):
             "url": "http://example.com"
         })
 
+    def test_article_to_dict_with_alternate_urls(self):
+        article = Article("Test Title", "http://example.com", ["http://mirror.example.com"])
+        self.assertEqual(article.to_dict()["alternate_urls"], ["http://mirror.example.com"])
+
+    def test_article_to_dict_with_body(self):
+        article = Article("Test Title", "http://example.com", lead="First.", body="First.\n\nSecond.")
+        self.assertEqual(article.to_dict(), {
+            "title": "Test Title",
+            "url": "http://example.com",
+            "lead": "First.",
+            "body": "First.\n\nSecond."
+        })
+        self.assertEqual(Article.from_dict(article.to_dict()).body, "First.\n\nSecond.")
+
+    def test_article_has_no_instance_dict(self):
+        article = Article("Test Title", "http://example.com")
+        self.assertFalse(hasattr(article, "__dict__"))
+        with self.assertRaises(AttributeError):
+            article.extra = 1
+
+    def test_article_from_dict_parses_published(self):
+        article = Article.from_dict({"title": "T", "url": "u", "publishedAt": "Mon, 20 Jan 2020 12:00:00 GMT"})
+        self.assertEqual(article.published, 1579521600.0)
+        self.assertIsNone(Article.from_dict({"publishedAt": "not a date"}).published)
+        self.assertEqual(Article.from_dict(article.to_record()).published, 1579521600.0)
+
+    def test_batch_sorts_newest_first_with_undated_last(self):
+        batch = ArticleBatch.from_articles([
+            Article("old", "a", published=100.0),
+            Article("undated", "b"),
+            Article("new", "c", published=200.0),
+            Article("undated too", "d"),
+        ])
+        self.assertEqual(batch.sort_by_published().titles, ["new", "old", "undated", "undated too"])
+
+    def test_batch_unique_urls_keeps_first_and_placeholders(self):
+        batch = ArticleBatch.from_articles([{"title": "1", "url": "a"}, {"title": "2", "url": "a"},
+                                            {"title": "3"}, {"title": "4"}])
+        self.assertEqual(batch.unique_urls().titles, ["1", "3", "4"])
+
+    def test_batch_merge_clusters_collects_alternate_urls(self):
+        batch = ArticleBatch.from_articles([Article("a", "1", ["0"]), Article("b", "2"), Article("a", "3")])
+        merged = batch.merge_clusters([[0, 2], [1]])
+        self.assertEqual([article.to_dict() for article in merged], [
+            {"title": "a", "url": "1", "alternate_urls": ["0", "3"]},
+            {"title": "b", "url": "2"},
+        ])
+        self.assertEqual(batch.alternate_urls, [["0"], [], []])
+
+    def test_batch_filter_and_slice(self):
+        batch = ArticleBatch.from_articles([Article(str(i), str(i), published=float(i)) for i in range(5)])
+        self.assertEqual(batch.filter([i % 2 == 0 for i in range(5)]).titles, ["0", "2", "4"])
+        self.assertEqual([article.published for article in batch[1:3]], [1.0, 2.0])
+
+    def test_extract_article_data_from_batch(self):
+        batch = ArticleBatch.from_articles([Article("Title 1", "url1", source="BBC"), Article("Title 2", "url2")])
+        result = extract_article_data(batch, [1, 0])
+        self.assertEqual([article.title for article in result], ["Title 2", "Title 1"])
+        self.assertEqual(result[1].source, "BBC")
+
     def test_extract_article_data(self):
         articles = [
             {"title": "Title 1", "url": "url1"},
@@ -0,0 +1,205 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import os
+import tempfile
+from services.batch_service import read_queries, run_batch, process_query
+from services.news_service import NewsFetchError
+from utils.bloom import BloomFilter
+
+async def collect(results):
+    return [result async for result in results]
+
+class TestBatchService(unittest.TestCase):
+    def test_read_queries_skips_blanks_and_comments(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write("climate change\n\n# comment\n  space exploration  \n")
+            path = f.name
+        try:
+            self.assertEqual(read_queries(path), ["climate change", "space exploration"])
+        finally:
+            os.remove(path)
+
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=90)
+    @patch('services.batch_service.get_ai_selection_async', return_value="2")
+    @patch('services.batch_service.fetch_news_async')
+    def test_run_batch_one_result_per_query(self, mock_fetch, mock_selection, mock_satisfaction):
+        async def fake_fetch(query, use_cache=True):
+            return [
+                {"title": f"{query} 1", "url": "url1"},
+                {"title": f"{query} 2", "url": "url2"},
+            ]
+        mock_fetch.side_effect = fake_fetch
+
+        results = asyncio.run(collect(run_batch(["a", "b", "c"])))
+
+        self.assertEqual([r["query"] for r in results], ["a", "b", "c"])
+        self.assertEqual(results[1]["articles"], [{"title": "b 2", "url": "url2"}])
+        self.assertEqual(results[2]["ai_satisfaction"], 90)
+
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=90)
+    @patch('services.batch_service.get_ai_selection_async', return_value="1")
+    @patch('services.batch_service.fetch_news_async')
+    def test_run_batch_respects_fetch_limit(self, mock_fetch, mock_selection, mock_satisfaction):
+        state = {"active": 0, "peak": 0}
+
+        async def slow_fetch(query, use_cache=True):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            await asyncio.sleep(0.02)
+            state["active"] -= 1
+            return [{"title": query, "url": "url"}]
+        mock_fetch.side_effect = slow_fetch
+
+        queries = [str(i) for i in range(8)]
+        results = asyncio.run(collect(run_batch(queries, fetch_concurrency=2, ai_concurrency=2)))
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(state["peak"], 2)
+
+    @patch('services.batch_service.get_ai_satisfaction_async')
+    @patch('services.batch_service.get_ai_combined_async', return_value='{"picks": [1], "satisfaction": 60}')
+    @patch('services.batch_service.fetch_news_async', return_value=[{"title": "t", "url": "u"}])
+    def test_run_batch_combined_mode(self, mock_fetch, mock_combined, mock_satisfaction):
+        results = asyncio.run(collect(run_batch(["a"], combined=True)))
+
+        self.assertEqual(results[0]["articles"], [{"title": "t", "url": "u"}])
+        self.assertEqual(results[0]["ai_satisfaction"], 60)
+        mock_satisfaction.assert_not_called()
+
+    @patch('services.batch_service.get_ai_satisfaction_async')
+    @patch('services.batch_service.stream_ai_selection_async')
+    @patch('services.batch_service.fetch_news_async')
+    def test_run_batch_stream_mode(self, mock_fetch, mock_stream, mock_satisfaction):
+        events = []
+
+        async def fake_fetch(query, use_cache=True):
+            return [{"title": f"t{i}", "url": f"u{i}"} for i in range(3)]
+
+        async def fake_stream(query, titles_text, titles_length, top_count, use_cache=True):
+            for index in (2, 0):
+                events.append(f"pick {index}")
+                yield index
+            events.append("model finished")
+
+        async def fake_satisfaction(query, selected_titles, use_cache=True):
+            events.append("satisfaction")
+            return 75
+
+        mock_fetch.side_effect = fake_fetch
+        mock_stream.side_effect = fake_stream
+        mock_satisfaction.side_effect = fake_satisfaction
+
+        results = asyncio.run(collect(run_batch(["a"], stream=True)))
+
+        self.assertEqual(results[0]["articles"], [{"title": "t2", "url": "u2"}, {"title": "t0", "url": "u0"}])
+        self.assertEqual(results[0]["ai_satisfaction"], 75)
+        self.assertEqual(mock_satisfaction.call_args[0][1], "1. t2\n2. t0")
+        self.assertEqual(events, ["pick 2", "pick 0", "model finished", "satisfaction"])
+
+    @patch('services.batch_service.resolve_articles')
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=90)
+    @patch('services.batch_service.get_ai_selection_async', return_value="2")
+    @patch('services.batch_service.fetch_news_async', return_value=[{"title": "t1", "url": "u1"}, {"title": "t2", "url": "u2"}])
+    def test_process_query_reports_each_stage(self, mock_fetch, mock_selection, mock_satisfaction, mock_resolve):
+        async def fake_resolve(articles, use_cache=True):
+            return articles
+        mock_resolve.side_effect = fake_resolve
+        stages = []
+
+        def on_stage(stage, articles):
+            stages.append((stage, len(articles)))
+
+        result = asyncio.run(process_query("a", asyncio.Semaphore(1), asyncio.Semaphore(1), rank=False,
+                                           on_stage=on_stage))
+
+        self.assertEqual(result["articles"], [{"title": "t2", "url": "u2"}])
+        self.assertEqual(stages, [("fetched", 2), ("select", 2), ("rate", 1), ("finish", 1)])
+
+    @patch('services.batch_service.resolve_articles')
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=90)
+    @patch('services.batch_service.get_ai_selection_async', return_value="1")
+    @patch('services.batch_service.fetch_news_async', return_value=[{"title": "t", "url": "https://news.google.com/rss/articles/1"}])
+    def test_run_batch_resolves_publisher_links(self, mock_fetch, mock_selection, mock_satisfaction, mock_resolve):
+        async def fake_resolve(articles, use_cache=True):
+            for article in articles:
+                article.url = "https://publisher.example.com/story"
+            return articles
+        mock_resolve.side_effect = fake_resolve
+
+        results = asyncio.run(collect(run_batch(["a"])))
+        self.assertEqual(results[0]["articles"], [{"title": "t", "url": "https://publisher.example.com/story"}])
+
+        mock_resolve.reset_mock()
+        asyncio.run(collect(run_batch(["a"], resolve=False)))
+        mock_resolve.assert_not_called()
+
+    @patch('services.batch_service.fetch_bodies')
+    @patch('services.batch_service.resolve_articles')
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=90)
+    @patch('services.batch_service.get_ai_selection_async', return_value="1")
+    @patch('services.batch_service.fetch_news_async', return_value=[{"title": "t", "url": "https://news.google.com/rss/articles/1"}])
+    def test_run_batch_fetches_bodies_from_publisher_links(self, mock_fetch, mock_selection, mock_satisfaction,
+                                                          mock_resolve, mock_bodies):
+        async def fake_resolve(articles, use_cache=True):
+            for article in articles:
+                article.url = "https://publisher.example.com/story"
+            return articles
+        async def fake_bodies(articles):
+            for article in articles:
+                article.lead = f"Lead of {article.url}"
+                article.body = "Body"
+            return articles
+        mock_resolve.side_effect = fake_resolve
+        mock_bodies.side_effect = fake_bodies
+
+        results = asyncio.run(collect(run_batch(["a"], bodies=True)))
+        self.assertEqual(results[0]["articles"], [{"title": "t", "url": "https://publisher.example.com/story",
+                                                   "lead": "Lead of https://publisher.example.com/story", "body": "Body"}])
+
+        mock_bodies.reset_mock()
+        asyncio.run(collect(run_batch(["a"])))
+        mock_bodies.assert_not_called()
+
+    @patch('services.batch_service.DELTA_MIN_NEW', 2)
+    @patch('services.batch_service.previous_result', return_value=None)
+    @patch('services.delta_service.get_seen_filter')
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=90)
+    @patch('services.batch_service.get_ai_selection_async', return_value="1")
+    @patch('services.batch_service.fetch_news_async')
+    def test_run_batch_delta_sends_only_new_headlines(self, mock_fetch, mock_selection, mock_satisfaction,
+                                                      mock_seen_filter, mock_previous):
+        mock_seen_filter.return_value = BloomFilter(capacity=1000)
+        feed = [{"title": f"t{i}", "url": f"url{i}"} for i in range(3)]
+        async def fake_fetch(query, use_cache=True):
+            return feed
+        mock_fetch.side_effect = fake_fetch
+
+        first = asyncio.run(collect(run_batch(["a"], resolve=False, delta=True)))[0]
+        self.assertEqual(first["articles"], [{"title": "t0", "url": "url0"}])
+        self.assertEqual(mock_selection.call_args[0][1], "1. t0\n2. t1\n3. t2")
+
+        # One new headline isn't enough, so the stored result comes back without asking Gemini
+        mock_previous.return_value = {"query": "A", "articles": first["articles"], "ai_satisfaction": 90}
+        feed.append({"title": "t3", "url": "url3"})
+        mock_selection.reset_mock()
+        second = asyncio.run(collect(run_batch(["a"], resolve=False, delta=True)))[0]
+        self.assertEqual(second, {"query": "a", "articles": [{"title": "t0", "url": "url0"}], "ai_satisfaction": 90,
+                                  "unchanged": True})
+        mock_selection.assert_not_called()
+
+        feed.append({"title": "t4", "url": "url4"})
+        third = asyncio.run(collect(run_batch(["a"], resolve=False, delta=True)))[0]
+        self.assertEqual(third["articles"], [{"title": "t3", "url": "url3"}])
+        self.assertEqual(mock_selection.call_args[0][1], "1. t3\n2. t4")
+
+    @patch('services.batch_service.get_ai_selection_async')
+    @patch('services.batch_service.fetch_news_async', side_effect=NewsFetchError("Connection error."))
+    def test_run_batch_fetch_failure_is_isolated(self, mock_fetch, mock_selection):
+        results = asyncio.run(collect(run_batch(["a"])))
+
+        self.assertEqual(results[0]["error"], "Connection error.")
+        mock_selection.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
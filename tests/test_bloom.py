@@ -0,0 +1,74 @@
+import unittest
+import os
+import tempfile
+from utils.bloom import BloomFilter, filter_shape
+
+class TestBloomFilter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "seen", "topic.bloom")
+
+    def test_added_keys_are_found(self):
+        seen = BloomFilter(capacity=1000)
+
+        self.assertTrue(seen.add("https://example.com/1"))
+        self.assertFalse(seen.add("https://example.com/1"))
+        self.assertIn("https://example.com/1", seen)
+        self.assertNotIn("https://example.com/2", seen)
+        self.assertEqual(len(seen), 1)
+
+    def test_false_positives_stay_near_the_error_rate(self):
+        seen = BloomFilter(capacity=10000, error_rate=0.01)
+        seen.update(f"seen/{i}" for i in range(10000))
+
+        false_positives = sum(f"other/{i}" in seen for i in range(10000))
+        self.assertLess(false_positives, 200)
+
+    def test_filter_is_sized_for_its_capacity(self):
+        bits, hashes = filter_shape(1000000, 0.01)
+
+        self.assertLess(bits / 8, 1.25 * 2 ** 20)
+        self.assertEqual(hashes, 7)
+
+    def test_keys_persist_across_reopening(self):
+        seen = BloomFilter(self.path, capacity=1000)
+        seen.add("a")
+        seen.close()
+
+        seen = BloomFilter(self.path, capacity=1000)
+        self.addCleanup(seen.close)
+        self.assertIn("a", seen)
+        self.assertEqual(len(seen), 1)
+
+    def test_existing_file_keeps_its_shape(self):
+        BloomFilter(self.path, capacity=1000).close()
+
+        seen = BloomFilter(self.path, capacity=50000)
+        self.addCleanup(seen.close)
+        self.assertEqual(seen.bits, filter_shape(1000, 0.01)[0])
+
+    def test_corrupt_file_starts_over(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'wb') as f:
+            f.write(b"not a filter")
+
+        seen = BloomFilter(self.path, capacity=1000)
+        self.addCleanup(seen.close)
+        self.assertEqual(len(seen), 0)
+        self.assertTrue(seen.add("a"))
+
+    def test_full_filter_starts_over(self):
+        seen = BloomFilter(self.path, capacity=10)
+        self.addCleanup(seen.close)
+        i = 0
+        while len(seen) < 10:
+            seen.add(str(i))
+            i += 1
+
+        self.assertTrue(seen.add("late"))
+        self.assertIn("late", seen)
+        self.assertEqual(len(seen), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from models.article import Article
+from services.body_service import (extract_text, download_page, fetch_bodies, get_body_pool, shutdown_body_pool,
+                                   ARTICLE_BODIES)
+from services.news_service import create_async_session
+
+LEAD = "The council approved the new transit plan on Tuesday after months of debate."
+SECOND = "Construction of the first line is expected to start next spring, officials said."
+
+STORY = f"""<html><head><title>Transit</title><script>var tracking = "{'x' * 200}";</script></head><body>
+<nav><p>Home, World, Politics, Business, Technology, Science, Sport, Culture</p></nav>
+<div class="sidebar"><p>Short teaser</p></div>
+<article><h1>Transit plan approved</h1><p>By A. Reporter</p>
+<div class="section"><p>{LEAD}</p></div>
+<div class="section"><p>{SECOND}</p><p>Share</p></div>
+</article>
+<footer><p>Copyright 2024 The Example Times. All rights reserved worldwide.</p></footer>
+</body></html>"""
+
+def create_app():
+    async def story(request):
+        return web.Response(text=STORY, content_type="text/html")
+
+    async def big(request):
+        return web.Response(body=b"<html><body><p>" + b"word " * 200000 + b"</p></body></html>", content_type="text/html")
+
+    async def slow(request):
+        await asyncio.sleep(5)
+        return web.Response(text=STORY, content_type="text/html")
+
+    async def pdf(request):
+        return web.Response(body=b"%PDF-1.4", content_type="application/pdf")
+
+    app = web.Application()
+    app.router.add_get("/story", story)
+    app.router.add_get("/big", big)
+    app.router.add_get("/slow", slow)
+    app.router.add_get("/report.pdf", pdf)
+    return app
+
+async def with_server(run):
+    async with TestServer(create_app()) as server:
+        session = create_async_session()
+        try:
+            return await run(server, session)
+        finally:
+            await session.close()
+
+def fetch_paths(paths, **options):
+    async def run(server, session):
+        articles = [Article(path, str(server.make_url(path))) for path in paths]
+        return await fetch_bodies(articles, session=session, **options)
+    return asyncio.run(with_server(run))
+
+class TestBodyService(unittest.TestCase):
+    def setUp(self):
+        executor = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(executor.shutdown)
+        self.options = {"executor": executor}
+
+    def test_extract_text_keeps_the_story_paragraphs(self):
+        lead, body = extract_text(STORY.encode(), "utf-8")
+
+        self.assertEqual(lead, LEAD)
+        self.assertEqual(body, f"{LEAD}\n\n{SECOND}")
+
+    def test_extract_text_without_paragraphs(self):
+        self.assertEqual(extract_text(b"<html><body><p>Too short</p></body></html>"), (None, None))
+        self.assertEqual(extract_text(b""), (None, None))
+
+    def test_extract_text_ignores_an_unknown_charset(self):
+        self.assertEqual(extract_text(STORY.encode(), "no-such-charset")[0], LEAD)
+
+    def test_download_stops_at_the_byte_cap(self):
+        async def run(server, session):
+            return await download_page(str(server.make_url("/big")), session, max_bytes=10000)
+        content, _ = asyncio.run(with_server(run))
+
+        self.assertEqual(len(content), 10000)
+
+    def test_fetch_bodies_fills_in_lead_and_body(self):
+        articles = fetch_paths(["/story", "/report.pdf"], **self.options)
+
+        self.assertEqual(articles[0].lead, LEAD)
+        self.assertEqual(articles[0].body, f"{LEAD}\n\n{SECOND}")
+        self.assertEqual(articles[1].to_dict()["title"], "/report.pdf")
+        self.assertNotIn("body", articles[1].to_dict())
+
+    def test_slow_page_is_left_out_without_stalling_the_rest(self):
+        timeouts = ARTICLE_BODIES.value("timeout")
+
+        start = time.perf_counter()
+        articles = fetch_paths(["/slow", "/story"], timeout=0.2, **self.options)
+
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertIsNone(articles[0].body)
+        self.assertEqual(articles[1].lead, LEAD)
+        self.assertEqual(ARTICLE_BODIES.value("timeout"), timeouts + 1)
+
+    def test_links_that_are_not_http_are_left_alone(self):
+        articles = [Article("T", "#")]
+        self.assertIs(asyncio.run(fetch_bodies(articles)), articles)
+        self.assertIsNone(articles[0].body)
+
+    def test_pages_are_parsed_in_worker_processes(self):
+        self.addCleanup(shutdown_body_pool)
+
+        articles = fetch_paths(["/story"])
+
+        self.assertEqual(articles[0].lead, LEAD)
+        self.assertNotEqual(get_body_pool()._mp_context.get_start_method(), "fork")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import patch
+import os
+import shutil
+import tempfile
+from utils.cache import PersistentCache
+
+class TestPersistentCache(unittest.TestCase):
+    def test_set_and_get(self):
+        cache = PersistentCache()
+        cache.set("key", {"articles": [1, 2, 3]})
+        self.assertEqual(cache.get("key"), {"articles": [1, 2, 3]})
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    @patch('utils.cache.time.time')
+    def test_ttl_expiry_keeps_stale_entry_for_revalidation(self, mock_time):
+        mock_time.return_value = 1000
+        cache = PersistentCache(ttl=60)
+        cache.set("key", "value")
+        
+        mock_time.return_value = 1061
+        self.assertIsNone(cache.get("key"))
+        value, stored_at = cache.get_entry("key")
+        self.assertEqual((value, stored_at), ("value", 1000))
+        
+        cache.touch("key")
+        self.assertEqual(cache.get("key"), "value")
+
+    @patch('utils.cache.time.time')
+    def test_max_entries_evicts_least_recently_used(self, mock_time):
+        cache = PersistentCache(max_entries=2)
+        for now, key in enumerate(["a", "b"]):
+            mock_time.return_value = now
+            cache.set(key, key)
+        
+        mock_time.return_value = 2
+        cache.get("a")
+        mock_time.return_value = 3
+        cache.set("c", "c")
+        
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("a"), "a")
+        self.assertIsNone(cache.get("b"))
+
+    def test_hits_do_not_write_to_disk(self):
+        cache = PersistentCache()
+        cache.set("key", "value")
+        changes = cache._conn.total_changes
+        
+        for _ in range(10):
+            self.assertEqual(cache.get("key"), "value")
+        self.assertEqual(cache._conn.total_changes, changes)
+
+    @patch('utils.cache.time.time')
+    def test_max_bytes_evicts_oldest(self, mock_time):
+        cache = PersistentCache(max_bytes=25)
+        for now, key in enumerate(["a", "b", "c"]):
+            mock_time.return_value = now
+            cache.set(key, "x" * 10)
+        
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 2)
+
+    def test_persists_across_instances(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "nested", "cache.sqlite3")
+            cache = PersistentCache(path)
+            cache.set("key", [1, 2])
+            cache.close()
+            
+            reopened = PersistentCache(path)
+            self.assertEqual(reopened.get("key"), [1, 2])
+            reopened.close()
+        finally:
+            shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import random
+import string
+import time
+from services.dedupe_service import normalize_title, cluster_titles, dedupe_articles
+
+class TestDedupeService(unittest.TestCase):
+    def test_normalize_title(self):
+        self.assertEqual(normalize_title("Café opens: “Big” news! - Reuters"), "cafe opens big news")
+
+    def test_cluster_titles_groups_syndicated_copies(self):
+        titles = [
+            "Climate summit opens in Paris - BBC",
+            "Stocks fall on Wall Street - Reuters",
+            "Climate summit opens in Paris - CNN",
+            "Climate Summit Opens In Paris! - Yahoo News",
+        ]
+        self.assertEqual(cluster_titles(titles), [[0, 2, 3], [1]])
+
+    def test_cluster_titles_keeps_distinct_stories_apart(self):
+        titles = ["Stocks fall", "Football results of the day", "New vaccine approved in Europe"]
+        self.assertEqual(cluster_titles(titles), [[0], [1], [2]])
+
+    def test_cluster_titles_keeps_stories_with_shared_wording_apart(self):
+        titles = [
+            "Fed raises interest rates by 25 basis points - Reuters",
+            "Bank of England raises interest rates by 25 basis points - BBC",
+            "Fed raises interest rates by 25 basis points - CNBC",
+            "ECB raises interest rates by 50 basis points - FT",
+        ]
+        self.assertEqual(cluster_titles(titles), [[0, 2], [1], [3]])
+
+    def test_cluster_titles_keeps_numbered_headlines_apart(self):
+        titles = [f"Headline {i} - Source {i % 7}" for i in range(100)]
+        self.assertEqual(len(cluster_titles(titles)), 100)
+
+    def test_dedupe_articles_keeps_alternate_urls(self):
+        articles = [
+            {"title": "Climate summit opens in Paris - BBC", "url": "bbc", "publishedAt": ""},
+            {"title": "Stocks fall on Wall Street - Reuters", "url": "reuters", "publishedAt": ""},
+            {"title": "Climate summit opens in Paris - CNN", "url": "cnn", "publishedAt": ""},
+        ]
+
+        deduped = dedupe_articles(articles)
+        self.assertEqual([a.url for a in deduped], ["bbc", "reuters"])
+        self.assertEqual(deduped[0].alternate_urls, ["cnn"])
+        self.assertEqual(deduped[1].alternate_urls, [])
+        self.assertNotIn("alternate_urls", articles[0])
+
+    def test_dedupe_scales_to_thousands_of_items(self):
+        rng = random.Random(0)
+        stories = [" ".join("".join(rng.choices(string.ascii_lowercase, k=6)) for _ in range(6)) for _ in range(1000)]
+        articles = [
+            {"title": f"{story} - Source {j}", "url": f"{i}-{j}"}
+            for i, story in enumerate(stories) for j in range(3)
+        ]
+
+        start = time.perf_counter()
+        deduped = dedupe_articles(articles)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(len(deduped), 1000)
+        self.assertEqual(deduped[0].alternate_urls, ["0-1", "0-2"])
+
+if __name__ == '__main__':
+    unittest.main()
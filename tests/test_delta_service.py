@@ -0,0 +1,31 @@
+import unittest
+from unittest.mock import patch
+from models.article import Article
+from services.delta_service import unseen_articles, mark_seen, seen_filter_path
+from utils.bloom import BloomFilter
+
+class TestDeltaService(unittest.TestCase):
+    def setUp(self):
+        self.seen = BloomFilter(capacity=1000)
+        patcher = patch('services.delta_service.get_seen_filter', return_value=self.seen)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_seen_articles_are_filtered_out(self):
+        mark_seen("climate", [Article("Old", "url1", ["url2"]), Article("No link")])
+
+        fresh = unseen_articles("climate", [
+            {"title": "Old", "url": "url1"},
+            {"title": "Syndicated copy", "url": "url2"},
+            {"title": "No  link", "url": "#"},
+            {"title": "New", "url": "url3"}
+        ])
+
+        self.assertEqual(fresh.titles, ["New"])
+
+    def test_topics_share_a_filter_file_regardless_of_spacing_and_case(self):
+        self.assertEqual(seen_filter_path("Climate  Change"), seen_filter_path("climate change"))
+        self.assertNotEqual(seen_filter_path("climate"), seen_filter_path("weather"))
+
+if __name__ == '__main__':
+    unittest.main()
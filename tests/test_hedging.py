@@ -0,0 +1,41 @@
+import unittest
+from utils.hedging import LatencyTracker, HedgeBudget
+
+class TestHedging(unittest.TestCase):
+    def test_latency_tracker_needs_enough_samples(self):
+        tracker = LatencyTracker(window=10, min_samples=3)
+        tracker.observe(1.0)
+        tracker.observe(2.0)
+        self.assertIsNone(tracker.percentile(95))
+        tracker.observe(3.0)
+        self.assertEqual(tracker.percentile(95), 3.0)
+
+    def test_latency_tracker_percentile_over_recent_window(self):
+        tracker = LatencyTracker(window=100, min_samples=1)
+        for i in range(1, 101):
+            tracker.observe(float(i))
+        self.assertEqual(tracker.percentile(50), 50.0)
+        self.assertEqual(tracker.percentile(95), 95.0)
+        
+        # Old samples fall out of the window
+        for _ in range(100):
+            tracker.observe(0.5)
+        self.assertEqual(tracker.percentile(99), 0.5)
+
+    def test_hedge_budget_caps_the_hedge_ratio(self):
+        budget = HedgeBudget(ratio=0.1)
+        hedges = 0
+        for _ in range(100):
+            budget.deposit()
+            hedges += budget.try_spend()
+        self.assertLessEqual(hedges, 11)
+        self.assertGreaterEqual(hedges, 9)
+
+    def test_hedge_budget_starts_with_a_burst(self):
+        budget = HedgeBudget(ratio=0.1, burst=2)
+        self.assertTrue(budget.try_spend())
+        self.assertTrue(budget.try_spend())
+        self.assertFalse(budget.try_spend())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,38 +1,57 @@
 import unittest
 from unittest.mock import patch, MagicMock, mock_open, call
+import io
 import json
 import sys
-from main import save_news_to_file, display_news, main
+import os
+import tempfile
+from main import save_news_to_file, display_news, main, parse_args
 from models.article import Article
+from services.news_service import NewsFetchError
+
+async def passthrough_spinner(message, awaitable, spinner=None):
+    return await awaitable
 
 class TestMain(unittest.TestCase):
-    @patch('builtins.open')
-    def test_save_news_to_file(self, mock_file):
-        mock_file_handle = mock_open()
-        mock_file.return_value = mock_file_handle()
-        
+    def setUp(self):
+        patcher = patch('main.lookup_result', return_value=None)
+        self.mock_lookup_result = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch('main.store_result')
+        self.mock_store_result = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_save_news_to_file(self):
         articles = [
             Article("Title 1", "url1"),
             Article("Title 2", "url2")
         ]
         
-        save_news_to_file(articles, "test.json")
-        
-        mock_file.assert_called_once_with("test.json", 'w')
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.json")
+            save_news_to_file(articles, path, satisfaction=90)
+            
+            with open(path) as f:
+                data = json.load(f)
+            self.assertEqual(os.listdir(directory), ["test.json"])
         
         expected_data = [
             {"title": "Title 1", "url": "url1"},
             {"title": "Title 2", "url": "url2"}
         ]
-        
-        mock_file_handle().write.assert_called()
+        self.assertEqual(data, {"articles": expected_data, "ai_satisfaction": 90})
 
-    @patch('builtins.open')
-    def test_save_news_to_file_exception(self, mock_open):
-        mock_open.side_effect = Exception("File error")
-        articles = [Article("Title 1", "url1")]
-        
-        save_news_to_file(articles, "test.json")
+    def test_save_news_to_file_failure_keeps_previous_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "test.json")
+            save_news_to_file([Article("Title 1", "url1")], path)
+            
+            with patch('utils.result_store.json.dump', side_effect=Exception("Disk full")):
+                save_news_to_file([Article("Title 2", "url2")], path)
+            
+            with open(path) as f:
+                self.assertEqual(json.load(f)["articles"], [{"title": "Title 1", "url": "url1"}])
+            self.assertEqual(os.listdir(directory), ["test.json"])
 
     @patch('builtins.print')
     def test_display_news(self, mock_print):
@@ -55,57 +74,191 @@ class TestMain(unittest.TestCase):
     @patch('main.input', return_value="test query")
     @patch('main.save_news_to_file')
     @patch('main.display_news')
-    @patch('models.article.extract_article_data')
-    @patch('models.article.format_selected_titles')
-    @patch('services.ai_service.get_ai_satisfaction')
-    def test_main_success(self, mock_get_satisfaction, mock_format_selected,
-                         mock_extract_article, mock_display, mock_save,
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=85)
+    @patch('services.batch_service.get_ai_selection_async', return_value="1")
+    @patch('services.batch_service.fetch_news_async')
+    @patch('main.run_with_spinner_async', side_effect=passthrough_spinner)
+    def test_main_success(self, mock_spinner_async, mock_fetch, mock_get_selection,
+                         mock_get_satisfaction, mock_display, mock_save,
                          mock_input, mock_spinner):
-        mock_articles = [{"title": "Title 1", "url": "url1"}]
-        mock_titles = ["Title 1"]
-        mock_titles_text = "1. Title 1"
-        mock_ai_answer = "1"
-        mock_picked_numbers = [0]
-        mock_top_news = [Article("Title 1", "url1")]
-        mock_satisfaction = 85
-        
-        def spinner_side_effect(message, func, *args, **kwargs):
-            if func.__name__ == "setup_gemini":
-                return None
-            elif func.__name__ == "fetch_news":
-                return mock_articles
-            elif func.__name__ == "get_ai_selection":
-                return mock_ai_answer
-            elif func.__name__ == "extract_article_data":
-                return mock_top_news
-            elif func.__name__ == "get_ai_satisfaction":
-                return mock_satisfaction
-            return None
-        
-        mock_spinner.side_effect = spinner_side_effect
-        
-        with patch('services.news_service.extract_titles', return_value=mock_titles), \
-             patch('services.news_service.format_titles_for_ai', return_value=mock_titles_text), \
-             patch('services.ai_service.get_ai_selection', return_value=mock_ai_answer), \
-             patch('services.ai_service.parse_ai_selection', return_value=mock_picked_numbers):
-            
-            main()
+        mock_fetch.return_value = [{"title": "Title 1", "url": "url1"}]
+        
+        main()
+        
+        mock_fetch.assert_called_once_with("test query", use_cache=True)
+        mock_get_selection.assert_called_once_with("test query", "1. Title 1", use_cache=True)
         
-        mock_save.assert_called_once_with(mock_top_news, satisfaction=mock_satisfaction)
-        mock_display.assert_called_once_with(mock_top_news, satisfaction=mock_satisfaction)
+        top_news = mock_save.call_args[0][0]
+        self.assertEqual([article.to_dict() for article in top_news], [{"title": "Title 1", "url": "url1"}])
+        self.assertEqual(mock_save.call_args[1], {"satisfaction": 85})
+        mock_display.assert_called_once_with(top_news, satisfaction=85)
+        self.mock_store_result.assert_called_once_with(
+            {"query": "test query", "articles": [{"title": "Title 1", "url": "url1"}], "ai_satisfaction": 85},
+            "interactive")
+        mock_spinner_async.assert_called_once()
+        self.assertEqual(mock_spinner.call_args[0][0], "Setting up AI service")
 
     @patch('main.run_with_spinner')
     @patch('main.input', return_value="test query")
-    def test_main_no_articles(self, mock_input, mock_spinner):
-        def spinner_side_effect(message, func, *args, **kwargs):
-            if "Fetching news" in message:
-                return []
-            return None
+    @patch('main.save_news_to_file')
+    @patch('main.display_news')
+    @patch('main.display_article')
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=80)
+    @patch('services.batch_service.stream_ai_selection_async')
+    @patch('services.batch_service.fetch_news_async')
+    @patch('main.run_with_spinner_async', side_effect=passthrough_spinner)
+    def test_main_stream_shows_each_pick_as_it_arrives(self, mock_spinner_async, mock_fetch, mock_stream,
+                                                        mock_get_satisfaction, mock_display_article, mock_display,
+                                                        mock_save, mock_input, mock_spinner):
+        mock_fetch.return_value = [{"title": "Title 1", "url": "url1"}, {"title": "Title 2", "url": "url2"}]
+        shown_before_pick = []
         
-        mock_spinner.side_effect = spinner_side_effect
+        async def fake_stream(query, titles_text, titles_length, top_count, use_cache=True):
+            for index in (1, 0):
+                shown_before_pick.append(mock_display_article.call_count)
+                yield index
+        mock_stream.side_effect = fake_stream
         
-        with self.assertRaises(SystemExit):
+        main(parse_args(["--no-resolve", "--stream"]))
+        
+        self.assertEqual(shown_before_pick, [0, 1])
+        self.assertEqual([c[0][1].title for c in mock_display_article.call_args_list], ["Title 2", "Title 1"])
+        self.assertEqual(mock_get_satisfaction.call_args[0][1], "1. Title 2\n2. Title 1")
+        self.assertEqual(mock_save.call_args[1], {"satisfaction": 80})
+        mock_display.assert_not_called()
+
+    @patch('main.run_with_spinner')
+    @patch('main.input', return_value="test query")
+    @patch('main.save_news_to_file')
+    @patch('main.display_news')
+    @patch('main.display_article')
+    @patch('services.batch_service.resolve_articles')
+    @patch('services.batch_service.get_ai_satisfaction_async', return_value=80)
+    @patch('services.batch_service.stream_ai_selection_async')
+    @patch('services.batch_service.fetch_news_async')
+    @patch('main.run_with_spinner_async', side_effect=passthrough_spinner)
+    def test_main_stream_shows_publisher_links_once_resolved(self, mock_spinner_async, mock_fetch, mock_stream,
+                                                              mock_get_satisfaction, mock_resolve, mock_display_article,
+                                                              mock_display, mock_save, mock_input, mock_spinner):
+        mock_fetch.return_value = [{"title": "Title 1", "url": "https://news.google.com/rss/articles/1"}]
+        async def fake_stream(query, titles_text, titles_length, top_count, use_cache=True):
+            yield 0
+        async def fake_resolve(articles, use_cache=True):
+            for article in articles:
+                article.url = "https://publisher.example.com/story"
+            return articles
+        mock_stream.side_effect = fake_stream
+        mock_resolve.side_effect = fake_resolve
+        streamed_urls = []
+        mock_display_article.side_effect = lambda number, article: streamed_urls.append(article.url)
+        
+        main(parse_args(["--stream"]))
+        
+        self.assertEqual(streamed_urls, ["https://news.google.com/rss/articles/1"])
+        top_news = mock_display.call_args[0][0]
+        self.assertEqual(top_news[0].url, "https://publisher.example.com/story")
+        self.assertEqual(mock_display.call_args[1], {"satisfaction": 80})
+
+    @patch('main.run_with_spinner')
+    @patch('main.input', return_value="test query")
+    @patch('main.save_news_to_file')
+    @patch('main.display_news')
+    @patch('services.batch_service.get_ai_satisfaction_async')
+    @patch('services.batch_service.get_ai_combined_async', return_value='{"picks": [2], "satisfaction": 70}')
+    @patch('services.batch_service.fetch_news_async')
+    @patch('main.run_with_spinner_async', side_effect=passthrough_spinner)
+    def test_main_combined(self, mock_spinner_async, mock_fetch, mock_get_combined,
+                           mock_get_satisfaction, mock_display, mock_save,
+                           mock_input, mock_spinner):
+        mock_fetch.return_value = [{"title": "Title 1", "url": "url1"}, {"title": "Title 2", "url": "url2"}]
+        
+        main(parse_args(["--combined"]))
+        
+        mock_get_combined.assert_called_once_with("test query", "1. Title 1\n2. Title 2", use_cache=True)
+        mock_get_satisfaction.assert_not_called()
+        self.assertEqual(mock_save.call_args[0][0][0].title, "Title 2")
+        self.assertEqual(mock_save.call_args[1], {"satisfaction": 70})
+
+    @patch('main.run_with_spinner')
+    @patch('main.input', return_value="test query")
+    @patch('services.batch_service.fetch_news_async', return_value=[])
+    @patch('main.run_with_spinner_async', side_effect=passthrough_spinner)
+    def test_main_no_articles(self, mock_spinner_async, mock_fetch, mock_input, mock_spinner):
+        with self.assertRaises(SystemExit) as cm:
             main()
+        self.assertEqual(cm.exception.code, 0)
+
+    @patch('main.run_with_spinner')
+    @patch('main.input', return_value="test query")
+    @patch('services.batch_service.fetch_news_async', side_effect=NewsFetchError("Connection error."))
+    @patch('main.run_with_spinner_async', side_effect=passthrough_spinner)
+    def test_main_fetch_error(self, mock_spinner_async, mock_fetch, mock_input, mock_spinner):
+        with self.assertRaises(SystemExit) as cm:
+            main()
+        self.assertEqual(cm.exception.code, 1)
+
+    @patch('main.run_with_spinner')
+    @patch('main.input', return_value="test query")
+    @patch('main.save_news_to_file')
+    @patch('main.display_news')
+    @patch('services.batch_service.fetch_news_async')
+    def test_main_serves_fresh_prefetched_result(self, mock_fetch, mock_display, mock_save,
+                                                 mock_input, mock_spinner):
+        self.mock_lookup_result.return_value = (
+            {"query": "test query", "articles": [{"title": "Stored", "url": "url1"}], "ai_satisfaction": 77},
+            120
+        )
+        
+        main()
+        
+        mock_fetch.assert_not_called()
+        top_news = mock_display.call_args[0][0]
+        self.assertEqual(top_news[0].title, "Stored")
+        self.assertEqual(mock_display.call_args[1], {"satisfaction": 77})
+        self.mock_lookup_result.assert_called_once_with("test query", source="watch")
+        # The Gemini SDK is never waited for when the store has the answer
+        mock_spinner.assert_not_called()
+
+    def test_parse_args_watch(self):
+        args = parse_args(["watch", "--once", "--interval", "60"])
+        self.assertEqual(args.command, "watch")
+        self.assertTrue(args.once)
+        self.assertEqual(args.interval, 60)
+
+    def test_parse_args_no_cache(self):
+        self.assertFalse(parse_args([]).no_cache)
+        self.assertTrue(parse_args(["--no-cache", "batch", "-"]).no_cache)
+
+    def test_parse_args_no_rank(self):
+        self.assertTrue(parse_args([]).rank)
+        self.assertFalse(parse_args(["--no-rank"]).rank)
+
+    def test_parse_args_batch(self):
+        args = parse_args(["batch", "topics.txt", "--fetch-concurrency", "3"])
+        self.assertEqual(args.command, "batch")
+        self.assertEqual(args.source, "topics.txt")
+        self.assertEqual(args.fetch_concurrency, 3)
+
+    @patch('services.ai_service.backoff_delay', return_value=0)
+    @patch('services.ai_service.get_model')
+    @patch('services.batch_service.fetch_news_async')
+    @patch('main.setup_gemini')
+    def test_batch_stdout_stays_json_when_gemini_fails(self, mock_setup, mock_fetch, mock_get_model, mock_backoff):
+        async def fake_fetch(query, use_cache=True):
+            return [{"title": "t1", "url": "url1"}, {"title": "t2", "url": "url2"}]
+        async def failing_generate(prompt, **kwargs):
+            raise RuntimeError("boom")
+        mock_fetch.side_effect = fake_fetch
+        mock_get_model.return_value.generate_content_async.side_effect = failing_generate
+
+        with patch('sys.stdin', io.StringIO("a\nb\n")), \
+             patch('sys.stdout', new_callable=io.StringIO) as stdout, \
+             patch('sys.stderr', new_callable=io.StringIO) as stderr:
+            main(parse_args(["--no-cache", "--no-resolve", "batch", "-"]))
+
+        results = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([result["query"] for result in results], ["a", "b"])
+        self.assertIn("Using default selection instead.", stderr.getvalue())
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
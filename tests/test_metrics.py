@@ -0,0 +1,62 @@
+import unittest
+import threading
+import urllib.request
+from utils.metrics import Counter, Histogram, register_cache, render_metrics, start_metrics_server
+from utils.cache import PersistentCache
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_sums_thread_shards(self):
+        counter = Counter("test_requests_total", "Requests.", labels=("call",))
+        
+        def work():
+            for _ in range(1000):
+                counter.inc("selection")
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc("satisfaction", amount=2)
+        
+        self.assertEqual(counter.value("selection"), 4000)
+        self.assertIn('test_requests_total{call="satisfaction"} 2', counter.render())
+
+    def test_histogram_exposition(self):
+        histogram = Histogram("test_latency_seconds", "Latency.", buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+        
+        lines = histogram.render()
+        self.assertEqual(lines[:2], ["# HELP test_latency_seconds Latency.", "# TYPE test_latency_seconds histogram"])
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 2', lines)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 3', lines)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 4', lines)
+        self.assertIn('test_latency_seconds_sum 3.65', lines)
+        self.assertIn('test_latency_seconds_count 4', lines)
+
+    def test_cache_hit_ratio(self):
+        cache = PersistentCache()
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        register_cache("test", cache)
+        
+        text = render_metrics()
+        self.assertIn('quicknews_cache_hits_total{cache="test"} 2', text)
+        self.assertIn('quicknews_cache_hit_ratio{cache="test"} 0.6666666666666666', text)
+
+    def test_metrics_server(self):
+        Counter("test_served_total", "Served.").inc()
+        server = start_metrics_server(0)
+        try:
+            host, port = server.server_address
+            with urllib.request.urlopen(f"http://{host}:{port}/metrics") as response:
+                self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+                self.assertIn("test_served_total 1", response.read().decode())
+        finally:
+            server.shutdown()
+            server.server_close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,88 @@
 import unittest
 from unittest.mock import patch, MagicMock
+import asyncio
 import requests
-from services.news_service import fetch_news, extract_titles, format_titles_for_ai
+from services.news_service import (fetch_news, fetch_news_async, extract_titles, format_titles_for_ai, NewsFetchError,
+                                   iter_feed_items, parse_feed, article_from_item,
+                                   create_session, get_session, close_session, get_async_session, close_async_session,
+                                   feed_cache_key)
+from utils.cache import PersistentCache
+
+SAMPLE_FEED = b"""
+<rss>
+    <channel>
+        <item>
+            <title>Test Title 1</title>
+            <link>http://example.com/1?param=test</link>
+            <pubDate>Mon, 20 Jan 2020 12:00:00 GMT</pubDate>
+        </item>
+    </channel>
+</rss>
+"""
+
+class FakeStream:
+    def __init__(self, data, chunk_size=None):
+        self.data = data
+        self.chunk_size = chunk_size
+        self.chunks_read = 0
+
+    async def iter_chunked(self, size):
+        size = self.chunk_size or size
+        for start in range(0, len(self.data), size):
+            self.chunks_read += 1
+            yield self.data[start:start + size]
+
+class FakeAsyncResponse:
+    def __init__(self, status, content=b"", headers=None, chunk_size=None, delay=0):
+        self.status = status
+        self.content = FakeStream(content, chunk_size)
+        self.headers = headers or {}
+        self.delay = delay
+
+    async def __aenter__(self):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+class FakeAsyncSession:
+    def __init__(self, response=None, error=None):
+        self.response = response
+        self.error = error
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        if self.error:
+            raise self.error
+        if isinstance(self.response, list):
+            return self.response.pop(0)
+        return self.response
+
+class RoutingSession:
+    # Answers each feed by the edition or host in its URL
+    def __init__(self, routes):
+        self.routes = routes
+        self.urls = []
+
+    def get(self, url, **kwargs):
+        self.urls.append(url)
+        for marker, respond in self.routes.items():
+            if marker in url:
+                return respond()
+        raise AssertionError(f"unexpected feed {url}")
+
+def build_items(*items):
+    return b"<rss><channel>" + b"".join(
+        b"<item><title>%s</title><link>%s</link><pubDate>%s</pubDate></item>" % item for item in items
+    ) + b"</channel></rss>"
+
+EDITIONS = [('en-US', 'US', 'US:en'), ('en-GB', 'GB', 'GB:en')]
 
 class TestNewsService(unittest.TestCase):
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_news_success(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 200
@@ -24,15 +102,16 @@ class TestNewsService(unittest.TestCase):
             </channel>
         </rss>
         """
+        mock_response.iter_content.return_value = [mock_response.content]
         mock_get.return_value = mock_response
         
         articles = fetch_news("test query")
         self.assertEqual(len(articles), 2)
-        self.assertEqual(articles[0]["title"], "Test Title 1")
-        self.assertEqual(articles[0]["url"], "http://example.com/1")
-        self.assertEqual(articles[1]["url"], "http://example.com/2")
+        self.assertEqual(articles[0].title, "Test Title 1")
+        self.assertEqual(articles[0].url, "http://example.com/1")
+        self.assertEqual(articles[1].url, "http://example.com/2")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_news_http_error(self, mock_get):
         mock_response = MagicMock()
         mock_response.status_code = 404
@@ -41,20 +120,242 @@ class TestNewsService(unittest.TestCase):
         with self.assertRaises(SystemExit):
             fetch_news("test query")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_news_timeout(self, mock_get):
         mock_get.side_effect = requests.exceptions.Timeout()
         
         with self.assertRaises(SystemExit):
             fetch_news("test query")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_fetch_news_connection_error(self, mock_get):
         mock_get.side_effect = requests.exceptions.ConnectionError()
         
         with self.assertRaises(SystemExit):
             fetch_news("test query")
 
+    def test_fetch_news_async_success(self):
+        session = FakeAsyncSession(FakeAsyncResponse(200, SAMPLE_FEED))
+        
+        articles = asyncio.run(fetch_news_async("test query", session=session))
+        self.assertEqual(len(articles), 1)
+        self.assertEqual(articles[0].title, "Test Title 1")
+        self.assertEqual(articles[0].url, "http://example.com/1")
+        self.assertIn("q=test+query", session.urls[0])
+
+    def test_fetch_news_async_http_error(self):
+        session = FakeAsyncSession(FakeAsyncResponse(503))
+        
+        with self.assertRaises(NewsFetchError):
+            asyncio.run(fetch_news_async("test query", session=session))
+
+    def test_fetch_news_async_timeout(self):
+        session = FakeAsyncSession(error=asyncio.TimeoutError())
+        
+        with self.assertRaises(NewsFetchError) as cm:
+            asyncio.run(fetch_news_async("test query", session=session))
+        self.assertIn("timed out", str(cm.exception))
+
+    def test_fetch_news_async_retries_server_errors(self):
+        session = FakeAsyncSession([FakeAsyncResponse(503), FakeAsyncResponse(200, SAMPLE_FEED)])
+        
+        articles = asyncio.run(fetch_news_async("test query", session=session, backoff=0))
+        self.assertEqual(len(articles), 1)
+        self.assertEqual(len(session.urls), 2)
+
+    def test_create_session_configures_pool_and_retries(self):
+        session = create_session(max_per_host=3, max_retries=4)
+        adapter = session.get_adapter("https://news.google.com/rss")
+        
+        self.assertEqual(adapter._pool_maxsize, 3)
+        self.assertEqual(adapter.max_retries.total, 4)
+        self.assertIn(503, adapter.max_retries.status_forcelist)
+        session.close()
+
+    def test_get_session_is_shared(self):
+        close_session()
+        try:
+            self.assertIs(get_session(), get_session())
+        finally:
+            close_session()
+
+    def test_get_async_session_is_shared_per_loop(self):
+        async def sessions():
+            first = get_async_session()
+            second = get_async_session()
+            await close_async_session()
+            return first, second
+        
+        first, second = asyncio.run(sessions())
+        self.assertIs(first, second)
+        self.assertTrue(first.closed)
+
+    def test_feed_cache_key_normalizes_query(self):
+        self.assertEqual(feed_cache_key("  Climate   Change ", "2025-01-20"), feed_cache_key("climate change", "2025-01-20"))
+        self.assertNotEqual(feed_cache_key("climate", "2025-01-20"), feed_cache_key("climate", "2025-01-21"))
+
+    @patch('services.news_service.article_from_item', side_effect=article_from_item)
+    @patch('requests.Session.get')
+    def test_fetch_news_cache_hit_skips_request_and_parsing(self, mock_get, mock_parse):
+        cache = PersistentCache(ttl=60)
+        
+        with patch('services.news_service.get_feed_cache', return_value=cache):
+            mock_get.return_value = MagicMock(status_code=200, headers={"ETag": '"v1"'})
+            mock_get.return_value.iter_content.return_value = [SAMPLE_FEED]
+            fetch_news("test query", use_cache=True)
+            articles = fetch_news("Test  Query", use_cache=True)
+        
+        self.assertEqual(articles[0].title, "Test Title 1")
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_parse.call_count, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    @patch('services.news_service.article_from_item', side_effect=article_from_item)
+    def test_fetch_news_async_revalidates_stale_entry(self, mock_parse):
+        cache = PersistentCache(ttl=0)
+        session = FakeAsyncSession([
+            FakeAsyncResponse(200, SAMPLE_FEED, {"ETag": '"v1"', "Last-Modified": "Mon, 20 Jan 2020 12:00:00 GMT"}),
+            FakeAsyncResponse(304)
+        ])
+        session.get = MagicMock(side_effect=session.get)
+        
+        with patch('services.news_service.get_feed_cache', return_value=cache):
+            asyncio.run(fetch_news_async("test query", session=session, use_cache=True))
+            articles = asyncio.run(fetch_news_async("test query", session=session, use_cache=True))
+        
+        self.assertEqual(articles[0].title, "Test Title 1")
+        self.assertEqual(mock_parse.call_count, 1)
+        revalidation_headers = session.get.call_args_list[1][1]["headers"]
+        self.assertEqual(revalidation_headers["If-None-Match"], '"v1"')
+        self.assertEqual(revalidation_headers["If-Modified-Since"], "Mon, 20 Jan 2020 12:00:00 GMT")
+
+    def test_iter_feed_items_across_chunk_boundaries(self):
+        feed = b"<rss><channel>" + b"".join(
+            b"<item><title>Title %d &amp; more</title><link>http://example.com/%d?x=1</link></item>" % (i, i)
+            for i in range(5)
+        ) + b"</channel></rss>"
+        chunks = [feed[i:i + 7] for i in range(0, len(feed), 7)]
+        
+        articles = list(iter_feed_items(chunks))
+        self.assertEqual(len(articles), 5)
+        self.assertEqual(articles[4].title, "Title 4 & more")
+        self.assertEqual(articles[4].url, "http://example.com/4")
+        self.assertIsNone(articles[4].published)
+
+    def test_parse_feed_reads_timestamp_and_source(self):
+        feed = (b"<rss><channel><item><title>Rates cut - Reuters</title><link>http://a.com/1</link>"
+                b"<pubDate>Mon, 20 Jan 2020 12:00:00 GMT</pubDate><source url=\"https://reuters.com\">Reuters</source>"
+                b"</item></channel></rss>")
+        article = parse_feed(feed)[0]
+        self.assertEqual(article.published, 1579521600.0)
+        self.assertEqual(article.source, "Reuters")
+
+    def test_cached_articles_keep_timestamp_and_source(self):
+        cache = PersistentCache(ttl=60)
+        feed = (b"<rss><channel><item><title>T</title><link>http://a.com/1</link>"
+                b"<pubDate>Mon, 20 Jan 2020 12:00:00 GMT</pubDate><source>Reuters</source></item></channel></rss>")
+        session = FakeAsyncSession(FakeAsyncResponse(200, feed))
+        
+        with patch('services.news_service.get_feed_cache', return_value=cache), \
+             patch.object(cache, 'set', wraps=cache.set) as mock_set:
+            asyncio.run(fetch_news_async("test query", session=session, use_cache=True))
+            articles = asyncio.run(fetch_news_async("test query", session=session, use_cache=True))
+        
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual((articles[0].published, articles[0].source), (1579521600.0, "Reuters"))
+        # The parsed articles are all a later hit needs, so the raw feed isn't kept
+        self.assertNotIn("body", mock_set.call_args[0][1])
+
+    def test_iter_feed_items_stops_reading_at_limit(self):
+        feed = b"<rss><channel>" + b"<item><title>T</title></item>" * 100 + b"</channel></rss>"
+        consumed = []
+        def chunks():
+            for i in range(0, len(feed), 64):
+                consumed.append(i)
+                yield feed[i:i + 64]
+        
+        articles = list(iter_feed_items(chunks(), limit=3))
+        self.assertEqual(len(articles), 3)
+        self.assertLess(len(consumed), 5)
+
+    def test_parse_feed_missing_fields(self):
+        articles = parse_feed(b"<rss><channel><item></item></channel></rss>")
+        self.assertEqual(len(articles), 1)
+        self.assertEqual(articles[0].title, "No title")
+        self.assertIsNone(articles[0].published)
+
+    def test_fetch_news_async_stops_streaming_at_limit(self):
+        feed = b"<rss><channel>" + b"<item><title>T</title><link>http://e.com/a</link></item>" * 500 + b"</channel></rss>"
+        response = FakeAsyncResponse(200, feed, chunk_size=256)
+        
+        articles = asyncio.run(fetch_news_async("test query", session=FakeAsyncSession(response), limit=10))
+        self.assertEqual(len(articles), 10)
+        self.assertLess(response.content.chunks_read, 10)
+
+    def test_cache_entry_with_smaller_limit_is_not_reused(self):
+        cache = PersistentCache(ttl=60)
+        feed = b"<rss><channel>" + b"<item><title>T</title></item>" * 5 + b"</channel></rss>"
+        session = FakeAsyncSession([FakeAsyncResponse(200, feed), FakeAsyncResponse(200, feed)])
+        
+        with patch('services.news_service.get_feed_cache', return_value=cache):
+            first = asyncio.run(fetch_news_async("test query", session=session, use_cache=True, limit=2))
+            second = asyncio.run(fetch_news_async("test query", session=session, use_cache=True, limit=4))
+            third = asyncio.run(fetch_news_async("test query", session=session, use_cache=True, limit=3))
+        
+        self.assertEqual((len(first), len(second), len(third)), (2, 4, 3))
+        self.assertEqual(len(session.urls), 2)
+
+    @patch('services.news_service.EXTRA_FEEDS', ["https://feeds.example.com/search?q={query}"])
+    @patch('services.news_service.NEWS_EDITIONS', EDITIONS)
+    def test_fetch_news_async_merges_feeds_by_date(self):
+        us = build_items((b"Older", b"http://a.com/1?x=1", b"Mon, 20 Jan 2020 10:00:00 GMT"),
+                         (b"Shared", b"http://a.com/2", b"Mon, 20 Jan 2020 11:00:00 GMT"))
+        gb = build_items((b"Shared again", b"http://a.com/2?utm=gb", b"Mon, 20 Jan 2020 11:00:00 GMT"),
+                         (b"Newest", b"http://b.com/1", b"Mon, 20 Jan 2020 12:00:00 GMT"))
+        extra = build_items((b"Undated", b"http://c.com/1", b""))
+        session = RoutingSession({
+            "ceid=US:en": lambda: FakeAsyncResponse(200, us),
+            "ceid=GB:en": lambda: FakeAsyncResponse(200, gb),
+            "feeds.example.com": lambda: FakeAsyncResponse(200, extra),
+        })
+        
+        articles = asyncio.run(fetch_news_async("test query", session=session))
+        
+        self.assertEqual([a.title for a in articles], ["Newest", "Shared", "Older", "Undated"])
+        self.assertIn("https://feeds.example.com/search?q=test+query", session.urls)
+
+    @patch('services.news_service.NEWS_EDITIONS', EDITIONS + [('de', 'DE', 'DE:de')])
+    def test_fetch_news_async_returns_partial_results_by_deadline(self):
+        session = RoutingSession({
+            "ceid=US:en": lambda: FakeAsyncResponse(200, build_items((b"Fast", b"http://a.com/1", b""))),
+            "ceid=GB:en": lambda: FakeAsyncResponse(404),
+            "ceid=DE:de": lambda: FakeAsyncResponse(200, SAMPLE_FEED, delay=5),
+        })
+        
+        articles = asyncio.run(fetch_news_async("test query", session=session, deadline=0.1))
+        self.assertEqual([a.title for a in articles], ["Fast"])
+
+    @patch('services.news_service.NEWS_EDITIONS', EDITIONS)
+    def test_fetch_news_async_fails_when_every_feed_fails(self):
+        session = RoutingSession({"ceid=": lambda: FakeAsyncResponse(404)})
+        
+        with self.assertRaises(NewsFetchError):
+            asyncio.run(fetch_news_async("test query", session=session))
+
+    @patch('services.news_service.NEWS_EDITIONS', EDITIONS)
+    @patch('requests.Session.get')
+    def test_fetch_news_skips_a_failing_feed(self, mock_get):
+        def get(url, **kwargs):
+            if "ceid=GB:en" in url:
+                raise requests.exceptions.ConnectionError()
+            response = MagicMock(status_code=200)
+            response.iter_content.return_value = [SAMPLE_FEED]
+            return response
+        mock_get.side_effect = get
+        
+        articles = fetch_news("test query")
+        self.assertEqual([a.title for a in articles], ["Test Title 1"])
+
     def test_extract_titles(self):
         articles = [
             {"title": "Title 1"},
@@ -0,0 +1,94 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+from services.prefetch_service import lookup_result, store_result, next_refresh_delay, run_watch
+from utils.result_store import SQLiteResultStore
+
+class TestPrefetchService(unittest.TestCase):
+    def setUp(self):
+        patcher = patch('services.prefetch_service.get_result_store', return_value=SQLiteResultStore())
+        self.store = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_store_and_lookup_result(self):
+        store_result({"query": "Climate  Change", "articles": [], "ai_satisfaction": 80}, "watch")
+
+        result, age = lookup_result("climate change")
+        self.assertEqual(result["ai_satisfaction"], 80)
+        self.assertLess(age, 5)
+
+    def test_lookup_result_by_source(self):
+        store_result({"query": "climate", "articles": [], "ai_satisfaction": 80}, "watch")
+        store_result({"query": "climate", "articles": [], "ai_satisfaction": 40}, "interactive")
+
+        self.assertEqual(lookup_result("climate")[0]["ai_satisfaction"], 40)
+        self.assertEqual(lookup_result("climate", source="watch")[0]["ai_satisfaction"], 80)
+        self.assertIsNone(lookup_result("climate", source="serve"))
+
+    @patch('services.prefetch_service.time.time')
+    def test_lookup_result_ignores_stale_entries(self, mock_time):
+        mock_time.return_value = 1000
+        with patch('utils.cache.time.time', return_value=1000):
+            store_result({"query": "climate", "articles": [], "ai_satisfaction": 80}, "watch")
+
+        mock_time.return_value = 1000 + 59
+        self.assertIsNotNone(lookup_result("climate", max_age=60))
+        mock_time.return_value = 1000 + 61
+        self.assertIsNone(lookup_result("climate", max_age=60))
+
+    def test_next_refresh_delay_stays_within_jitter(self):
+        delays = [next_refresh_delay(100, 0.2) for _ in range(200)]
+        self.assertTrue(all(80 <= delay <= 120 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+    @patch('services.prefetch_service.process_query')
+    def test_run_watch_once_refreshes_each_topic_and_stores(self, mock_process):
+        async def fake_process(query, fetch_slots, ai_slots, **options):
+            if query == "broken":
+                return {"query": query, "articles": [], "ai_satisfaction": None, "error": "No news found"}
+            return {"query": query, "articles": [{"title": query, "url": "url"}], "ai_satisfaction": 90}
+        mock_process.side_effect = fake_process
+        results = []
+
+        asyncio.run(run_watch(["a", "broken", "b"], once=True, max_per_minute=6000, on_result=results.append))
+
+        self.assertEqual(sorted(r["query"] for r in results), ["a", "b", "broken"])
+        self.assertIsNotNone(lookup_result("a", source="watch"))
+        self.assertIsNone(lookup_result("broken"))
+
+    @patch('services.prefetch_service.time.time')
+    @patch('services.prefetch_service.process_query')
+    def test_watched_topic_stays_servable_across_unchanged_refreshes(self, mock_process, mock_time):
+        async def fake_process(query, fetch_slots, ai_slots, **options):
+            return {"query": query, "articles": [{"title": "t", "url": "u"}], "ai_satisfaction": 90, "unchanged": True}
+        mock_process.side_effect = fake_process
+        mock_time.return_value = 1000
+        store_result({"query": "a", "articles": [{"title": "t", "url": "u"}], "ai_satisfaction": 90}, "watch")
+
+        # Each refresh finds too few new headlines, yet confirms the stored answer
+        for minutes in (20, 40):
+            mock_time.return_value = 1000 + minutes * 60
+            asyncio.run(run_watch(["a"], once=True, delta=True))
+
+        self.assertEqual(mock_process.call_args[1]["delta"], True)
+        mock_time.return_value = 1000 + 50 * 60
+        result, age = lookup_result("a", max_age=30 * 60, source="watch")
+        self.assertEqual(result, {"query": "a", "articles": [{"title": "t", "url": "u"}], "ai_satisfaction": 90})
+        self.assertEqual(age, 10 * 60)
+
+    @patch('services.prefetch_service.process_query')
+    def test_run_watch_rate_limits_refresh_starts(self, mock_process):
+        starts = []
+
+        async def fake_process(query, fetch_slots, ai_slots, **options):
+            starts.append(asyncio.get_running_loop().time())
+            return {"query": query, "articles": [], "ai_satisfaction": 90}
+        mock_process.side_effect = fake_process
+
+        asyncio.run(run_watch(["a", "b", "c"], once=True, max_per_minute=1200))
+
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        self.assertTrue(all(gap >= 0.045 for gap in gaps))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from services.ranking_service import strip_source, tokenize, rank_articles
+
+class TestRankingService(unittest.TestCase):
+    def test_strip_source(self):
+        self.assertEqual(strip_source("Markets rally after rate cut - Reuters"), "Markets rally after rate cut")
+        self.assertEqual(strip_source("Biden - Trump debate recap - The New York Times"), "Biden - Trump debate recap")
+        self.assertEqual(strip_source("No publisher"), "No publisher")
+
+    def test_tokenize_drops_stopwords(self):
+        self.assertEqual(tokenize("The Future of AI, in 2025!"), ["future", "ai", "2025"])
+
+    def test_rank_articles_puts_relevant_titles_first(self):
+        articles = [
+            {"title": "Stocks fall on Wall Street - Reuters"},
+            {"title": "Football transfer news - BBC"},
+            {"title": "Climate change talks stall - AP"},
+            {"title": "Heatwave linked to climate change, scientists say - CNN"},
+        ]
+
+        ranked = rank_articles("climate change", articles, top_n=2)
+        self.assertEqual({a["title"] for a in ranked}, {articles[2]["title"], articles[3]["title"]})
+
+    def test_rank_articles_dedupes_syndicated_copies(self):
+        articles = [
+            {"title": "Climate summit opens in Paris - BBC"},
+            {"title": "Climate summit opens in Paris - CNN"},
+            {"title": "New climate report published - AP"},
+        ]
+
+        ranked = rank_articles("climate", articles)
+        self.assertEqual([a["title"] for a in ranked], [articles[0]["title"], articles[2]["title"]])
+
+    def test_rank_articles_keeps_feed_order_without_matches(self):
+        articles = [{"title": f"Headline number {word}"} for word in ["one", "two", "three"]]
+        self.assertEqual(rank_articles("unrelated", articles), articles)
+
+    def test_rank_articles_handles_empty_input(self):
+        self.assertEqual(rank_articles("anything", []), [])
+        self.assertEqual(rank_articles("", [{"title": "Only"}]), [{"title": "Only"}])
+
+if __name__ == '__main__':
+    unittest.main()
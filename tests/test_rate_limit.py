@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import patch, MagicMock
+from types import SimpleNamespace
+from utils.rate_limit import TokenBucket, CircuitBreaker, backoff_delay, is_throttled, retry_after_seconds
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TestRateLimit(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = patch('utils.rate_limit.time.monotonic', new=self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_token_bucket_spaces_requests_after_the_burst(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+        
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0, 0, 0.5, 1.0])
+        self.clock.now += 1.0
+        self.assertEqual(bucket.reserve(), 0.5)
+
+    def test_token_bucket_try_acquire_never_waits(self):
+        bucket = TokenBucket(rate=1, capacity=2)
+        
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [True, True, False])
+        self.clock.now += 1.0
+        self.assertTrue(bucket.try_acquire())
+        bucket.pause(5)
+        self.clock.now += 2.0
+        self.assertFalse(bucket.try_acquire())
+        self.assertEqual(bucket.reserve(), 3.0)
+
+    def test_token_bucket_pause_and_adaptive_rate(self):
+        bucket = TokenBucket(rate=10, capacity=10)
+        bucket.pause(3)
+        self.assertEqual(bucket.reserve(), 3)
+        
+        bucket.throttle()
+        self.assertEqual(bucket.rate, 5)
+        for _ in range(20):
+            bucket.recover()
+        self.assertEqual(bucket.rate, 10)
+
+    def test_circuit_breaker_opens_and_half_opens(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+        
+        self.clock.now += 30
+        self.assertTrue(breaker.allow())
+        # Only one trial request while half open
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        
+        self.clock.now += 30
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+    def test_circuit_breaker_retries_a_trial_that_never_reports_back(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        self.clock.now += 30
+        self.assertTrue(breaker.allow())
+        
+        # The trial was cancelled, so neither a success nor a failure ever arrives
+        self.clock.now += 29
+        self.assertFalse(breaker.allow())
+        self.clock.now += 1
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_backoff_delay_is_capped_full_jitter(self):
+        delays = [backoff_delay(attempt, 2, 10) for attempt in range(6) for _ in range(50)]
+        self.assertTrue(all(0 <= delay <= 10 for delay in delays))
+        self.assertTrue(all(delay <= 2 for delay in delays[:50]))
+
+    def test_retry_after_from_header_and_retry_info(self):
+        http_error = MagicMock(code=429, response=SimpleNamespace(headers={"Retry-After": "7"}))
+        self.assertTrue(is_throttled(http_error))
+        self.assertEqual(retry_after_seconds(http_error), 7.0)
+        
+        grpc_error = SimpleNamespace(code=429, details=[SimpleNamespace(retry_delay=SimpleNamespace(seconds=2, nanos=500000000))])
+        self.assertEqual(retry_after_seconds(grpc_error), 2.5)
+        
+        self.assertFalse(is_throttled(Exception("boom")))
+        self.assertIsNone(retry_after_seconds(Exception("boom")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+from unittest.mock import patch
+import asyncio
+import time
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from models.article import Article
+from services.resolver_service import resolve_urls, resolve_articles, URL_RESOLUTIONS
+from services.news_service import create_async_session
+from utils.cache import PersistentCache
+
+def create_app(hits):
+    async def redirect(request):
+        hits.append((request.method, request.path))
+        raise web.HTTPFound("/publisher/story?utm_source=news")
+
+    async def no_head(request):
+        hits.append((request.method, request.path))
+        if request.method == "HEAD":
+            raise web.HTTPMethodNotAllowed("HEAD", ["GET"])
+        raise web.HTTPFound("/publisher/other")
+
+    async def with_id(request):
+        hits.append((request.method, request.path))
+        raise web.HTTPFound("/publisher/story?id=7&utm_medium=rss&fbclid=abc&page=2")
+
+    async def gone(request):
+        hits.append((request.method, request.path))
+        if request.method == "HEAD":
+            raise web.HTTPMethodNotAllowed("HEAD", ["GET"])
+        raise web.HTTPFound("/publisher/missing")
+
+    async def slow(request):
+        hits.append((request.method, request.path))
+        await asyncio.sleep(5)
+        raise web.HTTPFound("/publisher/late")
+
+    async def publisher(request):
+        hits.append((request.method, request.path))
+        if request.match_info["name"] == "missing":
+            raise web.HTTPNotFound()
+        return web.Response(text="story")
+
+    app = web.Application()
+    app.router.add_route("*", "/rss/articles/1", redirect)
+    app.router.add_route("*", "/rss/articles/2", no_head)
+    app.router.add_route("*", "/rss/articles/3", with_id)
+    app.router.add_route("*", "/rss/articles/gone", gone)
+    app.router.add_route("*", "/rss/articles/slow", slow)
+    app.router.add_route("*", "/publisher/{name}", publisher)
+    return app
+
+async def resolve_with_server(paths, rounds=1, **options):
+    # Resolves the same links `rounds` times and returns the last answer with the server's paths
+    hits = []
+    async with TestServer(create_app(hits)) as server:
+        session = create_async_session()
+        try:
+            urls = [str(server.make_url(path)) for path in paths]
+            for _ in range(rounds):
+                resolved = await resolve_urls(urls, session=session, **options)
+        finally:
+            await session.close()
+        base = str(server.make_url(""))
+        return {url.replace(base, ""): target.replace(base, "") for url, target in resolved.items()}, hits
+
+class TestResolverService(unittest.TestCase):
+    def setUp(self):
+        self.cache = PersistentCache()
+        patcher = patch('services.resolver_service.get_redirect_cache', return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_redirects_are_followed_with_head(self):
+        resolved, hits = asyncio.run(resolve_with_server(["/rss/articles/1"]))
+
+        self.assertEqual(resolved, {"/rss/articles/1": "/publisher/story"})
+        self.assertEqual(hits, [("HEAD", "/rss/articles/1"), ("HEAD", "/publisher/story")])
+
+    def test_tracking_params_are_dropped_and_the_rest_of_the_query_kept(self):
+        resolved, _ = asyncio.run(resolve_with_server(["/rss/articles/3"]))
+
+        self.assertEqual(resolved, {"/rss/articles/3": "/publisher/story?id=7&page=2"})
+
+    def test_get_that_ends_in_an_error_keeps_the_link_uncached(self):
+        failures = URL_RESOLUTIONS.value("failed")
+
+        resolved, _ = asyncio.run(resolve_with_server(["/rss/articles/gone"]))
+
+        self.assertEqual(resolved, {"/rss/articles/gone": "/rss/articles/gone"})
+        self.assertEqual(URL_RESOLUTIONS.value("failed"), failures + 1)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_links_that_do_not_redirect_are_not_cached(self):
+        resolved, hits = asyncio.run(resolve_with_server(["/publisher/story"], rounds=2))
+
+        self.assertEqual(resolved, {"/publisher/story": "/publisher/story"})
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_get_is_used_when_head_is_refused(self):
+        resolved, hits = asyncio.run(resolve_with_server(["/rss/articles/2"]))
+
+        self.assertEqual(resolved, {"/rss/articles/2": "/publisher/other"})
+        self.assertEqual(hits, [("HEAD", "/rss/articles/2"), ("GET", "/rss/articles/2"), ("GET", "/publisher/other")])
+
+    def test_slow_publisher_keeps_its_link_and_does_not_stall_the_rest(self):
+        timeouts = URL_RESOLUTIONS.value("timeout")
+
+        start = time.perf_counter()
+        resolved, _ = asyncio.run(resolve_with_server(["/rss/articles/slow", "/rss/articles/1"], timeout=0.2))
+
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(resolved, {"/rss/articles/slow": "/rss/articles/slow", "/rss/articles/1": "/publisher/story"})
+        self.assertEqual(URL_RESOLUTIONS.value("timeout"), timeouts + 1)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_resolved_links_are_served_from_the_cache(self):
+        resolved, hits = asyncio.run(resolve_with_server(["/rss/articles/1"], rounds=2))
+
+        self.assertEqual(resolved, {"/rss/articles/1": "/publisher/story"})
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_links_that_are_not_http_are_left_alone(self):
+        resolved = asyncio.run(resolve_urls(["#", "url1", "#"]))
+        self.assertEqual(resolved, {"#": "#", "url1": "url1"})
+
+    @patch('services.resolver_service.resolve_urls')
+    def test_resolve_articles_rewrites_links(self, mock_resolve_urls):
+        async def fake_resolve_urls(urls, **options):
+            return {url: url.replace("redirect", "publisher") for url in urls} | {"redirect/3": "publisher/1"}
+        mock_resolve_urls.side_effect = fake_resolve_urls
+        articles = [Article("T", "redirect/1", ["redirect/2", "redirect/3"])]
+
+        asyncio.run(resolve_articles(articles))
+
+        self.assertEqual(articles[0].to_dict(), {"title": "T", "url": "publisher/1", "alternate_urls": ["publisher/2"]})
+
+if __name__ == '__main__':
+    unittest.main()
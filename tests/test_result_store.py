@@ -0,0 +1,105 @@
+import unittest
+import os
+import json
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from utils.result_store import open_result_store
+
+def append_results(backend, path, writer, count):
+    store = open_result_store(backend, path)
+    for i in range(count):
+        store.append(f"topic {i % 3}", {"writer": writer, "i": i})
+    store.close()
+
+class ResultStoreTests:
+    backend = None
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "results." + self.backend)
+        self.store = open_result_store(self.backend, self.path)
+        self.addCleanup(self.store.close)
+
+    def test_latest_and_history(self):
+        self.store.append("climate", {"n": 1}, stored_at=100)
+        self.store.append("space", {"n": 2}, stored_at=150)
+        self.store.append("climate", {"n": 3}, stored_at=200)
+        
+        self.assertEqual(self.store.latest("climate"), ({"n": 3}, 200))
+        self.assertIsNone(self.store.latest("oceans"))
+        self.assertEqual(self.store.history("climate"), [({"n": 3}, 200), ({"n": 1}, 100)])
+        self.assertEqual(self.store.history("climate", since=150), [({"n": 3}, 200)])
+
+    def test_latest_and_history_by_source(self):
+        self.store.append("climate", {"n": 1}, stored_at=100, source="watch")
+        self.store.append("climate", {"n": 2}, stored_at=200, source="interactive")
+        self.store.append("climate", {"n": 3}, stored_at=300)
+        
+        self.assertEqual(self.store.latest("climate"), ({"n": 3}, 300))
+        self.assertEqual(self.store.latest("climate", source="watch"), ({"n": 1}, 100))
+        self.assertIsNone(self.store.latest("climate", source="serve"))
+        self.assertEqual(self.store.history("climate", source="interactive"), [({"n": 2}, 200)])
+
+    def test_history_survives_reopening(self):
+        self.store.append("climate", {"n": 1})
+        self.store.close()
+        
+        reopened = open_result_store(self.backend, self.path)
+        self.assertEqual(reopened.latest("climate")[0], {"n": 1})
+        reopened.close()
+
+    def test_many_writer_processes(self):
+        with ProcessPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(append_results, self.backend, self.path, writer, 30) for writer in range(4)]
+            for future in futures:
+                future.result()
+        
+        history = self.store.history("topic 0")
+        self.assertEqual(len(history), 40)
+        self.assertEqual(sorted((r["writer"], r["i"]) for r, _ in history),
+                         sorted((w, i) for w in range(4) for i in range(0, 30, 3)))
+
+class TestSQLiteResultStore(ResultStoreTests, unittest.TestCase):
+    backend = "sqlite"
+
+class TestJsonlResultStore(ResultStoreTests, unittest.TestCase):
+    backend = "jsonl"
+
+    def test_log_is_append_only_json_lines(self):
+        self.store.append("climate", {"n": 1}, stored_at=100)
+        self.store.append("climate", {"n": 2}, stored_at=200)
+        
+        with open(self.path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn('"result": {"n": 1}', lines[0])
+
+    def test_index_keeps_one_entry_per_query(self):
+        for i in range(50):
+            self.store.append(f"topic {i % 2}", {"n": i}, stored_at=i)
+        
+        with open(self.store.index_path) as f:
+            index = json.load(f)
+        self.assertEqual(sorted(index), ["topic 0", "topic 1"])
+        self.assertEqual(len(index["topic 0"]), 1)
+        self.assertEqual(self.store.latest("topic 1"), ({"n": 49}, 49))
+        self.assertEqual(len(self.store.history("topic 0")), 25)
+
+    def test_missing_index_is_rebuilt_from_the_log(self):
+        self.store.append("climate", {"n": 1}, stored_at=100)
+        self.store.append("climate", {"n": 2}, stored_at=200)
+        os.remove(self.store.index_path)
+        self.assertEqual(self.store.latest("climate"), ({"n": 2}, 200))
+        
+        self.store.append("space", {"n": 3}, stored_at=300)
+        self.assertEqual(self.store.latest("climate"), ({"n": 2}, 200))
+        self.assertEqual(self.store.latest("space"), ({"n": 3}, 300))
+
+class TestOpenResultStore(unittest.TestCase):
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            open_result_store("csv", "results.csv")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,8 @@ import sys
 import time
 import threading
 from io import StringIO
-from utils.spinner import Spinner, run_with_spinner
+import asyncio
+from utils.spinner import Spinner, run_with_spinner, run_with_spinner_async
 
 class TestSpinner(unittest.TestCase):
     @patch('sys.stdout', new_callable=StringIO)
@@ -45,5 +46,24 @@ class TestSpinner(unittest.TestCase):
         with self.assertRaises(ValueError):
             run_with_spinner("Testing", failing_func)
 
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('threading.Thread')
+    def test_run_with_spinner_async_no_thread(self, mock_thread, mock_stdout):
+        async def slow_add(a, b):
+            await asyncio.sleep(0.15)
+            return a + b
+        
+        result = asyncio.run(run_with_spinner_async("Adding", slow_add(2, 3)))
+        self.assertEqual(result, 5)
+        self.assertIn("Adding", mock_stdout.getvalue())
+        mock_thread.assert_not_called()
+
+    def test_run_with_spinner_async_exception(self):
+        async def failing():
+            raise ValueError("Test exception")
+        
+        with self.assertRaises(ValueError):
+            asyncio.run(run_with_spinner_async("Testing", failing()))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import unittest
+import subprocess
+import sys
+from utils.startup import PROJECT_DIR, parse_importtime, warm_up
+
+IMPORTTIME_OUTPUT = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        420 | io
+import time:      2000 |       2500 |     requests.adapters
+import time:      1000 |       3500 |   requests
+import time:       500 |       4000 | main
+"""
+
+class TestStartup(unittest.TestCase):
+    def test_parse_importtime(self):
+        entries = parse_importtime(IMPORTTIME_OUTPUT)
+        
+        self.assertEqual([e["module"] for e in entries], ["_io", "io", "requests.adapters", "requests", "main"])
+        self.assertEqual(entries[3], {"module": "requests", "self_us": 1000, "cumulative_us": 3500, "depth": 1})
+        self.assertEqual(entries[4]["depth"], 0)
+
+    def test_warm_up_runs_loaders(self):
+        calls = []
+        warm_up(lambda: calls.append("loaded"), modules=("json",)).join(timeout=5)
+        
+        self.assertEqual(calls, ["loaded"])
+
+    def test_import_main_skips_heavy_dependencies(self):
+        heavy = ["google.generativeai", "aiohttp", "requests", "lxml.etree", "numpy"]
+        code = f"import sys, main; print([m for m in {heavy!r} if m in sys.modules])"
+        result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_DIR, capture_output=True, text=True)
+        
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import asyncio
+from utils.tracing import span, record, record_span, traced, start_tracing, stop_tracing
+
+class TestTracing(unittest.TestCase):
+    def tearDown(self):
+        stop_tracing()
+
+    def test_spans_are_not_recorded_when_tracing_is_off(self):
+        with span("fetch_news"):
+            record("bytes", 100)
+        
+        tracer = start_tracing()
+        self.assertEqual(tracer.spans, [])
+
+    def test_record_adds_to_innermost_span(self):
+        tracer = start_tracing()
+        with span("fetch_news"):
+            record("bytes", 100)
+            with span("parse_feed"):
+                record("bytes", 40)
+            record("retries")
+        
+        stages = tracer.summary()
+        self.assertEqual(stages["fetch_news"]["bytes"], 100)
+        self.assertEqual(stages["fetch_news"]["retries"], 1)
+        self.assertEqual(stages["parse_feed"]["bytes"], 40)
+        self.assertGreaterEqual(stages["fetch_news"]["total_ms"], stages["parse_feed"]["total_ms"])
+
+    def test_traced_async_tasks_get_their_own_tracks(self):
+        @traced("ai_selection")
+        async def select(delay):
+            await asyncio.sleep(delay)
+            record("cache_hits")
+        
+        async def run():
+            await asyncio.gather(select(0.01), select(0.02))
+        
+        tracer = start_tracing()
+        asyncio.run(run())
+        
+        self.assertEqual(tracer.summary()["ai_selection"]["calls"], 2)
+        self.assertEqual(tracer.summary()["ai_selection"]["cache_hits"], 2)
+        tids = {event["tid"] for event in tracer.chrome_trace()["traceEvents"] if event["ph"] == "X"}
+        self.assertEqual(len(tids), 2)
+
+    def test_chrome_trace_events(self):
+        tracer = start_tracing()
+        record_span("dns", tracer.origin + 0.001, tracer.origin + 0.004, host="news.google.com")
+        
+        event = tracer.chrome_trace()["traceEvents"][0]
+        self.assertEqual(event["ph"], "X")
+        self.assertEqual(event["ts"], 1000.0)
+        self.assertEqual(event["dur"], 3000.0)
+        self.assertEqual(event["args"], {"host": "news.google.com"})
+
+if __name__ == '__main__':
+    unittest.main()
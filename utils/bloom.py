@@ -0,0 +1,117 @@
+import os
+import math
+import mmap
+import struct
+import hashlib
+import threading
+
+MAGIC = b"QNBF"
+# Magic, number of bits, number of hashes, keys added
+HEADER = struct.Struct("<4sQIQ")
+
+def filter_shape(capacity, error_rate):
+    # The standard sizing: m = -n ln p / (ln 2)^2 bits and k = (m / n) ln 2 hashes
+    bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / capacity * math.log(2)))
+    return bits, hashes
+
+class BloomFilter:
+    def __init__(self, path=None, capacity=1000000, error_rate=0.01):
+        # A set of strings that answers "maybe seen" or "definitely not seen" in a fixed
+        # number of bits, memory-mapped from `path` so only the pages in use are loaded
+        self.path = path
+        self.capacity = capacity
+        self.bits, self.hashes = filter_shape(capacity, error_rate)
+        self.size = HEADER.size + (self.bits + 7) // 8
+        self._lock = threading.Lock()
+        self._map = None
+
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    def _open(self, reset=False):
+        if not self.path:
+            self._map = mmap.mmap(-1, self.size)
+            self._write_header(0)
+            return
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if not reset and os.fstat(fd).st_size >= HEADER.size:
+                magic, bits, hashes, count = HEADER.unpack(os.pread(fd, HEADER.size, 0))
+                # A filter written with other settings keeps its own shape
+                if magic == MAGIC and os.fstat(fd).st_size == HEADER.size + (bits + 7) // 8:
+                    self.bits, self.hashes, self.size = bits, hashes, HEADER.size + (bits + 7) // 8
+                    self._map = mmap.mmap(fd, self.size)
+                    return
+            # Truncating and regrowing leaves a sparse file: untouched pages take no disk space
+            os.ftruncate(fd, 0)
+            os.ftruncate(fd, self.size)
+            self._map = mmap.mmap(fd, self.size)
+            self._write_header(0)
+        finally:
+            os.close(fd)
+
+    def _write_header(self, count):
+        HEADER.pack_into(self._map, 0, MAGIC, self.bits, self.hashes, count)
+
+    @property
+    def count(self):
+        return HEADER.unpack_from(self._map)[3]
+
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first, second = struct.unpack("<QQ", digest)
+        second |= 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, key):
+        with self._lock:
+            data = self._map
+            return all(data[HEADER.size + position // 8] & (1 << position % 8) for position in self._positions(key))
+
+    def add(self, key):
+        # Returns True if the key was new
+        with self._lock:
+            if self.count >= self.capacity:
+                # Past its capacity the filter would start calling everything seen
+                self._clear()
+            data = self._map
+            new = False
+            for position in self._positions(key):
+                index = HEADER.size + position // 8
+                bit = 1 << position % 8
+                if not data[index] & bit:
+                    data[index] |= bit
+                    new = True
+            if new:
+                self._write_header(self.count + 1)
+            return new
+
+    def update(self, keys):
+        return sum(self.add(key) for key in keys)
+
+    def _clear(self):
+        self._map.close()
+        self._open(reset=True)
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def __len__(self):
+        return self.count
+
+    def flush(self):
+        with self._lock:
+            self._map.flush()
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
@@ -0,0 +1,191 @@
+import time
+import bisect
+import asyncio
+import functools
+import threading
+import contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_metrics = []
+_caches = {}
+_registry_lock = threading.Lock()
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        # Each thread writes only to its own shard, so the hot path takes no lock;
+        # the lock is only held when a new thread's shard is registered
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+        with _registry_lock:
+            _metrics.append(self)
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self):
+        with self._shards_lock:
+            shards = list(self._shards)
+        # dict.copy() runs without releasing the GIL, so a shard is never read mid-update
+        return [shard.copy() for shard in shards]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *label_values, amount=1):
+        shard = self._shard()
+        shard[label_values] = shard.get(label_values, 0) + amount
+
+    def value(self, *label_values):
+        return sum(shard.get(label_values, 0) for shard in self._snapshots())
+
+    def _render_samples(self):
+        totals = {}
+        for shard in self._snapshots():
+            for label_values, value in shard.items():
+                totals[label_values] = totals.get(label_values, 0) + value
+        return [f"{self.name}{format_labels(self.labels, label_values)} {value}"
+                for label_values, value in sorted(totals.items())]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *label_values):
+        shard = self._shard()
+        state = shard.get(label_values)
+        if state is None:
+            # One slot per bucket plus +Inf, then the running sum
+            state = shard[label_values] = [0] * (len(self.buckets) + 2)
+        state[bisect.bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, *label_values):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *label_values)
+
+    def counts(self, *label_values):
+        return self._totals().get(label_values, [0] * (len(self.buckets) + 2))
+
+    def _totals(self):
+        totals = {}
+        for shard in self._snapshots():
+            for label_values, state in shard.items():
+                total = totals.setdefault(label_values, [0] * len(state))
+                for i, value in enumerate(state):
+                    total[i] += value
+        return totals
+
+    def _render_samples(self):
+        lines = []
+        for label_values, totals in sorted(self._totals().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), totals):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {totals[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+def register_cache(name, cache):
+    with _registry_lock:
+        _caches[name] = cache
+
+def render_caches():
+    with _registry_lock:
+        caches = sorted(_caches.items())
+    if not caches:
+        return []
+
+    lines = ["# HELP quicknews_cache_hits_total Cache lookups answered from the cache.",
+             "# TYPE quicknews_cache_hits_total counter"]
+    lines.extend(f'quicknews_cache_hits_total{{cache="{name}"}} {cache.hits}' for name, cache in caches)
+    lines.extend(["# HELP quicknews_cache_misses_total Cache lookups that had to go upstream.",
+                  "# TYPE quicknews_cache_misses_total counter"])
+    lines.extend(f'quicknews_cache_misses_total{{cache="{name}"}} {cache.misses}' for name, cache in caches)
+    lines.extend(["# HELP quicknews_cache_hit_ratio Share of cache lookups answered from the cache.",
+                  "# TYPE quicknews_cache_hit_ratio gauge"])
+    for name, cache in caches:
+        lookups = cache.hits + cache.misses
+        lines.append(f'quicknews_cache_hit_ratio{{cache="{name}"}} {cache.hits / lookups if lookups else 0}')
+    return lines
+
+def render_metrics():
+    with _registry_lock:
+        metrics = list(_metrics)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    lines.extend(render_caches())
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+def timed(histogram, *label_values):
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with histogram.time(*label_values):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(*label_values):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,118 @@
+import time
+import random
+import threading
+
+class TokenBucket:
+    def __init__(self, rate, capacity, min_rate=None):
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        # Takes a token now and returns how long the caller must wait before using it,
+        # so sync and async callers can share the bucket and sleep their own way
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+            return max(wait, self.paused_until - now)
+
+    def try_acquire(self):
+        # Takes a token only if one is free right now, for requests that are worth
+        # sending only when they don't have to wait
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1 or self.paused_until > now:
+                return False
+            self.tokens -= 1
+            return True
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def throttle(self):
+        # Halve the rate on a quota error and win it back a little at a time on success
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def recover(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "open" and now - self.opened_at >= self.reset_timeout:
+                # Let a single trial request through; everyone else keeps failing fast
+                self.state = "half_open"
+                self.trial_started_at = now
+                return True
+            if self.state == "half_open" and now - self.trial_started_at >= self.reset_timeout:
+                # A trial that never reported back (cancelled, say) mustn't shut Gemini out for good
+                self.trial_started_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+def backoff_delay(attempt, base, cap):
+    # Full jitter keeps callers that failed together from retrying together
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def is_throttled(error):
+    return getattr(error, "code", None) == 429 or type(error).__name__ in ("TooManyRequests", "ResourceExhausted")
+
+def retry_after_seconds(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if value is not None:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+    # gRPC errors carry a google.rpc.RetryInfo in their details instead of a header
+    details = getattr(error, "details", None)
+    if callable(details):
+        details = None
+    for detail in details or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    return None
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+import threading
+import contextlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+def atomic_write_json(path, data, indent=None):
+    # Write to a temp file in the same directory and rename it over the target, so
+    # readers see either the old file or the new one and concurrent writers never interleave
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    return size
+
+class SQLiteResultStore:
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # SQLite connections can't cross a fork, so each pool worker opens its own
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path or ":memory:", timeout=30, check_same_thread=False)
+            if self.path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, query TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, value TEXT NOT NULL, source TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS results_query_stored_at ON results (query, stored_at)")
+            self._conn.commit()
+            self._pid = os.getpid()
+        return self._conn
+
+    def append(self, query, result, stored_at=None, source=None):
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            conn = self._connection()
+            conn.execute("INSERT INTO results (query, stored_at, value, source) VALUES (?, ?, ?, ?)",
+                         (query, stored_at, json.dumps(result), source))
+            conn.commit()
+        return stored_at
+
+    def latest(self, query, source=None):
+        history = self.history(query, limit=1, source=source)
+        return history[0] if history else None
+
+    def history(self, query, limit=None, since=None, source=None):
+        # Newest first; the (query, stored_at) index answers this without a table scan
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT value, stored_at FROM results WHERE query = ? AND stored_at >= ? AND (? IS NULL OR source = ?) "
+                "ORDER BY stored_at DESC, id DESC LIMIT ?",
+                (query, since if since is not None else 0, source, source, limit if limit is not None else -1)
+            ).fetchall()
+        return [(json.loads(value), stored_at) for value, stored_at in rows]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+class JsonlResultStore:
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".index.json"
+        self.lock_path = path + ".lock"
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive):
+        # The thread lock covers this process; flock covers other writers in a process pool
+        with self._lock, open(self.lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _records(self):
+        # Yields (offset, record) for every line of the log, oldest first
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            offset = 0
+            for line in f:
+                try:
+                    yield offset, json.loads(line)
+                except ValueError:
+                    pass
+                offset += len(line)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _rebuild_index(self):
+        index = {}
+        for offset, record in self._records():
+            sources = index.setdefault(record["query"], {})
+            source = record["source"] or ""
+            if source not in sources or record["stored_at"] >= sources[source][1]:
+                sources[source] = [offset, record["stored_at"]]
+        return index
+
+    def _read_index(self):
+        # The index only remembers the newest record of each query from each source;
+        # it can always be rebuilt from the log
+        index = self._load_index()
+        return index if index is not None else self._rebuild_index()
+
+    def append(self, query, result, stored_at=None, source=None):
+        stored_at = time.time() if stored_at is None else stored_at
+        line = json.dumps({"query": query, "stored_at": stored_at, "source": source, "result": result}) + "\n"
+        with self._locked(exclusive=True):
+            index = self._load_index()
+            changed = index is None
+            if changed:
+                index = self._rebuild_index()
+            with open(self.path, 'ab') as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(line.encode('utf-8'))
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Rewriting the index costs one entry per query, however long the history grows
+            sources = index.setdefault(query, {})
+            latest = sources.get(source or "")
+            if latest is None or stored_at >= latest[1]:
+                sources[source or ""] = [offset, stored_at]
+                changed = True
+            if changed:
+                atomic_write_json(self.index_path, index)
+        return stored_at
+
+    def latest(self, query, source=None):
+        with self._locked(exclusive=False):
+            sources = self._read_index().get(query, {})
+            if source is not None:
+                position = sources.get(source)
+            else:
+                position = max(sources.values(), key=lambda position: position[1], default=None)
+            if position is None:
+                return None
+            offset, stored_at = position
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                return json.loads(f.readline())["result"], stored_at
+
+    def history(self, query, limit=None, since=None, source=None):
+        # Older records aren't indexed, so the full history is a scan of the log
+        with self._locked(exclusive=False):
+            records = [(record["result"], record["stored_at"]) for _, record in self._records()
+                       if record["query"] == query and (since is None or record["stored_at"] >= since)
+                       and (source is None or record["source"] == source)]
+        records.sort(key=lambda record: record[1], reverse=True)
+        return records[:limit] if limit is not None else records
+
+    def close(self):
+        pass
+
+def open_result_store(backend, path):
+    if backend == "sqlite":
+        return SQLiteResultStore(path)
+    if backend == "jsonl":
+        return JsonlResultStore(path)
+    raise ValueError(f"Unknown result store backend: {backend}")
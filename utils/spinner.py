@@ -1,5 +1,6 @@
 import sys
 import time
+import asyncio
 import threading
 import itertools
 from concurrent.futures import ThreadPoolExecutor
@@ -20,15 +21,32 @@ class Spinner:
         self.running = False
         if self.spinner_thread:
             self.spinner_thread.join()
+        self.clear()
+
+    def clear(self):
+        # Blanks the spinner's line so other output can be printed; it's redrawn on the next tick
         sys.stdout.write('\r' + ' ' * (len(self.message) + 10) + '\r')
         sys.stdout.flush()
 
+    def update(self, message):
+        self.clear()
+        self.message = message
+
+    def _draw(self):
+        sys.stdout.write('\r' + self.message + ' ' + next(self.spinner))
+        sys.stdout.flush()
+
     def _spin(self):
         while self.running:
-            sys.stdout.write('\r' + self.message + ' ' + next(self.spinner))
-            sys.stdout.flush()
+            self._draw()
             time.sleep(0.1)
 
+    async def spin_async(self):
+        self.running = True
+        while self.running:
+            self._draw()
+            await asyncio.sleep(0.1)
+
 def run_with_spinner(message, func, *args, **kwargs):
     spinner = Spinner(message)
     result = None
@@ -45,4 +63,15 @@ def run_with_spinner(message, func, *args, **kwargs):
     if exception:
         raise exception
     
-    return result
\ No newline at end of file
+    return result
+
+async def run_with_spinner_async(message, awaitable, spinner=None):
+    # Pass a spinner to change its message or print around it while the awaitable runs
+    spinner = spinner if spinner is not None else Spinner(message)
+    spin_task = asyncio.ensure_future(spinner.spin_async())
+    
+    try:
+        return await awaitable
+    finally:
+        spin_task.cancel()
+        spinner.stop()
\ No newline at end of file
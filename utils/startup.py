@@ -0,0 +1,57 @@
+import os
+import sys
+import importlib
+import subprocess
+import threading
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WARM_UP_MODULES = ("aiohttp", "requests", "lxml.etree", "numpy")
+
+def warm_up(*loaders, modules=WARM_UP_MODULES):
+    # Import the heavy dependencies while the user is still typing; failures are
+    # left for the real import to report
+    def run():
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+        for loader in loaders:
+            try:
+                loader()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
+
+def parse_importtime(output):
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        entries.append({
+            "module": name.strip(),
+            "self_us": int(parts[0]),
+            "cumulative_us": int(parts[1]),
+            # -X importtime indents nested imports by two spaces per level
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+        })
+    return entries
+
+def profile_startup(statement="import main", python=sys.executable):
+    result = subprocess.run([python, "-X", "importtime", "-c", statement],
+                            cwd=PROJECT_DIR, capture_output=True, text=True)
+    return parse_importtime(result.stderr)
+
+def print_startup_profile(entries, top=15):
+    total_us = sum(entry["cumulative_us"] for entry in entries if entry["depth"] == 0)
+    print(f"Import time: {total_us / 1000:.1f} ms across {len(entries)} modules\n")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for entry in sorted(entries, key=lambda e: e["cumulative_us"], reverse=True)[:top]:
+        print(f"{entry['cumulative_us'] / 1000:>9.1f} ms {entry['self_us'] / 1000:>7.1f} ms  {entry['module']}")
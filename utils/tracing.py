@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import functools
+import contextlib
+import contextvars
+
+_tracer = None
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    __slots__ = ("name", "start", "end", "track", "attrs")
+
+    def __init__(self, name, start, end=None, track=None, attrs=None):
+        self.name = name
+        self.start = start
+        self.end = end
+        self.track = track
+        self.attrs = attrs or {}
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def add(self, key, amount=1):
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+class Tracer:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self):
+        stages = {}
+        for span in self.spans:
+            stage = stages.setdefault(span.name, {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            duration_ms = span.duration * 1000
+            stage["calls"] += 1
+            stage["total_ms"] += duration_ms
+            stage["max_ms"] = max(stage["max_ms"], duration_ms)
+            for key, value in span.attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stage[key] = stage.get(key, 0) + value
+        return stages
+
+    def chrome_trace(self):
+        tracks = {}
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            events.append({
+                "name": span.name,
+                "cat": "quicknews",
+                "ph": "X",
+                "ts": round((span.start - self.origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": os.getpid(),
+                # Concurrent asyncio tasks share a thread, so each task gets its own row
+                "tid": tracks.setdefault(span.track, len(tracks) + 1),
+                "args": {key: value for key, value in span.attrs.items()},
+            })
+        for track, tid in tracks.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                           "args": {"name": str(track[1] or track[0])}})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def current_track():
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return (threading.current_thread().name, task.get_name() if task else None)
+
+def start_tracing():
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+def stop_tracing():
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+@contextlib.contextmanager
+def span(name, **attrs):
+    tracer = _tracer
+    if tracer is None:
+        yield
+        return
+
+    current = Span(name, time.perf_counter(), track=current_track(), attrs=attrs)
+    token = _current_span.set(current)
+    try:
+        yield
+    finally:
+        current.end = time.perf_counter()
+        _current_span.reset(token)
+        tracer.add_span(current)
+
+def record(key, amount=1):
+    current = _current_span.get()
+    if current is not None:
+        current.add(key, amount)
+
+def record_span(name, start, end, **attrs):
+    tracer = _tracer
+    if tracer is not None:
+        tracer.add_span(Span(name, start, end, track=current_track(), attrs=attrs))
+
+def print_trace_summary(tracer):
+    stages = tracer.summary()
+    if not stages:
+        return
+
+    wall_ms = (max(s.end for s in tracer.spans) - min(s.start for s in tracer.spans)) * 1000
+    print(f"\n{'stage':<22} {'calls':>5} {'total ms':>10} {'max ms':>9} {'share':>6}  details")
+    for name, stage in sorted(stages.items(), key=lambda item: item[1]["total_ms"], reverse=True):
+        details = " ".join(f"{key}={value}" for key, value in stage.items()
+                           if key not in ("calls", "total_ms", "max_ms"))
+        share = stage["total_ms"] / wall_ms * 100 if wall_ms else 0
+        print(f"{name:<22} {stage['calls']:>5} {stage['total_ms']:>10.1f} {stage['max_ms']:>9.1f} {share:>5.0f}%  {details}")
+    print(f"{'wall time':<22} {'':>5} {wall_ms:>10.1f}")
+
+def write_chrome_trace(tracer, path):
+    with open(path, 'w') as f:
+        json.dump(tracer.chrome_trace(), f)
+
+def traced(name):
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator